@@ -0,0 +1,117 @@
+import os
+import threading
+import types
+from config import HTTP_POOL_SIZE
+
+# requests, python-dotenv and schwabdev are imported inside the functions that need them,
+# so importing this module performs no I/O and stays cheap for backtests and tools
+
+# The one Schwab client shared by the stream, order placement and order tracking
+_client = None
+_account_hashes = {}  # id(client) -> account hash
+_lock = threading.Lock()
+
+class PooledRequests:
+    """Stand-in for the `requests` module whose request functions share one keep-alive Session."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def __getattr__(self, name):
+        if name in ("get", "post", "put", "patch", "delete", "request"):
+            return getattr(self.session, name)
+        import requests
+        return getattr(requests, name)
+
+def build_session():
+    """Create a requests Session that keeps up to HTTP_POOL_SIZE connections alive per host."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    return session
+
+def pool_client_requests(client, session):
+    """Route the `requests.get/post/...` calls made by the client's own methods through `session`.
+
+    Each method of the client's class that refers to the requests module is rebound on this
+    instance with a copy of its module globals in which `requests` is a PooledRequests. The
+    module, its `requests` global and every other client are left as they are.
+    """
+    import requests
+    pooled = PooledRequests(session)
+    module_globals = {}  # id(original globals) -> copy with `requests` replaced
+    for cls in reversed(type(client).__mro__):
+        for name, function in vars(cls).items():
+            if name.startswith("__") or not isinstance(function, types.FunctionType):
+                continue
+            if function.__globals__.get("requests") is not requests or "requests" not in function.__code__.co_names:
+                continue
+            key = id(function.__globals__)
+            if key not in module_globals:
+                module_globals[key] = dict(function.__globals__, requests=pooled)
+            pooled_function = types.FunctionType(function.__code__, module_globals[key], function.__name__,
+                                                 function.__defaults__, function.__closure__)
+            pooled_function.__kwdefaults__ = function.__kwdefaults__
+            setattr(client, name, types.MethodType(pooled_function, client))
+
+def enable_connection_pooling(client):
+    """Reuse TCP/TLS connections for every REST call the client makes.
+
+    schwabdev clients that own a `_session` (4.0.0, the release this was checked against) are
+    left alone. Releases whose Client takes no session and calls requests.get/post/... from
+    schwabdev.client at module level open a new connection per call; only this client's
+    calls are routed through one pooled Session.
+    """
+    import requests
+    session = getattr(client, "_session", None)
+    if isinstance(session, requests.Session):
+        # Clients that own a Session already keep connections alive. Their requests run one at
+        # a time under the client's session lock, so a larger pool would gain nothing, and
+        # mounting a new adapter would drop the retry policy of the client's own adapter.
+        return
+    pool_client_requests(client, build_session())
+
+def create_client():
+    """Build a Schwab client from the credentials in .env."""
+    import schwabdev
+    from dotenv import load_dotenv
+    load_dotenv()
+    app_key = os.getenv("APP_KEY")
+    app_secret = os.getenv("APP_SECRET")
+    redirect_url = os.getenv("REDIRECT_URL")
+    tokens_file = os.getenv("TOKENS_FILE") or os.getenv("tokens_file")
+
+    # The client handles token refresh automatically
+    client = schwabdev.Client(app_key, app_secret, redirect_url, tokens_file)
+    enable_connection_pooling(client)
+    return client
+
+def get_client():
+    """Return the shared Schwab client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = create_client()
+    return _client
+
+def set_client(client):
+    """Replace the shared client (e.g. with a mock broker for paper trading)."""
+    global _client
+    with _lock:
+        _client = client
+
+def get_account_hash(client=None):
+    """Return the hash of the first linked account, fetched once per client and cached."""
+    client = client or get_client()
+    account_hash = _account_hashes.get(id(client))
+    if account_hash is None:
+        response = client.account_linked()
+        if response.ok:
+            account_data = response.json()
+            if account_data:
+                account_hash = account_data[0]['hashValue']
+                _account_hashes[id(client)] = account_hash
+    return account_hash
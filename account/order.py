@@ -1,61 +1,52 @@
 import json
 import time
 import os
-from rich.console import Console
-from dotenv import load_dotenv
-import schwabdev
+from account.client import get_client, get_account_hash as get_cached_account_hash
+from account.order_store import order_store
+from account.order_tracker import status_label
 from config import TICKER_SYMBOL, QUANTITY, STOP_PRICE_OFFSET, STOP_PRICE_LINK_TYPE, STOP_PRICE_LINK_BASIS
 from datetime import datetime
-
-# Load environment variables from .env
-load_dotenv()
-APP_KEY = os.getenv("APP_KEY")
-APP_SECRET = os.getenv("APP_SECRET")
-REDIRECT_URL = os.getenv("REDIRECT_URL")
-TOKENS_FILE = os.getenv("tokens_file")
-
-# Initialize Schwab client (it handles token refresh automatically)
-client = schwabdev.Client(APP_KEY, APP_SECRET, REDIRECT_URL, TOKENS_FILE)
-
-# Initialize console for rich output
-console = Console()
-
-# Global variables to track order IDs and active orders
+from functools import partial
+from utils.async_log import log_writer
+from utils.metrics import metrics
+
+# Round trip of client.order_place / order_cancel, and orders sent
+order_place_latency = metrics.histogram("order_place")
+order_cancel_latency = metrics.histogram("order_cancel")
+orders_sent = metrics.counter("orders_sent")
+
+# Console for rich output, created on first use so importing this module stays cheap
+console = None
+
+def get_console():
+    global console
+    if console is None:
+        from rich.console import Console
+        console = Console()
+    return console
+
+# Global variables to track the order IDs of the last buy (orders themselves live in order_store)
 parent_order_id = None
 child_order_id = None
-active_orders = []
-
-# Function to get account hash
-def get_account_hash(client):
-    response = client.account_linked()
-    if response.ok:
-        account_data = response.json()
-        if account_data:
-            return account_data[0]['hashValue']
-    console.print("[bold red]Failed to retrieve account hash.[/bold red]")
-    return None
-
-# Function to add an active order
-def add_active_order(order_type, ticker, price, status="Active"):
-    global active_orders
-    active_orders.append({"order_type": order_type, "ticker": ticker, "price": price, "status": status})
-
-# Function to get active orders
-def get_active_orders():
-    return active_orders
-
-# Function to update an order status
-def update_order_status(order_id, new_status):
-    global active_orders
-    for order in active_orders:
-        if order["order_id"] == order_id:
-            order["status"] = new_status
+
+# Function to get account hash (fetched once per client and cached)
+def get_account_hash(client=None):
+    account_hash = get_cached_account_hash(client)
+    if not account_hash:
+        get_console().print("[bold red]Failed to retrieve account hash.[/bold red]")
+    return account_hash
 
 # Function to place a two-legged buy order with a trailing stop
-def place_buy_order_with_trailing_stop(client, ticker, account_hash):
+def place_buy_order_with_trailing_stop(client, ticker, account_hash, price=None, strategy=None):
+    """Place a market buy with a trailing stop child and record the buy in order_store.
+
+    The order tracker records the trailing stop (see record_trailing_stop) once its order
+    listing shows the stop's ID. `price` (the price that triggered the order) and `strategy`
+    are only kept for display.
+    """
     global parent_order_id, child_order_id
     if not account_hash:
-        console.print("[bold red]Account hash is not available. Cannot place the order.[/bold red]")
+        get_console().print("[bold red]Account hash is not available. Cannot place the order.[/bold red]")
         return None, None
 
     order_payload = {
@@ -89,7 +80,10 @@ def place_buy_order_with_trailing_stop(client, ticker, account_hash):
     }
 
     try:
+        start = time.perf_counter()
         response = client.order_place(account_hash, order_payload)
+        order_place_latency.record(time.perf_counter() - start)
+        orders_sent.add()
         api_response = handle_api_response(response)
 
         log_order_payload_to_file(order_payload, "Buy", ticker, api_response)
@@ -98,74 +92,88 @@ def place_buy_order_with_trailing_stop(client, ticker, account_hash):
             location_header = response.headers.get("Location")
             if location_header:
                 parent_order_id = int(location_header.split('/')[-1])
-                child_order_id = parent_order_id + 1
-                add_active_order("Buy", ticker, None, "Active")
-                console.print(f"[bold green]Placed buy order for {ticker} with trailing stop. Parent Order ID: {parent_order_id}, Child Order ID: {child_order_id}[/bold green]")
+                child_order_id = None  # Set by record_trailing_stop
+                order_store.add(parent_order_id, "Buy", "BUY", ticker, QUANTITY, price, strategy=strategy)
+                get_console().print(f"[bold green]Placed buy order for {ticker} with trailing stop. Parent Order ID: {parent_order_id}[/bold green]")
                 return parent_order_id, order_payload
             else:
-                console.print(f"[bold red]Order placed, but no order ID found in the Location header.[/bold red]")
+                get_console().print(f"[bold red]Order placed, but no order ID found in the Location header.[/bold red]")
                 return None, order_payload
         else:
-            console.print(f"[bold red]Failed to place buy order for {ticker}. Status code: {response.status_code}[/bold red]")
+            get_console().print(f"[bold red]Failed to place buy order for {ticker}. Status code: {response.status_code}[/bold red]")
             return None, order_payload
 
     except Exception as e:
-        console.print(f"[bold red]Exception occurred while placing order: {str(e)}[/bold red]")
+        get_console().print(f"[bold red]Exception occurred while placing order: {str(e)}[/bold red]")
         return None, None
 
+def record_trailing_stop(parent_id, child):
+    """Order tracker callback: record the trailing stop of a buy the first time a poll shows it.
+
+    The API does not promise any relation between the IDs of an order and its children, so
+    the stop's ID is read from the child order strategy nested under the buy.
+    """
+    global child_order_id
+    parent = order_store.get(parent_id)
+    stop_id = int(child["orderId"])
+    if parent is None or order_store.get(stop_id) is not None:
+        return
+    order_store.add(stop_id, "Trailing Stop", "SELL", parent.ticker, parent.quantity,
+                    status=status_label(child.get("status") or "AWAITING_PARENT_ORDER"),
+                    strategy=parent.strategy, parent_id=parent_id)
+    if parent_id == parent_order_id:
+        child_order_id = stop_id
+
 def handle_api_response(response):
     try:
         return response.json()
     except ValueError:  # If response is not valid JSON
-        console.print(f"[bold red]Invalid JSON response[/bold red]")
+        get_console().print(f"[bold red]Invalid JSON response[/bold red]")
         # Log the raw response for further analysis
-        console.print(f"Raw response: {response.text}")
+        get_console().print(f"Raw response: {response.text}")
         return {"error": "Invalid JSON response", "raw_response": response.text}
 
-
-
-import os
-import json
-from datetime import datetime
+def render_order_payload(order_payload, action_type, ticker, api_response=None):
+    """Format an order payload and its API response the way they appear in the payload log."""
+    parts = [f"{action_type} Order for {ticker}:\n", json.dumps(order_payload, indent=4), "\n\n"]
+    if api_response:
+        parts.append("API Response:\n")
+        if isinstance(api_response, dict):
+            parts.append(json.dumps(api_response, indent=4))
+        else:
+            parts.append(str(api_response))
+        parts.append("\n\n")
+    return "".join(parts)
 
 def log_order_payload_to_file(order_payload, action_type, ticker, api_response=None):
+    """Queue the payload for Logs/OrderPayloads; formatting and file I/O happen on the log writer thread."""
     current_date = datetime.now().strftime("%Y-%m-%d")
     folder_name = f"Logs/OrderPayloads/{current_date}"
-    os.makedirs(folder_name, exist_ok=True)
-    
     file_name = f"{ticker}_OrderPayloads_{current_date}.txt"
     file_path = os.path.join(folder_name, file_name)
-    
-    try:
-        with open(file_path, mode='a') as file:
-            file.write(f"{action_type} Order for {ticker}:\n")
-            file.write(json.dumps(order_payload, indent=4))
-            file.write("\n\n")
-            
-            if api_response:
-                file.write("API Response:\n")
-                if isinstance(api_response, dict):
-                    file.write(json.dumps(api_response, indent=4))
-                else:
-                    file.write(str(api_response))
-                file.write("\n\n")
-                
-    except Exception as e:
-        console.print(f"[bold red]Error writing order payload to file: {e}[/bold red]")
+
+    log_writer.write(file_path, render=partial(render_order_payload, order_payload, action_type, ticker, api_response))
+
+def log_order_event(side, price):
+    """Append an order line to orders.log (shown in the GUI order log)."""
+    log_writer.write("orders.log", f"{side} order placed at price {price}\n")
 
 
 # Function to cancel the trailing stop order
-def cancel_trailing_stop_order(account_hash, order_id):
+def cancel_trailing_stop_order(account_hash, order_id, client=None):
+    client = client or get_client()
+    start = time.perf_counter()
     response = client.order_cancel(account_hash, order_id)
+    order_cancel_latency.record(time.perf_counter() - start)
     if response.status_code == 200:
-        console.print("[bold green]Trailing stop canceled successfully.[/bold green]")
+        get_console().print("[bold green]Trailing stop canceled successfully.[/bold green]")
         return True
     else:
-        console.print(f"[bold red]Failed to cancel trailing stop: {response.text}[/bold red]")
+        get_console().print(f"[bold red]Failed to cancel trailing stop: {response.text}[/bold red]")
         return False
 
 # Function to place a market sell order
-def place_market_sell_order(client, ticker, account_hash):
+def place_market_sell_order(client, ticker, account_hash, price=None, strategy=None):
     # Construct the sell order payload
     sell_order_payload = {
         "session": "NORMAL",
@@ -181,32 +189,36 @@ def place_market_sell_order(client, ticker, account_hash):
     }
 
     # Place the sell order using the client instance
+    start = time.perf_counter()
     response = client.order_place(account_hash, sell_order_payload)
+    order_place_latency.record(time.perf_counter() - start)
+    orders_sent.add()
     
     if response.status_code == 201:
-        console.print("[bold green]Market sell order placed successfully.[/bold green]")
+        get_console().print("[bold green]Market sell order placed successfully.[/bold green]")
         location_header = response.headers.get("Location")
         if location_header:
-            sell_order_id = location_header.split('/')[-1]
+            sell_order_id = int(location_header.split('/')[-1])
+            order_store.add(sell_order_id, "Sell", "SELL", ticker, QUANTITY, price, strategy=strategy)
             return sell_order_id
     else:
-        console.print(f"[bold red]Failed to place sell order: {response.text}[/bold red]")
+        get_console().print(f"[bold red]Failed to place sell order: {response.text}[/bold red]")
         return None
 
 
 # Function to cancel trailing stop and replace it with a market sell order
-def cancel_and_replace_with_market_sell(account_hash, order_id):
+def cancel_and_replace_with_market_sell(account_hash, order_id, ticker=TICKER_SYMBOL):
     if cancel_trailing_stop_order(account_hash, order_id):
         # Wait briefly before placing a new market sell order
         time.sleep(2)
-        place_market_sell_order(account_hash)
+        place_market_sell_order(get_client(), ticker, account_hash)
 
 """
 if __name__ == "__main__":
     # Retrieve the account hash
     account_hash = get_account_hash()
     if not account_hash:
-        console.print("[bold red]Could not retrieve account hash. Exiting...[/bold red]")
+        get_console().print("[bold red]Could not retrieve account hash. Exiting...[/bold red]")
         exit()
 
     # Example of placing a buy order with a trailing stop
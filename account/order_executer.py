@@ -1,120 +1,149 @@
-import threading
-from account.order import place_buy_order_with_trailing_stop, place_market_sell_order, get_account_hash
-from stream import get_last_x_minutes_data
-from utils.ema import calculate_ema_and_bands
+from account.order import (place_buy_order_with_trailing_stop, place_market_sell_order, cancel_trailing_stop_order,
+                           get_account_hash, log_order_event, record_trailing_stop)
+from account.order_store import order_store
+from account.order_tracker import OrderTracker
+from stream import add_account_activity_listener, is_symbol_live, gated_counter
+from utils.fields import require_fields
+from utils.metrics import metrics
+from utils.indicators import get_indicator_values
+from utils.strategies import StrategyRunner
+from utils.tick_bus import tick_bus
 import time
-from config import TICKER_SYMBOL
-import schwabdev
-from dotenv import load_dotenv
-import os
-
-# Load environment variables
-load_dotenv()
-APP_KEY = os.getenv("APP_KEY")
-APP_SECRET = os.getenv("APP_SECRET")
-REDIRECT_URL = os.getenv("REDIRECT_URL")
-TOKENS_FILE = os.getenv("TOKENS_FILE")
-
-# Initialize the Schwab client
-client = schwabdev.Client(APP_KEY, APP_SECRET, REDIRECT_URL, TOKENS_FILE)
-
-# List to track active orders
-active_orders = []
-
-def add_active_order(order_type, ticker, price, status="Active", order_id=None):
-    """Add a new active order to the list."""
-    active_orders.append({
-        "order_type": order_type,
-        "ticker": ticker,
-        "price": price,
-        "status": status,
-        "order_id": order_id
-    })
-
-def get_active_orders():
-    """Return the current active orders."""
-    return active_orders
-
-def update_order_status(order_id, new_status):
-    """Update the status of an order."""
-    global active_orders
-    for order in active_orders:
-        if order.get("order_id") == order_id:
-            order["status"] = new_status
-
-# Poll active orders in a separate thread to avoid blocking the main thread
+from datetime import datetime, timezone
+from config import TICKER_SYMBOLS
+from account.client import get_client
+
+# The executor decides on the last traded price only
+require_fields("order executer", "Last Price")
+
+# Time from a stream message arriving to the executor deciding on it, and the decision itself
+decision_latency = metrics.histogram("tick_to_decision")
+signal_latency = metrics.histogram("signal")
+
+# Strategies of the running executor, exposed to the status endpoint
+strategy_runner = None
+
+# Order tracker polling the broker for status changes, created by start_polling
+order_tracker = None
+
 def poll_active_orders(client, account_hash):
-    """Poll active orders and update their status."""
-    while True:
-        for order in active_orders:
-            order_id = order.get("order_id")
-            if order_id:
-                # Fetch order details from Schwab API
-                response = client.order_details(account_hash, order_id)
-                if response.ok:
-                    order_details = response.json()
-                    if order_details.get("status") == "CANCELED":
-                        update_order_status(order_id, "Canceled")
-                    elif order_details.get("status") == "FILLED":
-                        update_order_status(order_id, "Filled")
-        time.sleep(1)  # Poll every second
+    """Poll active orders and update their status until they reach a terminal state."""
+    tracker = create_order_tracker(client, account_hash)
+    tracker.run()
+
+def create_order_tracker(client, account_hash):
+    """Create the shared order tracker and hand it every open order, including orders
+    restored from the journal, every order placed later and the trailing stops it finds."""
+    global order_tracker
+    order_tracker = tracker = OrderTracker(client, account_hash, on_status_change=order_store.update_status,
+                                           on_child_order=record_trailing_stop)
+
+    def track(record):
+        tracker.track(record.order_id, datetime.fromtimestamp(record.entered_at, timezone.utc))
+
+    order_store.add_listener(track)
+    for record in order_store.open_orders():
+        track(record)
+
+    # Wake the tracker as soon as the account activity stream reports a change
+    add_account_activity_listener(order_tracker.on_account_activity)
+    return order_tracker
 
 # Create a function to start polling in a new thread
 def start_polling(client, account_hash):
-    polling_thread = threading.Thread(target=poll_active_orders, args=(client, account_hash))
-    polling_thread.daemon = True  # This ensures that the thread exits when the main program does
-    polling_thread.start()
+    tracker = create_order_tracker(client, account_hash)
+    tracker.start()  # Runs in a daemon thread, so it exits when the main program does
 
-def run_order_executor(orders_tree_widget):
-    global active_orders
-    last_alert_type = None  # Track the last alert type to alternate between buy and sell orders
-    first_order_placed = False  # Ensure we start with a buy order
+def create_strategy_runner(strategies=None, symbols=None):
+    """Create the strategy runner, resuming from the positions held (e.g. restored from the journal)."""
+    runner = StrategyRunner(strategies, symbols)
+    runner.seed_positions({symbol: held_quantity(symbol) for symbol in runner.symbols()})
+    return runner
 
-    # Retrieve the account hash at the beginning
-    account_hash = get_account_hash(client)
+def run_order_executor(symbols=None, client=None, account_hash=None, strategies=None):
+    """Feed every tick to the configured strategies (config.STRATEGIES) and place their orders."""
+    global strategy_runner
+    client = client or get_client()
+    runner = strategy_runner = create_strategy_runner(strategies, symbols or TICKER_SYMBOLS)
+
+    # Reuse the account hash resolved at startup (cached per client otherwise)
+    account_hash = account_hash or get_account_hash(client)
     if not account_hash:
         print("Failed to retrieve account hash. Exiting order executor.")
         return
 
+    # React to every new quote as soon as the stream publishes it. While an order is being
+    # placed, newer quotes are coalesced so we always decide on the latest price per symbol.
+    subscription = tick_bus.subscribe(coalesce=True)
+
     while True:
-        # Get EMA and bands data
-        ema, upper_band, lower_band = calculate_ema_and_bands()
-        latest_data = get_last_x_minutes_data()
-
-        if latest_data:
-            last_price = latest_data[-1].get('Last Price')
-            if ema is not None and last_price is not None:
-                # Ensure we start with a buy order
-                if not first_order_placed:
-                    if last_price < lower_band:
-                        alert_message = f"BUY ALERT: Last price {last_price} is below the lower band {lower_band}"
-                        print(alert_message)
-                        orders_tree_widget.insert("", "end", values=("BUY", last_price))
-                        parent_order_id, _ = place_buy_order_with_trailing_stop(client, TICKER_SYMBOL, account_hash)
-                        add_active_order("Buy", TICKER_SYMBOL, last_price, "Active", parent_order_id)
-                        last_alert_type = "buy"
-                        first_order_placed = True  # Mark that the first buy order has been placed
-                else:
-                    # After the first buy, alternate between sell and buy orders
-                    if last_price > upper_band and last_alert_type != "sell":
-                        alert_message = f"SELL ALERT: Last price {last_price} is above the upper band {upper_band}"
-                        print(alert_message)
-                        orders_tree_widget.insert("", "end", values=("SELL", last_price))
-                        parent_order_id, _ = place_market_sell_order(client, TICKER_SYMBOL, account_hash)
-                        add_active_order("Sell", TICKER_SYMBOL, last_price, "Active", parent_order_id)
-                        last_alert_type = "sell"
-                    elif last_price < lower_band and last_alert_type != "buy":
-                        alert_message = f"BUY ALERT: Last price {last_price} is below the lower band {lower_band}"
-                        print(alert_message)
-                        parent_order_id, _ = place_buy_order_with_trailing_stop(client, TICKER_SYMBOL, account_hash)
-                        add_active_order("Buy", TICKER_SYMBOL, last_price, "Active", parent_order_id)
-                        last_alert_type = "buy"
-
-        time.sleep(1)  # Monitor every second
-
-# Function to handle trailing stop event
-def handle_trailing_stop_event(order_id):
-    """Handle a trailing stop event by updating the order status."""
-    update_order_status(order_id, "Trailing Stop Hit")
-
-# You should run poll_active_orders in a separate thread to keep the orders updated continuously
+        for tick in subscription.get(timeout=1):
+            if tick.ema is None or tick.symbol not in runner.routes:
+                continue
+            # Never trade on a stale or short window (reconnecting, backfilling, warming up or old quotes)
+            if not is_symbol_live(tick.symbol):
+                gated_counter.add()
+                continue
+
+            start = time.perf_counter()
+            decision_latency.record(start - tick.received_at)
+
+            # The same strategy code drives the backtester (backtest.py)
+            indicators = get_indicator_values(tick.symbol) if runner.uses_indicators else None
+            intents = runner.on_tick(tick, indicators)
+            signal_latency.record(time.perf_counter() - start)
+            execute_intents(client, account_hash, runner, intents)
+
+def held_quantity(symbol):
+    """Filled position of a symbol plus buys still working (about to fill)."""
+    working_buys = sum(record.quantity for record in order_store.open_orders(symbol=symbol) if record.instruction == "BUY")
+    return order_store.positions().get(symbol, 0) + working_buys
+
+def trailing_stops(symbol):
+    return [record for record in order_store.open_orders(symbol=symbol) if record.order_type == "Trailing Stop"]
+
+def cancel_trailing_stops(client, account_hash, symbol):
+    """Cancel the working trailing stops of a symbol; False if one could not be canceled."""
+    for record in trailing_stops(symbol):
+        if not cancel_trailing_stop_order(account_hash, record.order_id, client):
+            return False
+        order_store.update_status(record.order_id, "Canceled")
+    return True
+
+def execute_intents(client, account_hash, runner, intents):
+    """Place the orders of the runner's intents and move each strategy to the position it now has."""
+    for intent in intents:
+        if execute_intent(client, account_hash, intent):
+            runner.commit(intent)
+        else:
+            # Nothing was placed: resume from what the account holds (a stop may have closed it)
+            runner.resume(intent, held_quantity(intent.symbol))
+
+def execute_intent(client, account_hash, intent):
+    """Place the order of a strategy intent: a buy with a trailing stop or a market sell.
+
+    Like the backtester, a sell first cancels the position's trailing stop, and is skipped
+    while flat (the stop already closed the position) or when the stop cannot be canceled
+    (it is being filled), so the two exits never both sell. Returns True if the order was placed.
+    """
+    side = intent.side.upper()
+    print(f"{side} ALERT: {intent.symbol} last price {intent.price} ({intent.strategy}: {intent.reason})")
+    if intent.side == "sell":
+        if order_tracker is not None and not trailing_stops(intent.symbol):
+            # A buy's stop is recorded from the tracker's next poll; catch up if it has not run yet
+            order_tracker.poll_once()
+        if held_quantity(intent.symbol) <= 0:
+            print(f"Skipping the sell of {intent.symbol}: no position held")
+            return False
+        if not cancel_trailing_stops(client, account_hash, intent.symbol):
+            print(f"Skipping the sell of {intent.symbol}: its trailing stop could not be canceled")
+            return False
+    # Placed orders are recorded in order_store, which hands them to the order tracker
+    if intent.side == "buy":
+        order_id, _ = place_buy_order_with_trailing_stop(client, intent.symbol, account_hash, intent.price, intent.strategy)
+    else:
+        order_id = place_market_sell_order(client, intent.symbol, account_hash, intent.price, intent.strategy)
+    if order_id is None:
+        return False
+    log_order_event(side, intent.price)
+    return True
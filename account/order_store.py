@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+import config
+from account.order_tracker import TERMINAL_STATUSES, status_label
+
+# One order as the bot sees it. `status` is the label shown to users ("Active", "Filled", ...),
+# `instruction` is "BUY" or "SELL", and `parent_id` links a trailing stop to its buy order.
+# `entered_at` and `updated_at` are epoch seconds.
+OrderRecord = namedtuple("OrderRecord", [
+    "order_id", "parent_id", "order_type", "instruction", "ticker", "quantity",
+    "price", "status", "strategy", "entered_at", "updated_at",
+])
+
+# Labels after which an order can no longer change, e.g. "Filled" or "Canceled"
+TERMINAL_LABELS = {status_label(status) for status in TERMINAL_STATUSES}
+
+class OrderStore:
+    """Orders and positions of the bot, shared by order placement, the executor and the tracker.
+
+    Open orders are indexed by order ID, status and symbol, so lookups and status updates
+    stay O(1) however many orders a day brings. Terminal orders move to a bounded archive
+    of the last `archive_size`, and each fill moves the symbol's position by its quantity.
+    With a journal opened, every change is appended as a JSON line and replayed by restore().
+    """
+
+    def __init__(self, archive_size=config.ORDER_ARCHIVE_SIZE):
+        self.archive_size = archive_size
+        self.open = {}  # order ID -> OrderRecord
+        self.archive = OrderedDict()  # order ID -> OrderRecord, oldest first
+        self.by_status = {}  # status -> {order ID: None}, open orders only
+        self.by_symbol = {}  # ticker -> {order ID: None}, open orders only
+        self.positions_held = {}  # ticker -> net filled quantity
+        self.lock = threading.Lock()
+        self.journal = None
+        self.listeners = []
+        # Set whenever an order is added or changes status, so the GUI redraws only on changes
+        self.changed = threading.Event()
+
+    def add_listener(self, callback):
+        """Call `callback(record)` for every order added, e.g. to start tracking it."""
+        self.listeners.append(callback)
+
+    def add(self, order_id, order_type, instruction, ticker, quantity, price=None,
+            status="Active", strategy=None, parent_id=None):
+        """Record a newly placed order and return its record."""
+        now = time.time()
+        record = OrderRecord(order_id, parent_id, order_type, instruction, ticker, quantity,
+                             price, status, strategy, now, now)
+        with self.lock:
+            self._apply(record)
+            self._write({"op": "add", **record._asdict()})
+        self.changed.set()
+        for callback in self.listeners:
+            callback(record)
+        return record
+
+    def update_status(self, order_id, status):
+        """Set an order's status label; returns the updated record, or None for unknown orders."""
+        with self.lock:
+            record = self._set_status(order_id, status, time.time())
+            if record is None:
+                return None
+            self._write({"op": "status", "order_id": order_id, "status": status, "updated_at": record.updated_at})
+        self.changed.set()
+        return record
+
+    def _apply(self, record):
+        order_id = record.order_id
+        self.open[order_id] = record
+        self.by_status.setdefault(record.status, {})[order_id] = None
+        self.by_symbol.setdefault(record.ticker, {})[order_id] = None
+        if record.status in TERMINAL_LABELS:
+            self._set_status(order_id, record.status, record.updated_at, force=True)
+
+    def _set_status(self, order_id, status, updated_at, force=False):
+        record = self.open.get(order_id)
+        if record is None or (record.status == status and not force):
+            return None
+        self._unindex(order_id, record)
+        record = record._replace(status=status, updated_at=updated_at)
+        if status == "Filled":
+            sign = 1 if record.instruction == "BUY" else -1
+            self.positions_held[record.ticker] = self.positions_held.get(record.ticker, 0) + sign * record.quantity
+        if status in TERMINAL_LABELS:
+            del self.open[order_id]
+            self.archive[order_id] = record
+            if len(self.archive) > self.archive_size:
+                self.archive.popitem(last=False)
+        else:
+            self.open[order_id] = record
+            self.by_status.setdefault(status, {})[order_id] = None
+            self.by_symbol.setdefault(record.ticker, {})[order_id] = None
+        return record
+
+    def _unindex(self, order_id, record):
+        for index, value in ((self.by_status, record.status), (self.by_symbol, record.ticker)):
+            keys = index.get(value)
+            if keys is not None:
+                keys.pop(order_id, None)
+                if not keys:
+                    del index[value]
+
+    def get(self, order_id):
+        """Return the record of an open or recently archived order, or None."""
+        with self.lock:
+            return self.open.get(order_id) or self.archive.get(order_id)
+
+    def open_orders(self, symbol=None, status=None):
+        """Return open orders, optionally only those of one symbol and/or status."""
+        with self.lock:
+            if symbol is None and status is None:
+                return list(self.open.values())
+            keys = self.by_symbol.get(symbol, {}) if symbol is not None else self.by_status.get(status, {})
+            records = [self.open[key] for key in keys]
+        if symbol is not None and status is not None:
+            records = [record for record in records if record.status == status]
+        return records
+
+    def positions(self):
+        """Return {ticker: net filled quantity} for every symbol traded."""
+        with self.lock:
+            return dict(self.positions_held)
+
+    def snapshot(self, recent=config.ORDER_RECENT_SHOWN):
+        """Return the most recent `recent` archived orders followed by every open order."""
+        with self.lock:
+            archived = list(self.archive.values())[-recent:] if recent else []
+            return archived + list(self.open.values())
+
+    def open_journal(self, path):
+        """Append every later change to `path` (JSON lines)."""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = open(path, "a", encoding="utf-8")
+
+    def _write(self, entry):
+        # Orders are rare next to ticks, so entries are written and flushed as they happen
+        if self.journal is not None:
+            self.journal.write(json.dumps(entry) + "\n")
+            self.journal.flush()
+
+    def restore(self, path):
+        """Replay a journal written by open_journal and return the number of entries applied."""
+        if not os.path.exists(path):
+            return 0
+        applied = 0
+        with self.lock, open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                    if entry.pop("op") == "add":
+                        self._apply(OrderRecord(**entry))
+                    else:
+                        self._set_status(entry["order_id"], entry["status"], entry["updated_at"])
+                except (ValueError, KeyError, TypeError) as e:
+                    # A crash can leave a partial last line behind
+                    logging.warning("Skipping unreadable order journal entry: %s", e)
+                    continue
+                applied += 1
+        self.changed.set()
+        return applied
+
+def journal_path(day=None, folder=config.ORDER_JOURNAL_DIR):
+    """Journal file of a day (today by default); DAY orders never outlive it."""
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    return os.path.join(folder, f"orders_{day}.jsonl")
+
+def open_order_journal():
+    """Restore today's orders and positions from the journal and keep journaling to it."""
+    if not config.ORDER_JOURNAL_DIR:
+        return
+    path = journal_path()
+    applied = order_store.restore(path)
+    if applied:
+        logging.info("Restored %d open orders from %d journal entries in %s", len(order_store.open_orders()), applied, path)
+    order_store.open_journal(path)
+
+order_store = OrderStore()
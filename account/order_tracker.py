@@ -0,0 +1,184 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from config import ORDER_POLL_MIN_INTERVAL, ORDER_POLL_MAX_INTERVAL, ORDER_POLL_WORKERS
+
+# Schwab order statuses after which an order can no longer change
+TERMINAL_STATUSES = {"FILLED", "CANCELED", "REJECTED", "EXPIRED", "REPLACED"}
+
+# How far before the oldest tracked order the bulk order listing starts
+LISTING_MARGIN = timedelta(minutes=5)
+
+def status_label(status):
+    """Turn a Schwab status such as PENDING_ACTIVATION into the label shown to users."""
+    return status.replace("_", " ").title()
+
+class OrderTracker:
+    """Tracks open orders until they reach a terminal state.
+
+    Each poll fetches every open order in one account orders listing call, falling back to
+    concurrent order_details calls if the listing fails. Orders are retired once terminal,
+    the poll interval backs off while nothing changes, and account activity messages from
+    the stream wake the tracker up immediately. Child orders (a buy's trailing stop) are
+    handed to `on_child_order(parent_id, child)` the first time a poll shows them, so the
+    buy itself needs no extra round trip to learn their IDs. Works with any client exposing
+    the schwabdev account_orders/order_details methods, including a local mock.
+    """
+
+    def __init__(self, client, account_hash, on_status_change=None, on_child_order=None,
+                 min_interval=ORDER_POLL_MIN_INTERVAL, max_interval=ORDER_POLL_MAX_INTERVAL,
+                 max_workers=ORDER_POLL_WORKERS):
+        self.client = client
+        self.account_hash = account_hash
+        self.on_status_change = on_status_change
+        self.on_child_order = on_child_order
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.max_workers = max_workers
+
+        self.open_orders = {}  # str(order_id) -> {"order_id", "status", "tracked_at", "children"}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def track(self, order_id, entered_at=None):
+        """Start tracking an order and poll for it right away.
+
+        `entered_at` (a UTC datetime, default now) is when the order was placed; the order
+        listing starts shortly before the earliest one, so pass it for orders placed earlier.
+        """
+        if order_id is None:
+            return
+        with self.lock:
+            self.open_orders[str(order_id)] = {
+                "order_id": order_id,
+                "status": None,
+                "tracked_at": entered_at or datetime.now(timezone.utc),
+                "children": set(),  # str(order_id) of the child orders already reported
+            }
+        self.interval = self.min_interval
+        self.wake.set()
+
+    def get_open_order_ids(self):
+        with self.lock:
+            return [order["order_id"] for order in self.open_orders.values()]
+
+    def on_account_activity(self, content):
+        """Stream callback for ACCT_ACTIVITY messages: something changed, so poll now."""
+        self.interval = self.min_interval
+        self.wake.set()
+
+    def _fetch_listing(self, order_keys):
+        """Fetch all tracked orders with a single account orders call."""
+        with self.lock:
+            from_time = min(self.open_orders[key]["tracked_at"] for key in order_keys) - LISTING_MARGIN
+        response = self.client.account_orders(self.account_hash, from_time, datetime.now(timezone.utc))
+        if not response.ok:
+            return None
+
+        orders = {}
+        pending = list(response.json())
+        while pending:
+            order = pending.pop()
+            orders[str(order.get("orderId"))] = order
+            # Trailing stop legs are nested under their parent as child order strategies
+            pending.extend(order.get("childOrderStrategies", []))
+        return {key: orders[key] for key in order_keys if key in orders}
+
+    def _fetch_details(self, order_key):
+        response = self.client.order_details(self.account_hash, order_key)
+        if response.ok:
+            return response.json()
+        return None
+
+    def _fetch_concurrently(self, order_keys):
+        """Fetch orders with one order_details call per order, issued in parallel."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(self._fetch_details, order_keys)
+        return {key: order for key, order in zip(order_keys, results) if order and order.get("status")}
+
+    def _report_children(self, order_key, details):
+        """Hand the child orders of a tracked order to on_child_order, once each."""
+        children = []
+        with self.lock:
+            order = self.open_orders.get(order_key)
+            if order is None:
+                return
+            for child in details.get("childOrderStrategies", []):
+                child_key = str(child.get("orderId"))
+                if child.get("orderId") is None or child_key in order["children"] or child_key in self.open_orders:
+                    continue
+                order["children"].add(child_key)
+                children.append(child)
+        for child in children:
+            self.on_child_order(order["order_id"], child)
+
+    def poll_once(self):
+        """Refresh every open order once and return how many changed status."""
+        with self.lock:
+            order_keys = list(self.open_orders)
+        if not order_keys:
+            return 0
+
+        try:
+            orders = self._fetch_listing(order_keys)
+        except Exception as e:
+            logging.warning("Order listing failed, falling back to per-order details: %s", e)
+            orders = None
+        if orders is None:
+            orders = self._fetch_concurrently(order_keys)
+        else:
+            # Orders the listing leaves out (e.g. entered before its window) are fetched one by one
+            missing = [key for key in order_keys if key not in orders]
+            if missing:
+                orders.update(self._fetch_concurrently(missing))
+
+        changed = 0
+        for order_key, details in orders.items():
+            # Report children before a terminal parent is retired
+            if self.on_child_order:
+                self._report_children(order_key, details)
+            status = details.get("status")
+            with self.lock:
+                order = self.open_orders.get(order_key)
+                if order is None or order["status"] == status:
+                    continue
+                order["status"] = status
+                # Retire terminal orders so they are never polled again
+                if status in TERMINAL_STATUSES:
+                    del self.open_orders[order_key]
+            changed += 1
+            if self.on_status_change:
+                self.on_status_change(order["order_id"], status_label(status))
+        return changed
+
+    def run(self):
+        """Poll until stopped, backing off while nothing changes."""
+        while not self.stopped.is_set():
+            try:
+                changed = self.poll_once()
+            except Exception as e:
+                logging.error("Order tracking error: %s", e)
+                changed = 0
+
+            if changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * 2, self.max_interval)
+
+            # Sleep until the next poll, a new order or an account activity message
+            wait_time = self.interval if self.open_orders else None
+            self.wake.wait(wait_time)
+            self.wake.clear()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
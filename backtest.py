@@ -0,0 +1,327 @@
+import argparse
+import math
+import time
+from datetime import datetime
+import numpy as np
+import config
+from utils.bars import BarAggregator, window_bars
+from utils.decoder import decode_json, DECODE_ERRORS
+from utils.fields import FIELD_NUMBERS
+from utils.indicators import BAND_FIELDS, INDICATORS, bars_to_arrays, create_band_indicator, create_indicator, indicator_key
+from utils.ring_buffer import TickWindow
+from utils.strategies import STRATEGIES, create_strategy
+from utils.tick_bus import Tick
+from utils.tick_store import TickStore, days_between
+
+# Marker written in front of every raw message by stream.my_custom_handler
+LOG_MARKER = " - Received data: "
+
+# Message keys of the fields stored per tick, in TickWindow order after the timestamp
+TICK_FIELD_KEYS = tuple(
+    str(FIELD_NUMBERS[field_name])
+    for field_name in ("Bid Price", "Ask Price", "Last Price", "Bid Size", "Ask Size", "Last Size", "Total Volume")
+)
+TIME_FIELD_KEYS = tuple(str(FIELD_NUMBERS[field_name]) for field_name in ("Quote Time", "Trade Time"))
+
+def load_ticks_from_log(log_path):
+    """Parse the LEVELONE messages of a stream_data.log file into a TickWindow per symbol.
+
+    Fields missing from a message carry their previous value forward, exactly like the
+    live handler does. Ticks are stamped like the live handler stamps them: with the newest
+    Quote/Trade Time when BAR_TIME_SOURCE is "exchange", else (or before the first of those)
+    with the message timestamp when present, else the log line time.
+    """
+    rows = {}  # symbol -> list of tick tuples
+    latest = {}  # symbol -> latest value per field key
+
+    with open(log_path, "r") as log_file:
+        for line in log_file:
+            marker = line.find(LOG_MARKER)
+            if marker < 0:
+                continue
+            try:
+                data = decode_json(line[marker + len(LOG_MARKER):])
+            except DECODE_ERRORS:
+                continue
+
+            for service in data.get("data", []):
+                if service.get("service") != "LEVELONE_EQUITIES":
+                    continue
+
+                if "timestamp" in service:
+                    timestamp = service["timestamp"] / 1000.0
+                else:
+                    timestamp = datetime.strptime(line[:marker], "%Y-%m-%d %H:%M:%S,%f").timestamp()
+
+                for content in service.get("content", []):
+                    symbol = content.get("key")
+                    if not symbol:
+                        continue
+                    values = latest.setdefault(symbol, {})
+                    for field_key in TICK_FIELD_KEYS + TIME_FIELD_KEYS:
+                        if field_key in content:
+                            values[field_key] = content[field_key]
+                    tick_time = timestamp
+                    if config.BAR_TIME_SOURCE == "exchange":
+                        exchange_time = max(values.get(field_key) or 0 for field_key in TIME_FIELD_KEYS)
+                        if exchange_time:
+                            tick_time = exchange_time / 1000.0
+                    rows.setdefault(symbol, []).append(
+                        (tick_time,) + tuple(values.get(field_key) for field_key in TICK_FIELD_KEYS)
+                    )
+
+    return {symbol: rows_to_tick_window(symbol_rows) for symbol, symbol_rows in rows.items()}
+
+def load_ticks_from_store(days, symbols=None, root=config.TICK_STORE_DIR, start_time=None, end_time=None):
+    """Yield (symbol, day, TickWindow) for recorded days, memory-mapped from the tick store.
+
+    With `start_time` and/or `end_time` (epoch seconds) only the ticks with
+    start_time <= timestamp < end_time are replayed, located through the store's sparse index.
+    Without `days`, the days that range spans are replayed.
+    """
+    store = TickStore(root)
+    if not days and start_time is not None and end_time is not None:
+        days = days_between(start_time, end_time)
+    for day in days:
+        for symbol in store.symbols(day):
+            if symbols and symbol not in symbols:
+                continue
+            if start_time is None and end_time is None:
+                yield symbol, day, store.load(symbol, day)
+            else:
+                ticks = store.query(symbol, day, start_time, end_time)
+                if len(ticks.timestamp):
+                    yield symbol, day, ticks
+
+def parse_time(value):
+    """Parse a --start/--end value such as "2024-08-23 09:30" (local time) into epoch seconds."""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Not a date and time: {value!r} (expected e.g. 2024-08-23 09:30)")
+
+def rows_to_tick_window(rows):
+    """Convert a list of tick tuples into a TickWindow of NumPy columns."""
+    columns = list(zip(*rows)) if rows else [()] * len(TickWindow._fields)
+    arrays = []
+    for column_index, values in enumerate(columns):
+        if column_index < 4:
+            arrays.append(np.array([math.nan if v is None else v for v in values], dtype=np.float64))
+        else:
+            arrays.append(np.array([0 if v is None else v for v in values], dtype=np.int64))
+    return TickWindow(*arrays)
+
+def stop_basis_prices(ticks, link_basis):
+    """Return the price series the trailing stop follows for a stopPriceLinkBasis."""
+    if link_basis == "BID":
+        prices = ticks.bid
+    elif link_basis == "ASK":
+        prices = ticks.ask
+    elif link_basis in ("MARK", "AVERAGE"):
+        prices = (ticks.bid + ticks.ask) / 2.0
+    else:
+        prices = ticks.last
+    # Fall back to the last price wherever the chosen quote is missing
+    return np.where(np.isnan(prices), ticks.last, prices)
+
+def tick_bars(timestamps, last_prices, total_volumes, bar_interval, max_fill=config.BAR_MAX_FILL):
+    """Aggregate ticks into bars like the live stream does.
+
+    Returns the number of bars completed up to each tick, the number of those in the live
+    band window (which restarts after a gap longer than `max_fill` bars) and the bars as
+    BarArrays. `total_volumes` is the cumulative Total Volume of each tick, so bars carry
+    the traded volume and a volume-weighted VWAP like the live ones.
+    """
+    aggregator = BarAggregator(bar_interval, max_fill=max_fill)
+    bars = []
+    bar_counts = []
+    window_counts = []
+    window_start = 0
+    for timestamp, last_price, total_volume in zip(timestamps, last_prices, total_volumes):
+        if last_price == last_price:  # Skip NaN: no trade yet
+            # A missing Total Volume is recorded as 0; the live handler passes None for it
+            completed = aggregator.update(timestamp, last_price, total_volume or None)
+            bars.extend(completed)
+            if completed and aggregator.skipped:
+                window_start = len(bars)
+        bar_counts.append(len(bars))
+        window_counts.append(len(bars) - window_start)
+    return bar_counts, window_counts, bars_to_arrays(bars)
+
+def batch_values(indicator, arrays):
+    """Compute an indicator over all bars at once; one list per output field, None while warming up."""
+    return [
+        [None if value != value else value for value in column.tolist()]
+        for column in indicator.compute(arrays)
+    ]
+
+def run_backtest(ticks, max_length=config.MAX_LENGTH, multiplier=config.STD_DEVIATION_MULTIPLIER,
+                 stop_offset=config.STOP_PRICE_OFFSET, link_type=config.STOP_PRICE_LINK_TYPE,
+                 link_basis=config.STOP_PRICE_LINK_BASIS, quantity=config.QUANTITY,
+                 bar_interval=config.BAND_BAR_INTERVAL, indicator=None, strategy=None):
+    """Replay one symbol's ticks through a strategy and return fills, P&L and drawdown.
+
+    Like the live stream, ticks are aggregated into `bar_interval` second bars and the bands
+    advance on every completed bar; the strategy (`strategy` spec, config.STRATEGIES[0] by
+    default, the same code the executor runs) sees every tick. The bands come from the
+    `indicator` spec (config.BAND_INDICATOR by default) with its length set to `max_length` bars
+    and its multiplier to `multiplier`, computed over all bars at once with its NumPy batch path,
+    like config.INDICATORS for strategies that read them.
+
+    Buy intents fill at the ask (or last) and attach a simulated trailing stop that follows
+    the link basis price. Sell intents close the position at the bid (or last) and cancel the
+    stop. A sell while flat (the stop already closed the position) is counted as skipped.
+    Like the live executor, the strategy sees no tick until the window holds `max_length` bars
+    (again after a gap of more than BAR_MAX_FILL bars); by then the windowed bands see only
+    bars from after the gap, like the restarted live ones.
+    """
+    strategy = create_strategy(strategy or config.STRATEGIES[0])
+    state = strategy.new_state()
+    last_prices = ticks.last.tolist()
+    timestamps = ticks.timestamp.tolist()
+    bar_counts, window_counts, arrays = tick_bars(timestamps, last_prices, ticks.volume.tolist(), bar_interval)
+    band_spec = dict(indicator or config.BAND_INDICATOR, length=max_length, multiplier=multiplier)
+    middles, upper_bands, lower_bands = batch_values(create_band_indicator(band_spec), arrays)
+    indicator_columns = []  # (key, fields, columns) of config.INDICATORS
+    if strategy.uses_indicators:
+        for spec in config.INDICATORS:
+            extra = create_indicator(spec)
+            indicator_columns.append((indicator_key(spec), extra.fields, batch_values(extra, arrays)))
+
+    bid_prices = np.where(np.isnan(ticks.bid), ticks.last, ticks.bid).tolist()
+    ask_prices = np.where(np.isnan(ticks.ask), ticks.last, ticks.ask).tolist()
+    basis_prices = stop_basis_prices(ticks, link_basis).tolist()
+
+    fills = []
+    position = 0
+    entry_price = 0.0
+    stop_peak = None
+    realized = 0.0
+    peak_equity = 0.0
+    max_drawdown = 0.0
+    skipped_sells = 0
+
+    for i, last_price in enumerate(last_prices):
+        if last_price != last_price:  # NaN: no trade yet
+            continue
+
+        # Trailing stop: follow the best basis price since entry and trigger on a pullback
+        if position:
+            basis = basis_prices[i]
+            if basis > stop_peak:
+                stop_peak = basis
+            if link_type == "PERCENT":
+                stop_price = stop_peak * (1.0 - stop_offset / 100.0)
+            else:
+                stop_price = stop_peak - stop_offset
+            if basis <= stop_price:
+                fill_price = bid_prices[i]
+                realized += (fill_price - entry_price) * position
+                fills.append({"time": timestamps[i], "side": "SELL", "price": fill_price, "reason": "trailing_stop"})
+                position = 0
+
+        # Live trading waits until the band window is full (stream.is_symbol_live), also after
+        # a gap too long to fill restarted it
+        if window_counts[i] < max_length:
+            continue
+        # Bands and indicators as of the last bar completed by this tick
+        bar = bar_counts[i] - 1
+        tick = Tick("", last_price, middles[bar], upper_bands[bar], lower_bands[bar], None)
+        indicators = None
+        if indicator_columns:
+            indicators = {
+                key: {field: column[bar] for field, column in zip(fields, columns)}
+                for key, fields, columns in indicator_columns
+            }
+
+        intent = strategy.on_tick(state, tick, indicators)
+        side = intent.side if intent is not None else None
+        if side == "buy" and not position:
+            entry_price = ask_prices[i]
+            position = quantity
+            stop_peak = basis_prices[i]
+            fills.append({"time": timestamps[i], "side": "BUY", "price": entry_price, "reason": intent.reason})
+            strategy.commit(state, intent)
+        elif side == "sell" and position:
+            fill_price = bid_prices[i]
+            realized += (fill_price - entry_price) * position
+            fills.append({"time": timestamps[i], "side": "SELL", "price": fill_price, "reason": intent.reason})
+            position = 0
+            strategy.commit(state, intent)
+        elif side is not None:
+            # Like the executor: nothing placed, so the strategy resumes from the position held
+            skipped_sells += side == "sell"
+            strategy.seed(state, position)
+
+        # Mark to market for the drawdown
+        equity = realized + (last_price - entry_price) * position
+        if equity > peak_equity:
+            peak_equity = equity
+        elif peak_equity - equity > max_drawdown:
+            max_drawdown = peak_equity - equity
+
+    unrealized = (last_prices[-1] - entry_price) * position if position and last_prices else 0.0
+    exits = [fill for fill in fills if fill["side"] == "SELL"]
+    return {
+        "ticks": len(last_prices),
+        "fills": fills,
+        "trades": len(exits),
+        "stop_exits": sum(1 for fill in exits if fill["reason"] == "trailing_stop"),
+        "skipped_sells": skipped_sells,
+        "realized_pnl": realized,
+        "unrealized_pnl": unrealized,
+        "total_pnl": realized + unrealized,
+        "max_drawdown": max_drawdown,
+        "open_position": position,
+    }
+
+def print_report(symbol, result, elapsed):
+    print(f"{symbol}: replayed {result['ticks']} ticks in {elapsed * 1000:.1f} ms")
+    print(f"  Fills: {len(result['fills'])} ({result['trades']} round trips, {result['stop_exits']} trailing stop exits, "
+          f"{result['skipped_sells']} sell signals while flat)")
+    print(f"  Realized P&L: {result['realized_pnl']:.4f}  Unrealized: {result['unrealized_pnl']:.4f}  "
+          f"Total: {result['total_pnl']:.4f}")
+    print(f"  Max drawdown: {result['max_drawdown']:.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded LEVELONE ticks through a band strategy.")
+    parser.add_argument("log_files", nargs="*", help="stream_data.log files written by the live stream")
+    parser.add_argument("--day", action="append", default=[], help="Replay a day (YYYY-MM-DD) from the tick store")
+    parser.add_argument("--store", default=config.TICK_STORE_DIR, help="Tick store folder used with --day")
+    parser.add_argument("--start", type=parse_time, help="Replay store ticks from this time, e.g. \"2024-08-23 09:30\"")
+    parser.add_argument("--end", type=parse_time, help="Replay store ticks before this time (with --start: the days in between by default)")
+    parser.add_argument("--symbol", action="append", help="Symbols to replay (default: every symbol found)")
+    parser.add_argument("--x-minutes", type=float, default=config.X_MINUTES)
+    parser.add_argument("--multiplier", type=float, default=config.STD_DEVIATION_MULTIPLIER)
+    parser.add_argument("--indicator", choices=sorted(name for name, indicator in INDICATORS.items() if indicator.fields == BAND_FIELDS),
+                        help="Band indicator (default: config.BAND_INDICATOR)")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), help="Strategy (default: the first of config.STRATEGIES)")
+    parser.add_argument("--stop-offset", type=float, default=config.STOP_PRICE_OFFSET)
+    parser.add_argument("--link-type", default=config.STOP_PRICE_LINK_TYPE)
+    parser.add_argument("--link-basis", default=config.STOP_PRICE_LINK_BASIS)
+    parser.add_argument("--verbose", action="store_true", help="Print every fill")
+    args = parser.parse_args()
+
+    max_length = window_bars(args.x_minutes)
+    datasets = []
+    for log_path in args.log_files:
+        for symbol, ticks in load_ticks_from_log(log_path).items():
+            datasets.append((symbol, ticks))
+    for symbol, day, ticks in load_ticks_from_store(args.day, args.symbol, args.store, args.start, args.end):
+        datasets.append((f"{symbol} {day}", ticks))
+
+    for label, ticks in datasets:
+        if args.symbol and label.split()[0] not in args.symbol:
+            continue
+        start = time.perf_counter()
+        result = run_backtest(ticks, max_length, args.multiplier, args.stop_offset, args.link_type, args.link_basis,
+                              indicator={"name": args.indicator} if args.indicator else None,
+                              strategy={"name": args.strategy} if args.strategy else None)
+        print_report(label, result, time.perf_counter() - start)
+        if args.verbose:
+            for fill in result["fills"]:
+                fill_time = datetime.fromtimestamp(fill["time"]).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"    {fill_time} {fill['side']} @ {fill['price']} ({fill['reason']})")
+
+if __name__ == "__main__":
+    main()
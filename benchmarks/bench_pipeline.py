@@ -0,0 +1,241 @@
+"""Pipeline benchmark: stream handler throughput, band math and order placement on a mock client.
+
+Nothing touches the network: messages are synthetic and orders go to utils.mock_client.
+Log output is written to a temporary folder. Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --symbols 1 10 --rate 0 500 --output pipeline.json
+    python benchmarks/bench_pipeline.py --compare pipeline.json
+
+With --compare, every median that got slower by more than --threshold percent is reported
+and the exit status is 1, so the benchmark can gate a deployment.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import config
+import stream
+from account import order
+from utils.async_log import log_writer
+from utils.ema import BandEngine, calculate_ema, calculate_std_deviation
+from utils.fields import FIELD_NUMBERS
+from utils.mock_client import MockClient
+from rich.console import Console
+
+def percentiles(samples):
+    """Median, p99 and max of a list of durations in seconds, reported in microseconds."""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "median_us": statistics.median(ordered) * 1e6,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+        "max_us": ordered[-1] * 1e6,
+    }
+
+def synthetic_messages(symbols, count, seed=1):
+    """Yield LEVELONE_EQUITIES messages with a random walk per symbol, one symbol per message."""
+    rng = random.Random(seed)
+    prices = {symbol: 10.0 for symbol in symbols}
+    volume = 0
+    bid_key, ask_key, last_key = (str(FIELD_NUMBERS[name]) for name in ("Bid Price", "Ask Price", "Last Price"))
+    last_size_key, volume_key = str(FIELD_NUMBERS["Last Size"]), str(FIELD_NUMBERS["Total Volume"])
+    for i in range(count):
+        symbol = symbols[i % len(symbols)]
+        price = prices[symbol] = round(max(0.01, prices[symbol] + rng.gauss(0, 0.01)), 2)
+        volume += 100
+        yield json.dumps({"data": [{
+            "service": "LEVELONE_EQUITIES",
+            "timestamp": int(time.time() * 1000),
+            "command": "SUBS",
+            "content": [{
+                "key": symbol, bid_key: round(price - 0.01, 2), ask_key: round(price + 0.01, 2),
+                last_key: price, last_size_key: 100, volume_key: volume,
+            }],
+        }]})
+
+def bench_handler(symbol_count, rate, messages):
+    """Drive messages through stream.my_custom_handler, paced at `rate` per second (0: unpaced)."""
+    symbols = [f"SYM{i}" for i in range(symbol_count)]
+    payloads = list(synthetic_messages(symbols, messages))
+    interval = 1.0 / rate if rate else 0.0
+
+    samples = []
+    start = time.perf_counter()
+    next_send = start
+    for payload in payloads:
+        if interval:
+            next_send += interval
+            while time.perf_counter() < next_send:
+                pass
+        begin = time.perf_counter()
+        stream.my_custom_handler(payload)
+        samples.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+
+    result = percentiles(samples)
+    result.update({"symbols": symbol_count, "rate": rate, "throughput_per_s": messages / elapsed})
+    return result
+
+def bench_bands(max_length, updates, seed=2):
+    """Time the incremental band engine and the full-window NumPy recompute at one window size."""
+    rng = random.Random(seed)
+    prices = [10.0]
+    for _ in range(max_length + updates):
+        prices.append(prices[-1] + rng.gauss(0, 0.01))
+
+    engine = BandEngine(max_length, config.STD_DEVIATION_MULTIPLIER)
+    for price in prices[:max_length]:
+        engine.update(price)
+    incremental = []
+    for price in prices[max_length:]:
+        begin = time.perf_counter()
+        engine.update(price)
+        incremental.append(time.perf_counter() - begin)
+
+    full_window = []
+    for end in range(max_length, max_length + min(updates, 200)):
+        window = prices[end - max_length:end]
+        begin = time.perf_counter()
+        calculate_ema(window)
+        calculate_std_deviation(window)
+        full_window.append(time.perf_counter() - begin)
+
+    return {"max_length": max_length, "incremental": percentiles(incremental), "full_window": percentiles(full_window)}
+
+def bench_orders(count):
+    """Time buy and sell placement (payload, mock REST call, log enqueue) and payload rendering."""
+    # Console output is still formatted, but not shown
+    order.console = Console(file=open(os.devnull, "w"))
+    client = MockClient()
+    account_hash = MockClient.ACCOUNT_HASH
+    buys, sells, renders = [], [], []
+    for _ in range(count):
+        begin = time.perf_counter()
+        order_id, payload = order.place_buy_order_with_trailing_stop(client, "SQQQ", account_hash)
+        buys.append(time.perf_counter() - begin)
+
+        begin = time.perf_counter()
+        order.place_market_sell_order(client, "SQQQ", account_hash)
+        sells.append(time.perf_counter() - begin)
+
+        begin = time.perf_counter()
+        order.render_order_payload(payload, "Buy", "SQQQ", {"orderId": order_id})
+        renders.append(time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    log_writer.stop()  # Drain the queued payload logs
+    drain = time.perf_counter() - begin
+    return {
+        "buy": percentiles(buys),
+        "sell": percentiles(sells),
+        "render_payload": percentiles(renders),
+        "log_drain_s": drain,
+    }
+
+def flatten(results, prefix=""):
+    """Yield (path, value) for every median in the results, for comparisons between runs."""
+    if isinstance(results, dict):
+        for key, value in results.items():
+            if key == "median_us":
+                yield prefix, value
+            else:
+                yield from flatten(value, f"{prefix}/{key}" if prefix else str(key))
+    elif isinstance(results, list):
+        for item in results:
+            label = ",".join(f"{key}={item[key]}" for key in ("symbols", "rate", "max_length") if key in item)
+            yield from flatten(item, f"{prefix}[{label}]")
+
+def compare(baseline, current, threshold):
+    """Print medians that regressed by more than `threshold` percent and return their count."""
+    base = dict(flatten(baseline["results"]))
+    regressions = 0
+    for path, value in flatten(current["results"]):
+        before = base.get(path)
+        if not before:
+            continue
+        change = (value - before) / before * 100.0
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions += 1
+        print(f"{path:<60} {before:10.1f} -> {value:10.1f} us ({change:+6.1f}%){marker}")
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 10, 100], help="Symbol counts for the handler run")
+    parser.add_argument("--rate", type=float, nargs="+", default=[0], help="Messages per second (0: as fast as possible)")
+    parser.add_argument("--messages", type=int, default=20000, help="Messages per handler run")
+    parser.add_argument("--max-length", type=int, nargs="+", default=[60, 300, 1800, 3600], help="Band window sizes")
+    parser.add_argument("--band-updates", type=int, default=5000, help="Incremental band updates per window size")
+    parser.add_argument("--orders", type=int, default=500, help="Buy/sell pairs placed on the mock client")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    # Payload and order logs go to a scratch folder instead of the working tree
+    os.chdir(tempfile.mkdtemp(prefix="bench_pipeline_"))
+
+    results = {"handler": [], "bands": [], "orders": None}
+    for symbol_count in args.symbols:
+        for rate in args.rate:
+            result = bench_handler(symbol_count, rate, args.messages)
+            results["handler"].append(result)
+            print(f"handler  symbols={symbol_count:<4} rate={rate or 'max':<6} {result['throughput_per_s']:10.0f} msg/s   "
+                  f"median {result['median_us']:7.1f} us   p99 {result['p99_us']:7.1f} us")
+
+    for max_length in args.max_length:
+        result = bench_bands(max_length, args.band_updates)
+        results["bands"].append(result)
+        print(f"bands    max_length={max_length:<5} incremental median {result['incremental']['median_us']:7.2f} us   "
+              f"full window median {result['full_window']['median_us']:9.1f} us")
+
+    results["orders"] = bench_orders(args.orders)
+    for name in ("buy", "sell", "render_payload"):
+        stage = results["orders"][name]
+        print(f"orders   {name:<15} median {stage['median_us']:7.1f} us   p99 {stage['p99_us']:7.1f} us")
+
+    report = {
+        "timestamp": time.time(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+
+    if output_path:
+        with open(output_path, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if compare_path:
+        with open(compare_path) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"{regressions} regression(s) above {args.threshold}%")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
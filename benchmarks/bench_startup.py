@@ -0,0 +1,96 @@
+"""Startup benchmark: import time of each module and offline time-to-first-tick.
+
+Every measurement runs in a fresh interpreter so module caches do not hide import cost.
+Run from the repository root:
+
+    python benchmarks/bench_startup.py --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a headless worker or a backtest imports; none of them may need credentials or network
+MODULES = [
+    "config",
+    "utils.ema",
+    "utils.ring_buffer",
+    "utils.tick_store",
+    "stream",
+    "account.order",
+    "account.order_executer",
+    "backtest",
+]
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in ("numpy", "rich", "schwabdev", "tkinter", "requests") if name in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+# Import the stream and push one synthetic LEVELONE message through the handler
+FIRST_TICK_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import stream
+import numpy
+message = json.dumps({"data": [{"service": "LEVELONE_EQUITIES", "content": [{"key": "SQQQ", "1": 7.99, "2": 8.01, "3": 8.0}]}]})
+stream.my_custom_handler(message)
+print(stream.startup_timings["first_tick"] - start)
+"""
+
+def run_snippet(snippet):
+    output = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    return output.split(" ")
+
+def measure(repeat):
+    results = {"imports": {}, "first_tick_s": None}
+    for module in MODULES:
+        samples = []
+        heavy = ""
+        for _ in range(repeat):
+            values = run_snippet(IMPORT_SNIPPET.format(module=module))
+            samples.append(float(values[0]))
+            heavy = values[1] if len(values) > 1 else ""
+        results["imports"][module] = {
+            "median_s": statistics.median(samples),
+            "min_s": min(samples),
+            "heavy_modules_loaded": [name for name in heavy.split(",") if name],
+        }
+
+    samples = [float(run_snippet(FIRST_TICK_SNIPPET)[0]) for _ in range(repeat)]
+    results["first_tick_s"] = {"median_s": statistics.median(samples), "min_s": min(samples)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    results["timestamp"] = time.time()
+    results["python"] = platform.python_version()
+
+    for module, result in results["imports"].items():
+        heavy = ", ".join(result["heavy_modules_loaded"]) or "-"
+        print(f"import {module:<24} {result['median_s'] * 1000:8.1f} ms   heavy deps loaded: {heavy}")
+    print(f"time to first tick (offline)    {results['first_tick_s']['median_s'] * 1000:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+if __name__ == "__main__":
+    main()
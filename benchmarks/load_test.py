@@ -0,0 +1,101 @@
+"""Load test: the whole trading pipeline against the mock broker at a fixed quote rate.
+
+The stream, order tracker and order executor run exactly as in headless mode, but quotes
+come from utils.mock_client's synthetic generator and orders fill in its matching engine,
+so nothing touches the network. Log output is written to a temporary folder. Run from the
+repository root:
+
+    python benchmarks/load_test.py --rate 5000 --symbols 10 --seconds 30 --output load.json
+
+The pipeline's threads live as long as the process, so each run tests one rate. The
+generated and processed message rates, queue drops, stage latency percentiles and the
+orders placed and filled are reported. The mock broker has no price history to backfill
+from, so nothing trades until the band windows hold --window-bars bars; keep it below the
+run's duration in seconds to load the order path.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import config
+import trading
+from account import order
+from utils.metrics import metrics
+from utils.mock_client import MockClient
+from rich.console import Console
+
+def run(rate, symbols, seconds, volatility, window_bars):
+    """Trade on a fresh mock client for `seconds` and return what the pipeline kept up with."""
+    config.STATUS_SERVER_ENABLED = False
+    config.MAX_LENGTH = window_bars
+    config.BAND_INDICATOR = dict(config.BAND_INDICATOR, length=window_bars)
+    client = MockClient(tick_rate=rate)
+    client.stream.generator.volatility = volatility
+    counters_before = {name: counter.value for name, counter in metrics.counters.items()}
+
+    trading.start_trading(client, MockClient.ACCOUNT_HASH, symbols=symbols)
+    started = time.perf_counter()
+    sent_before = client.stream.messages_sent
+    time.sleep(seconds)
+    elapsed = time.perf_counter() - started
+    sent = client.stream.messages_sent - sent_before
+    client.stream.stop()
+
+    snapshot = metrics.snapshot()
+    processed = {name: counter.value - counters_before.get(name, 0) for name, counter in metrics.counters.items()}
+    with client.lock:
+        orders = list(client.orders.values())
+    return {
+        "rate": rate,
+        "symbols": len(symbols),
+        "seconds": round(elapsed, 1),
+        "generated_per_s": round(sent / elapsed, 1),
+        "processed_per_s": round(processed.get("messages", 0) / elapsed, 1),
+        "ticks_per_s": round(processed.get("ticks", 0) / elapsed, 1),
+        "conflated": processed.get("ticks_conflated", 0),
+        "gated": processed.get("ticks_gated", 0),
+        "frames_dropped": snapshot["gauges"].get("stream_frames_dropped"),
+        "queue_high_water": snapshot["gauges"].get("stream_queue_high_water"),
+        "orders": len(orders),
+        "filled": sum(1 for placed in orders if placed["status"] == "FILLED"),
+        "stages": {name: summary for name, summary in snapshot["stages"].items() if summary.get("count")},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=1000, help="Quote messages per second")
+    parser.add_argument("--symbols", type=int, default=len(config.TICKER_SYMBOLS), help="Symbols subscribed")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duration of each run")
+    parser.add_argument("--volatility", type=float, default=config.PAPER_VOLATILITY,
+                        help="Relative standard deviation of each synthetic price step")
+    parser.add_argument("--window-bars", type=int, default=10,
+                        help=f"Bars in the band window (live: {config.MAX_LENGTH}); trading starts once it is full")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    # Payload and order logs go to a scratch folder instead of the working tree
+    os.chdir(tempfile.mkdtemp(prefix="load_test_"))
+    order.console = Console(file=open(os.devnull, "w"))
+
+    symbols = config.TICKER_SYMBOLS[:args.symbols] if args.symbols <= len(config.TICKER_SYMBOLS) \
+        else [f"SYM{i}" for i in range(args.symbols)]
+    result = run(args.rate, symbols, args.seconds, args.volatility, args.window_bars)
+    print(f"rate {args.rate:.0f}/s  generated {result['generated_per_s']:.1f}/s  "
+          f"processed {result['processed_per_s']:.1f}/s  dropped {result['frames_dropped']}  "
+          f"conflated {result['conflated']}  orders {result['orders']} ({result['filled']} filled)")
+    for name, summary in sorted(result["stages"].items()):
+        print(f"    {name:<20} p50 {summary['p50_us']:>9.1f} us   p99 {summary['p99_us']:>9.1f} us   n {summary['count']}")
+
+    if output_path:
+        with open(output_path, "w") as file:
+            json.dump({"result": result, "created_at": time.time()}, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,107 @@
 
 # Constants
 TICKER_SYMBOL = "SQQQ"  # The ticker symbol you want to stream
+TICKER_SYMBOLS = [TICKER_SYMBOL]  # Watchlist streamed over a single connection (add more symbols here)
 # Order Settings
 QUANTITY=1
 STOP_PRICE_OFFSET = 0.07  # The trailing stop offset
 STOP_PRICE_LINK_TYPE = "VALUE"  # Type of link (could be VALUE, PERCENT, etc.)
 STOP_PRICE_LINK_BASIS = "LAST"  # Basis for the stop price (could be LAST, BID, ASK, etc.)
 
+# Shared Schwab client
+HTTP_POOL_SIZE = 10  # Keep-alive connections to the Schwab API (schwabdev releases without their own Session)
 
-# Deque configuration for storing the last X minutes of data
+# Stream message decoding
+JSON_DECODER = "auto"  # "orjson", "msgspec", "json" (standard library) or "auto" (fastest installed)
+
+# Hand-off between the websocket callback and tick processing
+STREAM_QUEUE_SIZE = 10000  # Raw frames waiting to be processed
+STREAM_QUEUE_POLICY = "conflate"  # When full: "block" the reader, "drop_oldest", or "conflate" (drop oldest, merge backlogs)
+STREAM_CONFLATE_BACKLOG = 50  # With "conflate", merge quotes per symbol once this many frames are waiting
+
+# Stream supervision
+STREAM_SILENCE_TIMEOUT = 30  # Reconnect when no frame (data or heartbeat) arrived for this many seconds
+STREAM_STALE_AFTER = 15  # A symbol is stale (no trading) when its newest Quote/Trade Time is older than this
+STREAM_RECONNECT_MAX_BACKOFF = 30  # Seconds between reconnect attempts grow up to this
+STREAM_BACKFILL = True  # Warm the bands from the price history endpoint at start and after reconnects
+
+# Order status tracking
+ORDER_POLL_MIN_INTERVAL = 1  # Seconds between polls right after an order changes
+ORDER_POLL_MAX_INTERVAL = 30  # Poll interval ceiling while nothing changes (exponential backoff)
+ORDER_POLL_WORKERS = 4  # Parallel order_details calls when the bulk order listing is unavailable
+USE_ACCOUNT_ACTIVITY_STREAM = True  # Subscribe to ACCT_ACTIVITY so order changes trigger an immediate poll
+
+# Order and position store (account/order_store.py)
+ORDER_JOURNAL_DIR = "Logs/Orders"  # Day journal of order changes, replayed at startup ("" keeps orders in memory only)
+ORDER_ARCHIVE_SIZE = 1000  # Filled, canceled and other finished orders kept in memory for lookups
+ORDER_RECENT_SHOWN = 20  # Finished orders listed before the open ones in the GUI and /status
+
+
+# Window configuration: the bands cover the last X minutes of time, whatever the message rate
 X_MINUTES = 8  # Example: last 8 minutes of data
-MAX_LENGTH = X_MINUTES * 60  # Assuming data updates once per second
+BAND_BAR_INTERVAL = 1  # Seconds per bar the bands are computed on
+MAX_LENGTH = int(X_MINUTES * 60 // BAND_BAR_INTERVAL)  # Bars in the band window
+
+# Bars built from the tick stream (OHLCV with VWAP)
+BAR_INTERVALS = (1, 5, 60)  # Bar sizes in seconds
+BAR_HISTORY = 1000  # Completed bars kept per symbol and interval
+BAR_TIME_SOURCE = "exchange"  # "exchange" (newest Quote/Trade Time) or "local" (receipt time)
+BAR_MAX_FILL = 30  # Empty intervals filled with flat bars after a gap; after a longer one the band window restarts and re-warms
+TICK_BUFFER_CAPACITY = 20000  # Raw ticks kept per symbol; readers get the last X_MINUTES of them
 
 # EMA and Std Deviation Configurations
 STD_DEVIATION_MULTIPLIER = 1.7  # Multiplier for standard deviation bands
 
+# Indicators (utils/indicators.py), computed on BAND_BAR_INTERVAL bars. Available: "ema_bands"
+# (EMA with std bands, the default), "bollinger", "vwap_bands", "keltner", "ema", "atr", "rsi"
+BAND_INDICATOR = {"name": "ema_bands", "length": MAX_LENGTH, "multiplier": STD_DEVIATION_MULTIPLIER}  # Bands the executor trades on
+INDICATORS = [{"name": "rsi", "length": 14}, {"name": "atr", "length": 14}]  # Also computed per symbol, shown in /status
+
+# Strategies run by the order executor (utils/strategies.py): "band_reversion" (buy below the
+# lower band, sell above the upper one) or "band_breakout". Each runs on every symbol of
+# TICKER_SYMBOLS unless its spec lists "symbols"; e.g. {"name": "band_reversion", "rsi": "rsi(length=14)"}
+STRATEGIES = [{"name": "band_reversion"}]
+
+# Tick recording (binary columnar files replayable by backtest.py and sweep.py)
+RECORD_TICKS = True  # Record every processed tick to the tick store
+TICK_STORE_DIR = "Data/Ticks"  # Root folder, one sub-folder per day and symbol
+TICK_STORE_FLUSH_INTERVAL = 1.0  # Seconds between background flushes to disk
+
+# Asynchronous log writer (stream_data.log, orders.log, Logs/OrderPayloads)
+LOG_QUEUE_SIZE = 100000  # Maximum queued log entries before the overflow policy applies
+LOG_OVERFLOW_POLICY = "drop_oldest"  # "drop_oldest", "drop_new" or "block"
+LOG_BATCH_SIZE = 1000  # Entries written per batch
+LOG_FLUSH_INTERVAL = 0.5  # Seconds between flushes when the queue is not full
+
+# GUI alert panel
+ALERT_HISTORY_SIZE = 5000  # Alerts kept in memory; older ones are discarded
+ALERT_PANEL_LINES = 200  # Alerts shown at once; scroll up past the top to page in older ones
+ORDER_LOG_POLL_INTERVAL = 1.0  # Seconds between size checks of orders.log written by other processes
+
+# Paper trading (python main.py --paper): orders go to the mock broker in utils/mock_client.py,
+# which fills them against synthetic quotes generated in-process
+PAPER_TICK_RATE = 20  # Synthetic quote messages per second across the watchlist
+PAPER_START_PRICE = 10.0  # First price of every symbol
+PAPER_VOLATILITY = 0.0005  # Standard deviation of each quote's price change, relative to the price
+PAPER_SLIPPAGE = 0.0  # Dollars added against the trader on every fill
+PAPER_LATENCY = 0.0  # Seconds added to every mock REST call
+
+# Local status endpoint (bands, positions, orders and counters as JSON)
+STATUS_SERVER_ENABLED = True
+STATUS_HOST = "127.0.0.1"  # Only reachable from this machine
+STATUS_PORT = 8765
+
+# Event-driven pipeline settings
+GUI_MIN_REFRESH_INTERVAL = 0.25  # Minimum seconds between GUI redraws (ticks in between are coalesced)
+METRICS_REPORT_INTERVAL = 60  # Seconds between stage latency and throughput reports
+METRICS_LOG_FILE = "metrics.log"  # JSON line per report ("" to only print)
 
 
 
 
-# List of all fields to be requested from the LEVELONE_EQUITIES service
-FIELDS = ",".join(str(i) for i in range(52))  # Generates '0,1,2,...,51' for all fields
 
+# Only the LEVELONE_EQUITIES fields declared by consumers through utils.fields.require_fields
+# are requested; the full list is kept here for reference and name lookups
 # Field mapping based on Schwab API documentation
 FIELD_MAPPING = {
     "0": "Symbol",
@@ -1,29 +1,47 @@
-from utils.gui import setup_gui
-from stream import start_stream
-from account.order import get_account_hash
-import schwabdev
-from dotenv import load_dotenv
-import os
+import argparse
+from account.client import get_client, get_account_hash
 
 def main():
-    # Load environment variables from .env
-    load_dotenv()
-    APP_KEY = os.getenv("APP_KEY")
-    APP_SECRET = os.getenv("APP_SECRET")
-    REDIRECT_URL = os.getenv("REDIRECT_URL")
-    TOKENS_FILE = os.getenv("TOKENS_FILE")
+    parser = argparse.ArgumentParser(description="Trade the EMA band strategy on the Schwab stream.")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run without the GUI; state is served by the local status endpoint")
+    parser.add_argument("--attach", metavar="URL",
+                        help="Only show the GUI for a bot already running elsewhere, "
+                             "e.g. http://127.0.0.1:8765/status")
+    parser.add_argument("--paper", action="store_true",
+                        help="Paper trade offline: synthetic quotes and a mock broker instead of Schwab")
+    args = parser.parse_args()
 
-    # Initialize the Schwab client (it handles token refresh automatically)
-    client = schwabdev.Client(APP_KEY, APP_SECRET, REDIRECT_URL, TOKENS_FILE)
+    if args.attach:
+        from utils.gui import setup_gui
+        setup_gui(status_url=args.attach)
+        return
+
+    if args.paper:
+        import config
+        from account.client import set_client
+        from utils.mock_client import MockClient
+        # Every subsystem that asks for the shared client gets the mock broker
+        client = MockClient(config.PAPER_LATENCY, config.PAPER_TICK_RATE, config.PAPER_SLIPPAGE)
+        set_client(client)
+    else:
+        # Create the shared Schwab client (it handles token refresh automatically)
+        client = get_client()
 
-    # Retrieve the account hash
+    # Retrieve the account hash once; it is cached for the order subsystems
     account_hash = get_account_hash(client)
     if not account_hash:
         print("Failed to retrieve account hash. Exiting.")
         return
 
-    # Start the GUI and pass client and account_hash
-    setup_gui(start_stream, client, account_hash)
+    if args.headless:
+        # Imported here so headless mode never loads tkinter
+        from trading import run_headless
+        run_headless(client, account_hash)
+    else:
+        from utils.gui import setup_gui
+        # Start the GUI and pass client and account_hash
+        setup_gui(client, account_hash)
 
 if __name__ == "__main__":
     main()
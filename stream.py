@@ -1,86 +1,492 @@
-import os
-import json
+import time
 import logging
-from dotenv import load_dotenv
-from schwabdev import Client
+from datetime import datetime, timedelta
 import config
-from collections import deque
-from threading import Lock
+from threading import Lock, Thread
+from utils.ema import get_band_engine, seed_band_engine
+from utils.fields import require_fields, build_field_layout
+from utils.frame_queue import FrameQueue
+from utils.ring_buffer import TickRingBuffer, summarize_ticks
+from utils.tick_bus import Tick, tick_bus
+from utils.tick_store import TickRecorder
+from utils.async_log import configure_async_logging
+from utils.bars import Bar, BarSeries
+from utils.indicators import get_indicator_set, seed_indicator_set
+from utils.decoder import decode_json, DECODE_ERRORS
+from utils.metrics import metrics
+from account.client import get_client
 
-# Create a deque to store the last X minutes of data
-data_deque = deque(maxlen=config.MAX_LENGTH)
+# Fields stored in the tick ring buffer, in TICK_COLUMNS order after the timestamp
+TICK_BUFFER_FIELDS = ("Bid Price", "Ask Price", "Last Price", "Bid Size", "Ask Size", "Last Size", "Total Volume")
+require_fields("tick buffer", *TICK_BUFFER_FIELDS)
+require_fields("stream supervisor", "Quote Time", "Trade Time")
 
-# Create a lock for thread-safe access to the deque
-deque_lock = Lock()
+# Per-symbol columnar ring buffers storing the latest ticks; /status summarizes their last X minutes
+tick_buffers = {}
 
-# Initialize variables to store the latest data
-latest_data = {field_name: None for field_name in config.FIELD_MAPPING.values()}
+# Per-symbol OHLCV bars; the band and other indicators are fed the BAND_BAR_INTERVAL bars
+symbol_bars = {}
 
-def my_custom_handler(message):
-    """Custom handler to update live data and the deque."""
-    logging.info(f"Received data: {message}")
+# Lock guarding the latest-data rows (ring buffer reads are lock-free)
+data_lock = Lock()
+
+# Per-symbol rows holding the latest value of every subscribed field, indexed by column
+latest_data = {}
+
+# Recorder persisting ticks to the binary tick store, created by start_stream
+tick_recorder = None
+
+# Callbacks receiving ACCT_ACTIVITY content entries (e.g. the order tracker)
+account_activity_listeners = []
+
+# Stage timings and counters of the stream handler (see utils.metrics)
+message_counter = metrics.counter("messages")
+tick_counter = metrics.counter("ticks")
+decode_latency = metrics.histogram("decode")
+buffer_latency = metrics.histogram("buffer_append")
+band_latency = metrics.histogram("band_update")
+handler_latency = metrics.histogram("handler")
+feed_delay = metrics.histogram("feed_delay")  # Server timestamp to receipt, includes clock offset
+queue_wait = metrics.histogram("queue_wait")  # Receipt to processing of the oldest frame in a batch
+conflated_counter = metrics.counter("ticks_conflated")
+
+# Raw frames handed from the websocket callback to the processing thread
+frame_queue = FrameQueue()
+frame_processor = None
+metrics.gauge("stream_queue_depth", frame_queue.__len__)
+metrics.gauge("stream_queue_high_water", lambda: frame_queue.high_water)
+metrics.gauge("stream_frames_dropped", lambda: frame_queue.dropped)
+
+# Connection state maintained by the stream supervisor: "live" once the stream is subscribed
+# and every band window is full, "warming" while some are not. The executor does not trade
+# while it is "reconnecting" or "backfilling", nor on a symbol whose window is still warming up.
+stream_health = {"state": "stopped", "reconnects": 0, "last_frame_at": None, "subscribed_at": None, "last_reconnect": None}
+reconnect_counter = metrics.counter("stream_reconnects")
+gated_counter = metrics.counter("ticks_gated")
+
+# Band bars in each symbol's window (backfilled or live); a symbol trades once it holds MAX_LENGTH
+window_bars = {}
+
+# Startup timings (time.perf_counter values) used to track time-to-first-tick
+startup_timings = {"stream_started": None, "first_tick": None}
+
+# Layout of the subscribed fields, frozen the first time it is needed
+field_layout = None
+key_to_column = {}
+tick_columns = ()
+last_price_column = None
+time_columns = ()  # Quote Time and Trade Time columns (epoch milliseconds)
+volume_column = None
+
+def get_field_layout():
+    """Return the layout of the subscribed fields, building it from the declared requirements once."""
+    global field_layout, key_to_column, tick_columns, last_price_column, time_columns, volume_column
+    with data_lock:
+        if field_layout is None:
+            layout = build_field_layout()
+            key_to_column = layout.key_to_column
+            tick_columns = tuple(layout.column(field_name) for field_name in TICK_BUFFER_FIELDS)
+            last_price_column = layout.column("Last Price")
+            time_columns = (layout.column("Quote Time"), layout.column("Trade Time"))
+            volume_column = layout.column("Total Volume")
+            field_layout = layout
+        return field_layout
+
+def get_symbol_buffer(symbol):
+    """Return the (latest row, tick buffer, bars) of a symbol, creating them on first use."""
+    bars = symbol_bars.get(symbol)
+    if bars is not None:
+        # Known symbol: the row and buffer are created before the bars, so no lock is needed
+        return latest_data[symbol], tick_buffers[symbol], bars
+
+    layout = field_layout or get_field_layout()
+    with data_lock:
+        if symbol not in symbol_bars:
+            latest_data[symbol] = [None] * len(layout)
+            tick_buffers[symbol] = TickRingBuffer(config.TICK_BUFFER_CAPACITY)
+            symbol_bars[symbol] = BarSeries()
+        return latest_data[symbol], tick_buffers[symbol], symbol_bars[symbol]
+
+def handle_content(content, received_at):
+    """Apply one LEVELONE content entry to the buffer of the symbol it belongs to and publish it."""
+    # The symbol is stored under the "key" field
+    symbol = content.get("key")
+    if not symbol:
+        return
+
+    row, tick_buffer, bars = get_symbol_buffer(symbol)
+    tick_counter.add()
+    start = time.perf_counter()
+
+    # Update the latest row from the fields present in the message. Messages only carry the
+    # fields that changed, so walking the message is cheaper than walking the subscription.
+    with data_lock:
+        for field_key, field_value in content.items():
+            column = key_to_column.get(field_key)
+            if column is not None and field_value is not None:
+                row[column] = field_value
+
+    # Append the tick to the symbol's ring buffer (single writer, no copy of the row). Ticks are
+    # stamped with the clock the bars use, so the tick store replays into the same bars.
+    timestamp = time.time()
+    if config.BAR_TIME_SOURCE == "exchange":
+        exchange_time = max(row[column] or 0 for column in time_columns)
+        if exchange_time:
+            timestamp = exchange_time / 1000.0
+    tick_values = [row[column] for column in tick_columns]
+    tick_buffer.append(timestamp, *tick_values)
+    buffer_latency.record(time.perf_counter() - start)
+
+    if startup_timings["first_tick"] is None:
+        startup_timings["first_tick"] = time.perf_counter()
+        if startup_timings["stream_started"] is not None:
+            elapsed = startup_timings["first_tick"] - startup_timings["stream_started"]
+            logging.info("First tick processed %.3f s after the stream started", elapsed)
+
+    # Queue the tick for the on-disk tick store (written by a background thread)
+    if tick_recorder is not None:
+        tick_recorder.record(symbol, timestamp, *tick_values)
+
+    # Aggregate the tick into bars; the indicators advance once per completed band bar,
+    # so the window spans X_MINUTES of time however many messages arrive
+    last_price = row[last_price_column]
+    if last_price is not None:
+        start = time.perf_counter()
+        completed = bars.update(timestamp, last_price, row[volume_column])
+
+        band_engine = get_band_engine(symbol)
+        band_bars = completed.get(config.BAND_BAR_INTERVAL)
+        if band_bars and bars.skipped(config.BAND_BAR_INTERVAL):
+            # The symbol was quiet for longer than BAR_MAX_FILL bars: rather than bands over
+            # synthetic flat bars, the window starts over and the symbol warms up again
+            band_engine = seed_band_engine(symbol, [])
+            seed_indicator_set(symbol, [])
+            window_bars[symbol] = 0
+        elif band_bars:
+            indicator_set = get_indicator_set(symbol)
+            for bar in band_bars:
+                band_engine.update(bar)
+                indicator_set.update(bar)
+            window_bars[symbol] = min(config.MAX_LENGTH, window_bars.get(symbol, 0) + len(band_bars))
+        band_latency.record(time.perf_counter() - start)
+
+        # Push the quote to the executor and GUI instead of letting them poll
+        ema, upper_band, lower_band = band_engine.get_snapshot()
+        tick_bus.publish(Tick(symbol, last_price, ema, upper_band, lower_band, received_at))
+
+def route_service(service, received_at):
+    """Apply one service entry of a decoded message."""
+    service_name = service.get('service')
+    if service_name == "LEVELONE_EQUITIES":
+        if "timestamp" in service:
+            feed_delay.record(time.time() - service["timestamp"] / 1000.0)
+        for content in service.get('content', []):
+            handle_content(content, received_at)
+    elif service_name == "ACCT_ACTIVITY":
+        for content in service.get('content', []):
+            for listener in account_activity_listeners:
+                listener(content)
+
+def my_custom_handler(message, received_at=None):
+    """Custom handler to update live data and the per-symbol tick buffers."""
+    start = time.perf_counter()
+    if received_at is None:
+        received_at = start
+    message_counter.add()
+    # Formatting and writing happen on the async log writer thread
+    logging.info("Received data: %s", message)
 
     try:
         # Ensure message is parsed as JSON
-        data = json.loads(message)
-        
-        # Check if the data contains market data and handle it
-        if 'data' in data:
-            content = data['data'][0].get('content', [])[0]
-
-            # Capture the symbol (usually stored under the "key" field)
-            symbol = content.get("key")
-            if symbol:
-                latest_data["Symbol"] = symbol
-
-            # Update the latest data based on the received fields
-            for field_key, field_value in content.items():
-                field_name = config.FIELD_MAPPING.get(field_key)
-                if field_name and field_key != "key":  # Avoid overriding the symbol
-                    latest_data[field_name] = field_value
-
-            # Append the latest data to the deque (with thread safety)
-            with deque_lock:
-                data_deque.append(latest_data.copy())
-
-    except json.JSONDecodeError:
+        data = decode_json(message)
+        decode_latency.record(time.perf_counter() - start)
+
+        # Check if the data contains market data and route every entry to its symbol
+        for service in data.get('data', []):
+            route_service(service, received_at)
+
+    except DECODE_ERRORS:
         logging.error("Failed to decode JSON message.")
     except Exception as e:
-        logging.error(f"Error processing data: {e}")
+        logging.error("Error processing data: %s", e)
+    handler_latency.record(time.perf_counter() - start)
+
+def handle_backlog(frames):
+    """Apply a backlog of (received_at, message) frames, conflating quotes per symbol.
+
+    Every frame is still logged and account activity is delivered in order, but the quote
+    updates of each symbol are merged field by field (later values win) and applied once,
+    so the processing thread catches up with the latest prices instead of replaying history.
+    """
+    merged = {}  # symbol -> [merged content, received_at of the oldest merged update]
+    quotes = 0
+    for received_at, message in frames:
+        message_counter.add()
+        logging.info("Received data: %s", message)
+        # One bad frame (or failing listener) must not end the processing thread
+        try:
+            data = decode_json(message)
+            for service in data.get('data', []):
+                if service.get('service') != "LEVELONE_EQUITIES":
+                    route_service(service, received_at)
+                    continue
+                for content in service.get('content', []):
+                    quotes += 1
+                    entry = merged.get(content.get("key"))
+                    if entry is None:
+                        merged[content.get("key")] = [dict(content), received_at]
+                    else:
+                        entry[0].update(content)
+        except DECODE_ERRORS:
+            logging.error("Failed to decode JSON message.")
+        except Exception as e:
+            logging.error("Error processing data: %s", e)
+
+    conflated_counter.add(quotes - len(merged))
+    for content, received_at in merged.values():
+        try:
+            handle_content(content, received_at)
+        except Exception as e:
+            logging.error("Error processing data: %s", e)
+
+def receive_frame(message):
+    """Websocket callback: hand the raw frame to the processing thread and return immediately."""
+    received_at = time.perf_counter()
+    stream_health["last_frame_at"] = received_at
+    frame_queue.put(received_at, message)
+
+def process_frames():
+    """Processing thread: decode and apply queued frames until the queue is closed."""
+    while True:
+        batch = frame_queue.get_batch()
+        if not batch:
+            if frame_queue.closed:
+                return
+            continue
 
-def start_stream():
-    """Function to start the Schwab API stream."""
-    # Configure logging
-    logging.basicConfig(filename='stream_data.log', level=logging.INFO, format='%(asctime)s - %(message)s')
+        queue_wait.record(time.perf_counter() - batch[0][0])
+        if frame_queue.policy == "conflate" and len(batch) >= config.STREAM_CONFLATE_BACKLOG:
+            handle_backlog(batch)
+        else:
+            for received_at, message in batch:
+                my_custom_handler(message, received_at)
 
-    # Load environment variables from .env file
-    load_dotenv()
+def start_stream(symbols=None, client=None):
+    """Function to start the Schwab API stream for a list of symbols."""
+    global tick_recorder, frame_processor
+    symbols = symbols or config.TICKER_SYMBOLS
+    startup_timings["stream_started"] = time.perf_counter()
 
-    # Get the environment variables
-    app_key = os.getenv('APP_KEY')
-    app_secret = os.getenv('APP_SECRET')
-    callback_url = os.getenv('REDIRECT_URL')
-    tokens_file = os.getenv('tokens_file')
+    # Load NumPy (used by the tick buffers) now rather than on the first tick
+    import numpy  # noqa: F401
 
-    # Create the client with the environment variables
-    client = Client(app_key, app_secret, callback_url, tokens_file=tokens_file)
+    # Persist ticks for backtests and analysis without writing on the stream thread
+    if config.RECORD_TICKS and tick_recorder is None:
+        tick_recorder = TickRecorder()
+        tick_recorder.start()
+
+    # Configure logging (written by a background thread so disk stalls never block the stream)
+    configure_async_logging('stream_data.log')
+
+    # Share the client (and its tokens/HTTP session) with the order subsystems
+    client = client or get_client()
+
+    # Decode and apply frames on a separate thread so the websocket reader never waits on them
+    if frame_processor is None:
+        frame_processor = Thread(target=process_frames, daemon=True)
+        frame_processor.start()
 
     # Define the streamer
     streamer = client.stream
 
     try:
-        # Start streamer with custom handler to update deque
-        streamer.start(my_custom_handler)
-
-        # Stream all fields for the specified ticker symbol
-        streamer.send(streamer.level_one_equities(config.TICKER_SYMBOL, config.FIELDS))
-
+        subscribe(streamer, symbols)
     except KeyboardInterrupt:
         # Graceful shutdown on Ctrl+C
         logging.info("Stream interrupted by user.")
         streamer.stop()
+        return
+
+    # Watch the connection: reconnect, resubscribe and backfill when it drops or goes silent
+    Thread(target=supervise_stream, args=(client, streamer, symbols), daemon=True).start()
+
+def subscribe(streamer, symbols):
+    """Start the streamer and subscribe to quotes (and account activity) for the watchlist."""
+    stream_health["last_frame_at"] = time.perf_counter()
+    stream_health["subscribed_at"] = time.time()
+
+    # Start streamer with a callback that only queues the raw frames
+    streamer.start(receive_frame)
+
+    # Stream only the fields our consumers declared, for the whole watchlist in one subscription
+    streamer.send(streamer.level_one_equities(",".join(symbols), get_field_layout().subscription()))
+
+    # Order fills and cancels are pushed to the order tracker when account activity is enabled
+    if config.USE_ACCOUNT_ACTIVITY_STREAM:
+        streamer.send(streamer.account_activity("Account Activity", "0,1,2,3"))
+
+def backfill(client, symbol):
+    """Warm the symbol's bands with the last X_MINUTES of one-minute closes from price history.
+
+    Each minute is interpolated between consecutive closes into BAND_BAR_INTERVAL bars, and
+    band bars completed since (re)subscribing are appended. Returns the number of candles used.
+    """
+    end = datetime.now()
+    start = end - timedelta(minutes=config.X_MINUTES + 1)
+    response = client.price_history(symbol, "day", 1, "minute", 1, start, end, True, False)
+    if not response.ok:
+        logging.error("Price history backfill for %s failed: %s", symbol, response.text)
+        return 0
+
+    closes = [candle["close"] for candle in response.json().get("candles", [])][-(config.X_MINUTES + 1):]
+    if not closes:
+        return 0
+    steps = max(1, 60 // config.BAND_BAR_INTERVAL)
+    samples = []
+    for previous, close in zip(closes, closes[1:]):
+        samples.extend(previous + (close - previous) * step / steps for step in range(steps))
+    samples.append(closes[-1])
+    # Interpolated minutes become flat bars without volume
+    history = [Bar(None, price, price, price, price, 0, price, 0) for price in samples]
+
+    # Bars from before the gap must not be gap-filled into the new window
+    row, tick_buffer, bars = get_symbol_buffer(symbol)
+    bars.reset()
+    recent = [bar for bar in bars.bars(config.BAND_BAR_INTERVAL) if bar.start >= stream_health["subscribed_at"]]
+    window = (history + recent)[-config.MAX_LENGTH:]
+    seed_band_engine(symbol, window)
+    seed_indicator_set(symbol, window)
+    window_bars[symbol] = len(window)
+    return len(closes)
+
+def backfill_symbols(client, symbols):
+    """Backfill every symbol, then go live; symbols whose window is not full keep warming up."""
+    stream_health["state"] = "backfilling"
+    for symbol in symbols:
+        try:
+            candles = backfill(client, symbol)
+            logging.info("Backfilled %s with %d one-minute candles", symbol, candles)
+        except Exception as e:
+            logging.error("Price history backfill for %s failed: %s", symbol, e)
+    stream_health["state"] = warmup_state(symbols)
+
+def is_warm(symbol):
+    """True once the symbol's band window holds MAX_LENGTH bars."""
+    return window_bars.get(symbol, 0) >= config.MAX_LENGTH
+
+def warmup_state(symbols):
+    return "live" if all(is_warm(symbol) for symbol in symbols) else "warming"
+
+def get_data_age(symbol):
+    """Seconds since the symbol's newest Quote Time or Trade Time, or None before any quote."""
+    with data_lock:
+        row = latest_data.get(symbol)
+        if row is None:
+            return None
+        times = [row[column] for column in time_columns if row[column]]
+    if not times:
+        return None
+    return time.time() - max(times) / 1000.0
+
+def is_symbol_live(symbol):
+    """True when the stream is connected, the symbol's band window is full and its quotes are recent enough to trade on."""
+    if stream_health["state"] not in ("live", "warming") or not is_warm(symbol):
+        return False
+    age = get_data_age(symbol)
+    return age is not None and age <= config.STREAM_STALE_AFTER
+
+def get_stream_health():
+    """Return the connection state and the data age of every symbol."""
+    health = dict(stream_health)
+    if health["last_frame_at"] is not None:
+        health["silent_s"] = round(time.perf_counter() - health["last_frame_at"], 1)
+    health["data_age_s"] = {symbol: get_data_age(symbol) for symbol in get_symbols()}
+    health["window_bars"] = dict(window_bars)
+    return health
+
+def supervise_stream(client, streamer, symbols):
+    """Keep the stream connected: reconnect with backoff when it stops or goes silent, then backfill."""
+    backoff = 1
+    messages_at_reconnect = None
+    needs_backfill = config.STREAM_BACKFILL
+    stream_health["state"] = "backfilling" if needs_backfill else warmup_state(symbols)
+
+    while True:
+        if needs_backfill:
+            backfill_symbols(client, symbols)
+            needs_backfill = False
+
+        time.sleep(1)
+        if stream_health["state"] == "warming":
+            stream_health["state"] = warmup_state(symbols)
+        active = getattr(streamer, "active", True)
+        silent = time.perf_counter() - stream_health["last_frame_at"] > config.STREAM_SILENCE_TIMEOUT
+        if active and not silent:
+            if message_counter.value != messages_at_reconnect:
+                backoff = 1  # Data is flowing again
+            continue
+
+        # Connection lost: stop trading on the old window and reconnect
+        stream_health["state"] = "reconnecting"
+        logging.error("Stream %s, reconnecting", "stopped" if not active else "silent")
+        try:
+            streamer.stop()
+        except Exception as e:
+            logging.error("Stopping the stream failed: %s", e)
+        try:
+            subscribe(streamer, symbols)
+        except Exception as e:
+            logging.error("Reconnect failed: %s", e)
+            continue
+        finally:
+            # Back off between attempts until data flows again
+            time.sleep(backoff)
+            backoff = min(backoff * 2, config.STREAM_RECONNECT_MAX_BACKOFF)
+
+        messages_at_reconnect = message_counter.value
+        reconnect_counter.add()
+        stream_health["reconnects"] += 1
+        stream_health["last_reconnect"] = time.time()
+        needs_backfill = config.STREAM_BACKFILL
+        if not needs_backfill:
+            stream_health["state"] = warmup_state(symbols)
+
+def add_account_activity_listener(callback):
+    """Register a callback for account activity (order status) stream messages."""
+    account_activity_listeners.append(callback)
+
+def get_symbols():
+    """Return the symbols that have received data so far."""
+    with data_lock:
+        return list(tick_buffers)
+
+def get_last_x_minutes_data(symbol=config.TICKER_SYMBOL):
+    """Return the ticks of the last X minutes for a symbol as a TickWindow of zero-copy column views."""
+    tick_buffer = tick_buffers.get(symbol)
+    if tick_buffer is None:
+        return None
+    return tick_buffer.since(time.time() - config.X_MINUTES * 60)
+
+def get_tape(symbol):
+    """Summarize the last X minutes of a symbol's ticks (rate, spread, volume, range), or None before any tick."""
+    window = get_last_x_minutes_data(symbol)
+    if window is None:
+        return None
+    return summarize_ticks(window)
+
+def get_bars(symbol, interval=config.BAND_BAR_INTERVAL, count=None, include_current=False):
+    """Return the latest completed bars of a symbol for one of the BAR_INTERVALS."""
+    bars = symbol_bars.get(symbol)
+    if bars is None:
+        return []
+    return bars.bars(interval, count, include_current)
 
-def get_last_x_minutes_data():
-    """Function to access the last X minutes of data in a thread-safe manner."""
-    with deque_lock:
-        return list(data_deque)
+def get_latest_data(symbol=config.TICKER_SYMBOL):
+    """Function to access the most recent data point of a symbol in a thread-safe manner."""
+    with data_lock:
+        row = latest_data.get(symbol)
+        if row is None:
+            return None
+        symbol_data = field_layout.to_dict(row)
+    symbol_data["Symbol"] = symbol
+    return symbol_data
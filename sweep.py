@@ -0,0 +1,149 @@
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import config
+from backtest import load_ticks_from_log, load_ticks_from_store, parse_time, run_backtest
+from utils.bars import window_bars
+from utils.ring_buffer import TICK_COLUMNS, TickWindow
+
+# Per-worker cache of TickWindows attached to the shared memory blocks
+worker_datasets = {}
+
+def share_ticks(ticks):
+    """Copy a TickWindow into one shared memory block and return (block, descriptor).
+
+    The descriptor is small and picklable; workers use it to map the columns without copying.
+    """
+    length = len(ticks.timestamp)
+    block = shared_memory.SharedMemory(create=True, size=max(length * 8 * len(TICK_COLUMNS), 1))
+    for index, ((name, dtype), column) in enumerate(zip(TICK_COLUMNS, ticks)):
+        view = np.ndarray(length, dtype=dtype, buffer=block.buf, offset=index * length * 8)
+        view[:] = column
+    return block, {"name": block.name, "length": length}
+
+def attach_ticks(descriptor):
+    """Map a shared tick block into this worker process (cached across tasks)."""
+    cached = worker_datasets.get(descriptor["name"])
+    if cached is None:
+        block = shared_memory.SharedMemory(name=descriptor["name"])
+        length = descriptor["length"]
+        columns = [
+            np.ndarray(length, dtype=dtype, buffer=block.buf, offset=index * length * 8)
+            for index, (name, dtype) in enumerate(TICK_COLUMNS)
+        ]
+        # Keep the block referenced so the mapping stays alive as long as the views
+        cached = (block, TickWindow(*columns))
+        worker_datasets[descriptor["name"]] = cached
+    return cached[1]
+
+def evaluate(task):
+    """Worker: run one parameter combination over one dataset."""
+    dataset, descriptor, params = task
+    ticks = attach_ticks(descriptor)
+    result = run_backtest(
+        ticks,
+        max_length=window_bars(params["x_minutes"]),
+        multiplier=params["multiplier"],
+        stop_offset=params["stop_offset"],
+        link_basis=params["link_basis"],
+    )
+    return dataset, params, {key: value for key, value in result.items() if key != "fills"}
+
+def build_grid(x_minutes, multipliers, stop_offsets, link_bases):
+    """Return every combination of the swept parameters."""
+    return [
+        {"x_minutes": x, "multiplier": m, "stop_offset": s, "link_basis": b}
+        for x, m, s, b in itertools.product(x_minutes, multipliers, stop_offsets, link_bases)
+    ]
+
+def run_sweep(datasets, grid, workers=None):
+    """Evaluate every grid point on every dataset and return rows ranked by total P&L.
+
+    `datasets` maps a label such as "SQQQ 2024-08-23" to a TickWindow. Tick columns are placed
+    in shared memory once; only their names travel to the worker processes.
+    """
+    blocks = []
+    descriptors = {}
+    try:
+        for label, ticks in datasets.items():
+            block, descriptor = share_ticks(ticks)
+            blocks.append(block)
+            descriptors[label] = descriptor
+
+        tasks = [(label, descriptor, params) for label, descriptor in descriptors.items() for params in grid]
+        per_params = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+            for dataset, params, result in pool.map(evaluate, tasks, chunksize=chunksize):
+                key = tuple(sorted(params.items()))
+                per_params.setdefault(key, []).append(result)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    rows = []
+    for key, results in per_params.items():
+        row = dict(key)
+        row["total_pnl"] = sum(result["total_pnl"] for result in results)
+        row["max_drawdown"] = max(result["max_drawdown"] for result in results)
+        row["trades"] = sum(result["trades"] for result in results)
+        row["stop_exits"] = sum(result["stop_exits"] for result in results)
+        row["datasets"] = len(results)
+        rows.append(row)
+    rows.sort(key=lambda row: (row["total_pnl"], -row["max_drawdown"]), reverse=True)
+    return rows
+
+def print_table(rows, limit):
+    header = f"{'rank':>4} {'x_min':>6} {'mult':>6} {'offset':>7} {'basis':>6} {'pnl':>10} {'max_dd':>9} {'trades':>7} {'stops':>6}"
+    print(header)
+    print("-" * len(header))
+    for rank, row in enumerate(rows[:limit], start=1):
+        print(f"{rank:>4} {row['x_minutes']:>6g} {row['multiplier']:>6g} {row['stop_offset']:>7g} {row['link_basis']:>6} "
+              f"{row['total_pnl']:>10.4f} {row['max_drawdown']:>9.4f} {row['trades']:>7} {row['stop_exits']:>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid search the band and trailing stop settings over recorded ticks.")
+    parser.add_argument("log_files", nargs="*", help="stream_data.log files, one per day")
+    parser.add_argument("--day", action="append", default=[], help="Include a day (YYYY-MM-DD) from the tick store")
+    parser.add_argument("--store", default=config.TICK_STORE_DIR, help="Tick store folder used with --day")
+    parser.add_argument("--start", type=parse_time, help="Use store ticks from this time, e.g. \"2024-08-23 09:30\"")
+    parser.add_argument("--end", type=parse_time, help="Use store ticks before this time (with --start: the days in between by default)")
+    parser.add_argument("--symbol", action="append", help="Symbols to include (default: every symbol found)")
+    parser.add_argument("--x-minutes", type=float, nargs="+", default=[config.X_MINUTES])
+    parser.add_argument("--multiplier", type=float, nargs="+", default=[config.STD_DEVIATION_MULTIPLIER])
+    parser.add_argument("--stop-offset", type=float, nargs="+", default=[config.STOP_PRICE_OFFSET])
+    parser.add_argument("--link-basis", nargs="+", default=[config.STOP_PRICE_LINK_BASIS])
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--csv", help="Write the full ranked table to this CSV file")
+    args = parser.parse_args()
+
+    datasets = {}
+    for log_path in args.log_files:
+        for symbol, ticks in load_ticks_from_log(log_path).items():
+            if not args.symbol or symbol in args.symbol:
+                datasets[f"{symbol} {os.path.basename(log_path)}"] = ticks
+    for symbol, day, ticks in load_ticks_from_store(args.day, args.symbol, args.store, args.start, args.end):
+        datasets[f"{symbol} {day}"] = ticks
+
+    grid = build_grid(args.x_minutes, args.multiplier, args.stop_offset, args.link_basis)
+    start = time.perf_counter()
+    rows = run_sweep(datasets, grid, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Evaluated {len(grid)} combinations over {len(datasets)} datasets in {elapsed:.1f} s")
+    print_table(rows, args.top)
+
+    if args.csv and rows:
+        with open(args.csv, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import threading
+import pytest
+from utils.async_log import AsyncLogWriter, LogTail
+
+def idle_writer(**settings):
+    """A writer whose thread waits a minute between flushes, so entries stay queued until stop()."""
+    return AsyncLogWriter(batch_size=1000, flush_interval=60, **settings)
+
+def lines(path):
+    with open(path) as log_file:
+        return log_file.read().splitlines()
+
+@pytest.mark.parametrize("overflow, kept", [("drop_oldest", ["2", "3", "4"]), ("drop_new", ["0", "1", "2"])])
+def test_overflow_drops_and_counts_entries(tmp_path, overflow, kept):
+    path = str(tmp_path / "out.log")
+    writer = idle_writer(max_queue=3, overflow=overflow)
+    for index in range(5):
+        writer.write(path, f"{index}\n")
+    assert (writer.dropped, writer.queue_depth()) == (2, 3)
+    writer.stop()
+    assert lines(path) == kept
+    assert writer.written == 3
+
+def test_block_waits_for_the_writer_thread(tmp_path):
+    path = str(tmp_path / "out.log")
+    writer = idle_writer(max_queue=2, overflow="block")
+    writer.write(path, "0\n")
+    writer.write(path, "1\n")
+    blocked = threading.Thread(target=writer.write, args=(path, "2\n"))
+    blocked.start()
+    blocked.join(0.05)
+    assert blocked.is_alive()
+
+    # Let the writer thread flush now; it makes room for the blocked entry
+    with writer.condition:
+        writer.flush_interval = 0.01
+        writer.condition.notify_all()
+    blocked.join(1)
+    assert not blocked.is_alive()
+    writer.stop()
+    assert lines(path) == ["0", "1", "2"]
+    assert writer.dropped == 0
+
+def test_render_runs_on_the_writer_thread(tmp_path):
+    path = str(tmp_path / "out.log")
+    writer = AsyncLogWriter(flush_interval=0.01)
+    threads = []
+    writer.write(path, render=lambda: threads.append(threading.current_thread()) or "rendered\n")
+    writer.stop()
+    assert lines(path) == ["rendered"]
+    assert threads == [writer.thread]
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AsyncLogWriter(overflow="spill")
+
+def test_log_tail_returns_only_complete_new_lines(tmp_path):
+    path = tmp_path / "orders.log"
+    tail = LogTail(str(path))
+    assert tail.read_new() == []
+    path.write_text("first\nsecond\npart")
+    assert tail.read_new() == ["first", "second"]
+    with open(path, "a") as log_file:
+        log_file.write("ial\n")
+    assert tail.read_new() == ["partial"]
+    path.write_text("new\n")  # Truncated and rewritten
+    assert tail.read_new() == ["new"]
@@ -0,0 +1,26 @@
+import config
+from backtest import rows_to_tick_window, run_backtest
+
+START = 1724421600.0
+
+def ticks(prices, seconds=None):
+    """Ticks at the given last prices (one per second by default), with the quote around them."""
+    seconds = range(len(prices)) if seconds is None else seconds
+    return rows_to_tick_window([
+        (START + second, price - 0.01, price + 0.01, price, 100, 100, 10, 1000 + 10 * index)
+        for index, (second, price) in enumerate(zip(seconds, prices))
+    ])
+
+def test_no_trade_before_the_band_window_is_full():
+    # The drop on the second tick breaches the band of a one-bar window, which live never trades on
+    result = run_backtest(ticks([10.0, 9.0, 9.0, 9.0, 9.0, 9.0, 9.0, 8.0]), max_length=5, stop_offset=5.0)
+    assert [(fill["time"] - START, fill["side"]) for fill in result["fills"]] == [(7.0, "BUY")]
+
+def test_a_gap_longer_than_the_fill_restarts_the_warmup():
+    # Five full bars, then silence for longer than BAR_MAX_FILL bars
+    resumed = 6 + config.BAR_MAX_FILL + 1
+    times = list(range(6)) + list(range(resumed, resumed + 6))
+    prices = [10.0, 10.02] * 3 + [10.0, 8.0, 10.0, 10.02, 10.0, 8.0]
+    result = run_backtest(ticks(prices, times), max_length=5, stop_offset=5.0)
+    # The first drop comes before the restarted window is full again
+    assert [(fill["time"] - START, fill["side"]) for fill in result["fills"]] == [(resumed + 5, "BUY")]
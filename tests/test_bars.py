@@ -0,0 +1,46 @@
+from utils.bars import Bar, BarAggregator, BarSeries
+
+def test_ticks_build_ohlcv_bars_with_vwap():
+    aggregator = BarAggregator(5, max_fill=3)
+    assert aggregator.update(100.0, 10.0, 1000) == []
+    assert aggregator.update(101.0, 10.4, 1100) == []
+    assert aggregator.update(103.0, 9.9, 1400) == []
+    (bar,) = aggregator.update(105.0, 10.1, 1500)
+    # Volume comes from the growth of the cumulative Total Volume
+    assert bar == Bar(100.0, 10.0, 10.4, 9.9, 9.9, 400, (10.4 * 100 + 9.9 * 300) / 400, 3)
+    assert aggregator.current().open == 10.1
+
+def test_short_gaps_are_filled_with_flat_bars():
+    aggregator = BarAggregator(1, max_fill=3)
+    aggregator.update(100.2, 10.0)
+    bars = aggregator.update(104.5, 10.3)
+    assert [bar.start for bar in bars] == [100.0, 101.0, 102.0, 103.0]
+    assert all((bar.open, bar.close, bar.volume, bar.ticks) == (10.0, 10.0, 0, 0) for bar in bars[1:])
+    assert aggregator.skipped == 0
+
+def test_long_gaps_are_not_filled():
+    aggregator = BarAggregator(1, max_fill=3)
+    aggregator.update(100.0, 10.0)
+    bars = aggregator.update(105.0, 10.3)
+    assert [bar.start for bar in bars] == [100.0]
+    assert aggregator.skipped == 4
+    # The next boundary clears it
+    assert len(aggregator.update(106.0, 10.2)) == 1
+    assert aggregator.skipped == 0
+
+def test_series_reports_skipped_intervals_per_interval():
+    # 44 empty seconds exceed BAR_MAX_FILL; the minute bar has no gap at all
+    series = BarSeries(intervals=(1, 60))
+    series.update(0.0, 10.0)
+    completed = series.update(45.0, 10.1)
+    assert list(completed) == [1]
+    assert series.skipped(1) == 44
+    assert series.skipped(60) == 0
+
+def test_reset_starts_fresh_without_filling_the_gap():
+    aggregator = BarAggregator(1, max_fill=100)
+    aggregator.update(100.0, 10.0, 1000)
+    aggregator.reset()
+    assert aggregator.update(150.0, 10.5, 5000) == []
+    (bar,) = aggregator.update(151.0, 10.6, 5100)
+    assert (bar.start, bar.volume) == (150.0, 0)
@@ -0,0 +1,37 @@
+import requests
+from account import client as client_module
+
+class ModuleLevelClient:
+    """Client calling requests.get at module level, like schwabdev releases without a session."""
+
+    def quote(self, symbol):
+        return requests.get(f"https://api.example.com/quotes/{symbol}")
+
+class RecordingSession:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(url)
+        return url
+
+def test_pooling_is_limited_to_the_client_instance():
+    session = RecordingSession()
+    pooled, other = ModuleLevelClient(), ModuleLevelClient()
+    client_module.pool_client_requests(pooled, session)
+
+    assert pooled.quote("SQQQ") == "https://api.example.com/quotes/SQQQ"
+    assert session.calls == ["https://api.example.com/quotes/SQQQ"]
+    # The module's requests global and other clients are untouched
+    assert globals()["requests"] is requests
+    assert other.quote.__func__ is ModuleLevelClient.quote
+
+def test_clients_with_their_own_session_are_left_alone(monkeypatch):
+    class SessionClient(ModuleLevelClient):
+        def __init__(self):
+            self._session = requests.Session()
+
+    monkeypatch.setattr(client_module, "build_session", lambda: RecordingSession())
+    client = SessionClient()
+    client_module.enable_connection_pooling(client)
+    assert "quote" not in vars(client)
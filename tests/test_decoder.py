@@ -0,0 +1,39 @@
+import importlib.util
+import sys
+import pytest
+from utils.decoder import load_decoder
+
+MESSAGE = '{"data": [{"service": "LEVELONE_EQUITIES", "content": [{"key": "SQQQ", "3": 10.5}]}]}'
+
+def installed(module):
+    return sys.modules.get(module) is not None or importlib.util.find_spec(module) is not None
+
+def uninstall(monkeypatch, *modules):
+    for module in modules:
+        monkeypatch.setitem(sys.modules, module, None)  # Makes `import module` raise ImportError
+
+def test_auto_takes_the_first_installed_decoder(monkeypatch):
+    expected = [module for module in ("orjson", "msgspec") if installed(module)] + ["json"]
+    assert load_decoder("auto")[0] == expected[0]
+    uninstall(monkeypatch, "orjson")
+    assert load_decoder("auto")[0] == ("msgspec" if installed("msgspec") else "json")
+    uninstall(monkeypatch, "msgspec")
+    assert load_decoder("auto")[0] == "json"
+
+@pytest.mark.parametrize("name", ["orjson", "msgspec", "json"])
+def test_every_installed_decoder_reads_stream_messages(name):
+    if not installed(name):
+        pytest.skip(f"{name} is not installed")
+    decoded_name, decode, errors = load_decoder(name)
+    assert decoded_name == name
+    assert decode(MESSAGE)["data"][0]["content"][0] == {"key": "SQQQ", "3": 10.5}
+    for malformed in ("[1", "not json", ""):
+        with pytest.raises(errors):
+            decode(malformed)
+
+def test_explicit_decoder_that_is_missing_or_unknown_fails(monkeypatch):
+    uninstall(monkeypatch, "orjson")
+    with pytest.raises(ImportError):
+        load_decoder("orjson")
+    with pytest.raises(ValueError):
+        load_decoder("simdjson")
@@ -0,0 +1,43 @@
+import random
+import numpy as np
+import pytest
+from utils.ema import BandEngine, calculate_std_deviation, calculate_upper_lower_bands
+
+def random_walk(count, seed=1):
+    rng = random.Random(seed)
+    price = 10.0
+    prices = []
+    for _ in range(count):
+        price = max(0.01, price + rng.gauss(0, 0.02))
+        prices.append(price)
+    return prices
+
+def full_window_ema(window):
+    """The original full-window EMA (weights e^-1 to 1 over the window), with the weights in time
+    order; its np.convolve call reversed them and gave the oldest price the largest weight."""
+    weights = np.exp(np.linspace(-1.0, 0.0, len(window)))
+    return float(np.dot(window, weights / weights.sum()))
+
+@pytest.mark.parametrize("length", [2, 5, 60, 480])
+def test_band_engine_matches_the_full_window_recompute(length):
+    prices = random_walk(3 * length + 50)
+    engine = BandEngine(length, multiplier=1.7)
+    for index, price in enumerate(prices):
+        engine.update(price)
+        if index + 1 < length:
+            continue  # The baseline reweights a partial window; compare once it is full
+        window = prices[index + 1 - length:index + 1]
+        ema = full_window_ema(window)
+        upper_band, lower_band = calculate_upper_lower_bands(ema, calculate_std_deviation(window), 1.7)
+        assert engine.get_snapshot() == pytest.approx((ema, upper_band, lower_band), rel=1e-10, abs=1e-10)
+
+def test_band_engine_closes_the_bands_on_a_flat_window():
+    engine = BandEngine(60)
+    for price in random_walk(200) + [9.5] * 60:
+        engine.update(price)
+    ema, upper_band, lower_band = engine.get_snapshot()
+    assert ema == pytest.approx(9.5, abs=1e-12)
+    assert upper_band - lower_band == pytest.approx(0.0, abs=1e-12)
+
+def test_band_engine_without_prices_has_no_bands():
+    assert BandEngine(10).get_snapshot() == (None, None, None)
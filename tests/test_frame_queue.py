@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+import pytest
+import stream
+from utils.frame_queue import FrameQueue
+
+def test_drop_policies_discard_the_oldest_frames():
+    for policy in ("drop_oldest", "conflate"):
+        queue = FrameQueue(max_frames=3, policy=policy)
+        for index in range(5):
+            queue.put(float(index), f"frame {index}")
+        assert [frame for _, frame in queue.get_batch()] == ["frame 2", "frame 3", "frame 4"]
+        assert (queue.dropped, queue.high_water) == (2, 3)
+
+def test_block_policy_waits_for_the_consumer():
+    queue = FrameQueue(max_frames=2, policy="block")
+    queue.put(0.0, "frame 0")
+    queue.put(1.0, "frame 1")
+    receiver = threading.Thread(target=queue.put, args=(2.0, "frame 2"))
+    receiver.start()
+    time.sleep(0.05)
+    assert receiver.is_alive()  # Backpressure: the websocket reader is held up
+
+    assert [frame for _, frame in queue.get_batch()] == ["frame 0", "frame 1"]
+    receiver.join(1)
+    assert not receiver.is_alive()
+    assert [frame for _, frame in queue.get_batch()] == ["frame 2"]
+    assert queue.dropped == 0
+
+def test_get_batch_times_out_empty_and_close_releases_waiters():
+    queue = FrameQueue(max_frames=1, policy="block")
+    assert queue.get_batch(timeout=0.01) == []
+    queue.put(0.0, "frame")
+    receiver = threading.Thread(target=queue.put, args=(1.0, "frame"))
+    receiver.start()
+    queue.close()
+    receiver.join(1)
+    assert not receiver.is_alive()
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        FrameQueue(policy="spill")
+
+def test_backlog_merges_quotes_per_symbol_field_by_field(monkeypatch):
+    applied = []
+    monkeypatch.setattr(stream, "handle_content", lambda content, received_at: applied.append((content, received_at)))
+
+    def quotes(received_at, *contents):
+        return received_at, json.dumps({"data": [{"service": "LEVELONE_EQUITIES", "content": list(contents)}]})
+
+    conflated = stream.conflated_counter.value
+    stream.handle_backlog([
+        quotes(1.0, {"key": "AAA", "1": 9.9, "3": 10.0}, {"key": "BBB", "3": 50.0}),
+        quotes(2.0, {"key": "AAA", "3": 10.1}),
+        quotes(3.0, {"key": "AAA", "2": 10.2, "3": 10.2}),
+    ])
+    # One update per symbol: later fields win, earlier ones survive, and the wait is the oldest frame's
+    assert applied == [
+        ({"key": "AAA", "1": 9.9, "3": 10.2, "2": 10.2}, 1.0),
+        ({"key": "BBB", "3": 50.0}, 1.0),
+    ]
+    assert stream.conflated_counter.value - conflated == 2
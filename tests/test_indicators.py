@@ -0,0 +1,71 @@
+import math
+import random
+import numpy as np
+import pytest
+from utils.bars import Bar
+from utils.indicators import INDICATORS, bars_to_arrays, create_indicator
+
+# Largest difference allowed between the streaming and batch paths, relative to the price level
+TOLERANCE = 1e-9
+
+# Specs checked per indicator besides its defaults; lengths of 60 and 480 are fully covered
+# by the longest flat gaps of the synthetic series
+SPECS = [{"name": name} for name in INDICATORS] + [
+    {"name": "ema", "span": 20}, {"name": "ema", "alpha": 0.5}, {"name": "ema", "span": 2000},
+    {"name": "ema_bands", "length": 1}, {"name": "ema_bands", "length": 60}, {"name": "ema_bands", "length": 480},
+    {"name": "bollinger", "length": 20}, {"name": "bollinger", "length": 480},
+    {"name": "vwap_bands", "length": 20}, {"name": "vwap_bands", "length": 480},
+    {"name": "atr", "length": 14}, {"name": "atr", "length": 100},
+    {"name": "rsi", "length": 14}, {"name": "rsi", "length": 100},
+    {"name": "keltner", "length": 20, "atr_length": 10},
+]
+
+def synthetic_bars(count, seed=3):
+    """Random-walk one-second bars with volume; about 1% of bars start a gap of flat bars without volume."""
+    rng = random.Random(seed)
+    bars = []
+    price = 10.0
+    gap = 0
+    for index in range(count):
+        if gap:
+            gap -= 1
+            bars.append(Bar(index, price, price, price, price, 0, price, 0))
+            continue
+        if rng.random() < 0.01:
+            gap = rng.choice((rng.randint(1, 120), 600))
+        open_price = price
+        closes = [price := max(0.01, price + rng.gauss(0, 0.01)) for _ in range(rng.randint(1, 5))]
+        volume = rng.randint(1, 50) * 100
+        vwap = sum(closes) / len(closes)
+        bars.append(Bar(index, open_price, max(open_price, *closes), min(open_price, *closes), price, volume, vwap, len(closes)))
+    return bars
+
+BARS = synthetic_bars(8000)
+ARRAYS = bars_to_arrays(BARS)
+SCALE = float(np.max(np.abs(ARRAYS.close)))
+
+def streamed(spec, bars=BARS):
+    indicator = create_indicator(spec)
+    snapshots = [indicator.update(bar) for bar in bars]
+    return [np.array([math.nan if snapshot[index] is None else snapshot[index] for snapshot in snapshots])
+            for index in range(len(indicator.fields))]
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: ",".join(f"{key}={value}" for key, value in spec.items()))
+def test_streaming_and_batch_paths_agree(spec):
+    indicator = create_indicator(spec)
+    for field, stream_values, batch_values in zip(indicator.fields, streamed(spec), indicator.compute(ARRAYS)):
+        # Both paths warm up on the same bar
+        assert np.array_equal(np.isnan(stream_values), np.isnan(batch_values)), field
+        valid = ~np.isnan(stream_values)
+        assert np.max(np.abs(stream_values[valid] - batch_values[valid]), initial=0.0) / SCALE <= TOLERANCE, field
+
+# Keltner bands are as wide as the ATR, which Wilder smoothing closes only slowly
+@pytest.mark.parametrize("name", ["ema_bands", "bollinger", "vwap_bands"])
+def test_bands_close_on_a_flat_window(name):
+    # Once gap-filled flat bars evict the last moving bar, no spread is left in either path
+    spec = {"name": name, "length": 60}
+    flat = BARS[:500] + [Bar(500 + index, 9.5, 9.5, 9.5, 9.5, 0, 9.5, 0) for index in range(100)]
+    stream_values = streamed(spec, flat)
+    batch_values = create_indicator(spec).compute(bars_to_arrays(flat))
+    for values in list(stream_values) + list(batch_values):
+        assert values[-1] == pytest.approx(9.5, abs=TOLERANCE)
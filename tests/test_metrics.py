@@ -0,0 +1,53 @@
+import random
+from utils.metrics import LatencyHistogram, MetricsRegistry
+
+def test_buckets_bound_every_value_within_their_precision():
+    histogram = LatencyHistogram()
+    previous_index = -1
+    for micros in list(range(0, 5000)) + [2 ** exponent + offset for exponent in range(13, 40) for offset in (-1, 0, 1)]:
+        index = histogram._bucket_index(micros)
+        lower = histogram._bucket_value(index)
+        upper = histogram._bucket_value(index + 1)
+        assert lower <= micros < upper
+        assert upper - lower <= max(1, lower / 16)
+        assert index >= previous_index  # Buckets are ordered like the values
+        previous_index = index
+    assert histogram._bucket_index(2 ** 45) < len(histogram.counts)
+
+def test_small_latencies_are_exact():
+    histogram = LatencyHistogram()
+    for micros in range(1, 11):
+        histogram.record(micros / 1_000_000)
+    assert [histogram.percentile(percent) for percent in (10, 50, 90, 100)] == [1, 5, 9, 10]
+
+def test_percentiles_follow_the_distribution():
+    rng = random.Random(5)
+    samples = sorted(rng.lognormvariate(5, 1.5) for _ in range(20000))
+    histogram = LatencyHistogram()
+    for micros in samples:
+        histogram.record(micros / 1_000_000)
+    for percent in (50, 90, 99, 99.9):
+        exact = int(samples[int(len(samples) * percent / 100) - 1])
+        # The lower bound of the bucket holding the exact value
+        assert exact * 15 / 16 - 1 <= histogram.percentile(percent) <= exact
+    summary = histogram.summary()
+    assert summary["count"] == 20000
+    assert summary["max_us"] == int(samples[-1])
+
+def test_empty_and_reset_histograms_report_nothing():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    histogram.record(0.5)
+    histogram.reset()
+    assert histogram.summary()["count"] == 0
+    assert histogram.percentile(99) is None
+
+def test_snapshot_reports_failing_gauges_instead_of_raising():
+    registry = MetricsRegistry()
+    registry.counter("ticks").add(3)
+    registry.gauge("depth", lambda: 7)
+    registry.gauge("broken", lambda: 1 / 0)
+    snapshot = registry.snapshot()
+    assert snapshot["counters"]["ticks"]["total"] == 3
+    assert snapshot["gauges"]["depth"] == 7
+    assert snapshot["gauges"]["broken"].startswith("error:")
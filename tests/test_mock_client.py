@@ -0,0 +1,91 @@
+import pytest
+from utils.mock_client import MockClient
+
+SYMBOL = "SQQQ"
+
+def leg(instruction):
+    return [{"orderLegType": "EQUITY", "instruction": instruction, "quantity": 1,
+             "instrument": {"symbol": SYMBOL, "assetType": "EQUITY"}}]
+
+def buy_with_trailing_stop(offset, link_type="VALUE", basis="LAST"):
+    return {
+        "orderType": "MARKET", "orderStrategyType": "TRIGGER", "orderLegCollection": leg("BUY"),
+        "childOrderStrategies": [{
+            "orderType": "TRAILING_STOP", "orderStrategyType": "SINGLE", "stopPriceLinkType": link_type,
+            "stopPriceOffset": offset, "stopPriceLinkBasis": basis, "orderLegCollection": leg("SELL"),
+        }],
+    }
+
+def place(client, order):
+    response = client.order_place(MockClient.ACCOUNT_HASH, order)
+    parent = client.orders[int(response.headers["Location"].split("/")[-1])]
+    return parent, (parent["children"] or [None])[0]
+
+def quote(client, last, spread=0.01):
+    client.engine.on_quote(SYMBOL, round(last - spread, 4), round(last + spread, 4), last)
+
+@pytest.mark.parametrize("link_type, offset, holds, triggers", [
+    ("VALUE", 0.07, 10.44, 10.43),
+    ("PERCENT", 1.0, 10.40, 10.39),  # 1% below the 10.50 peak is 10.395
+])
+def test_trailing_stop_follows_the_peak_and_triggers_on_the_pullback(link_type, offset, holds, triggers):
+    client = MockClient()
+    quote(client, 10.0)
+    parent, stop = place(client, buy_with_trailing_stop(offset, link_type))
+    assert (parent["status"], stop["status"]) == ("FILLED", "WORKING")
+
+    quote(client, 10.5)
+    quote(client, holds)
+    assert stop["status"] == "WORKING"
+    quote(client, triggers)
+    assert stop["status"] == "FILLED"
+    assert stop["orderActivityCollection"][0]["executionLegs"][0]["price"] == round(triggers - 0.01, 4)
+
+    position = client.positions()[SYMBOL]
+    assert position["quantity"] == 0
+    assert position["realized_pnl"] == pytest.approx(triggers - 0.01 - 10.01)
+
+def test_trailing_stop_can_follow_the_bid():
+    client = MockClient()
+    quote(client, 10.0)
+    _, stop = place(client, buy_with_trailing_stop(0.05, basis="BID"))
+    quote(client, 10.5, spread=0.2)  # Bid 10.30: the stop sits at 10.25 whatever the last price
+    assert stop["stopPrice"] == 10.25
+    # The last price holds above a LAST stop (10.45), but the bid falls through this one
+    quote(client, 10.47, spread=0.25)
+    assert stop["status"] == "FILLED"
+
+def test_cancel_cascades_to_children_waiting_for_their_parent():
+    client = MockClient()  # No quote yet, so the buy cannot fill
+    parent, stop = place(client, buy_with_trailing_stop(0.07))
+    assert (parent["status"], stop["status"]) == ("WORKING", "AWAITING_PARENT_ORDER")
+
+    assert client.order_cancel(MockClient.ACCOUNT_HASH, parent["orderId"]).status_code == 200
+    assert (parent["status"], stop["status"]) == ("CANCELED", "CANCELED")
+    # Nothing is left to fill once quotes arrive, and finished orders cannot be canceled again
+    quote(client, 10.0)
+    assert client.positions() == {}
+    assert client.order_cancel(MockClient.ACCOUNT_HASH, parent["orderId"]).status_code == 400
+    assert client.order_cancel(MockClient.ACCOUNT_HASH, 1).status_code == 404
+
+def test_canceling_a_working_stop_leaves_the_position_open():
+    client = MockClient()
+    quote(client, 10.0)
+    parent, stop = place(client, buy_with_trailing_stop(0.07))
+    client.order_cancel(MockClient.ACCOUNT_HASH, stop["orderId"])
+    quote(client, 5.0)
+    assert (parent["status"], stop["status"]) == ("FILLED", "CANCELED")
+    assert client.positions()[SYMBOL]["quantity"] == 1
+
+def test_unsupported_order_types_are_rejected():
+    client = MockClient()
+    parent, _ = place(client, {"orderType": "LIMIT", "price": 9.0, "orderLegCollection": leg("BUY")})
+    assert parent["status"] == "REJECTED"
+
+def test_listing_nests_children_under_their_parent():
+    client = MockClient()
+    quote(client, 10.0)
+    parent, stop = place(client, buy_with_trailing_stop(0.07))
+    (listed,) = client.account_orders(MockClient.ACCOUNT_HASH, None, None).json()
+    assert listed["orderId"] == parent["orderId"]
+    assert [child["orderId"] for child in listed["childOrderStrategies"]] == [stop["orderId"]]
@@ -0,0 +1,92 @@
+import os
+from rich.console import Console
+from account import order, order_executer
+from account.order_store import OrderStore
+from account.order_tracker import OrderTracker
+from utils.mock_client import MockClient, MockResponse
+from utils.strategies import OrderIntent, StrategyRunner
+from utils.tick_bus import Tick
+
+SYMBOL = "SQQQ"
+
+def paper_account(monkeypatch):
+    """A mock broker, a fresh order store and a tracker following every order placed."""
+    store = OrderStore()
+    monkeypatch.setattr(order, "order_store", store)
+    monkeypatch.setattr(order_executer, "order_store", store)
+    monkeypatch.setattr(order, "console", Console(file=open(os.devnull, "w")))
+    monkeypatch.setattr(order, "log_order_payload_to_file", lambda *args, **kwargs: None)
+    monkeypatch.setattr(order_executer, "log_order_event", lambda side, price: None)
+    client = MockClient()
+    tracker = OrderTracker(client, MockClient.ACCOUNT_HASH, on_status_change=store.update_status,
+                           on_child_order=order.record_trailing_stop)
+    store.add_listener(lambda record: tracker.track(record.order_id))
+    monkeypatch.setattr(order_executer, "order_tracker", tracker)
+    client.engine.on_quote(SYMBOL, 9.99, 10.01, 10.0)
+    return client, store, tracker
+
+def execute(client, tracker, side, price):
+    order_executer.execute_intent(client, MockClient.ACCOUNT_HASH, OrderIntent("test", SYMBOL, side, price, side))
+    tracker.poll_once()
+
+def test_strategy_sell_cancels_the_trailing_stop(monkeypatch):
+    client, store, tracker = paper_account(monkeypatch)
+    execute(client, tracker, "buy", 10.0)
+    assert store.positions() == {SYMBOL: 1}
+    # The stop is recorded under the ID the broker gave it, whatever the parent's ID
+    buy, stop = store.snapshot()
+    assert stop.parent_id == buy.order_id
+    assert stop.order_id == client.orders[buy.order_id]["children"][0]["orderId"] != buy.order_id + 1
+
+    execute(client, tracker, "sell", 10.5)
+    # The price falls through the old stop: nothing is left to sell
+    client.engine.on_quote(SYMBOL, 8.99, 9.01, 9.0)
+    tracker.poll_once()
+
+    assert client.positions()[SYMBOL]["quantity"] == 0
+    assert store.positions() == {SYMBOL: 0}
+    assert [record.status for record in store.snapshot()] == ["Filled", "Canceled", "Filled"]
+    assert all(isinstance(record.order_id, int) for record in store.snapshot())
+
+def test_sell_after_the_stop_exit_is_skipped(monkeypatch):
+    client, store, tracker = paper_account(monkeypatch)
+    execute(client, tracker, "buy", 10.0)
+    client.engine.on_quote(SYMBOL, 8.99, 9.01, 9.0)
+    tracker.poll_once()
+    assert store.positions() == {SYMBOL: 0}
+
+    execute(client, tracker, "sell", 9.0)
+    assert client.positions()[SYMBOL]["quantity"] == 0
+    assert len(client.orders) == 2  # The buy and its stop only
+
+def test_buy_learns_its_stop_from_the_order_listing(monkeypatch):
+    client, store, tracker = paper_account(monkeypatch)
+    details = client.order_details
+    monkeypatch.setattr(client, "order_details", lambda *args: (_ for _ in ()).throw(AssertionError("order_details called")))
+    order_executer.execute_intent(client, MockClient.ACCOUNT_HASH, OrderIntent("test", SYMBOL, "buy", 10.0, "buy"))
+    # Placing the buy records only the buy; the stop appears with the tracker's next listing
+    assert [record.order_type for record in store.snapshot()] == ["Buy"]
+
+    # A sell right away has the tracker catch up first, so the stop is canceled and not left to sell again
+    monkeypatch.setattr(client, "order_details", details)
+    execute(client, tracker, "sell", 10.5)
+    assert [(record.order_type, record.status) for record in store.snapshot()] == [
+        ("Buy", "Filled"), ("Trailing Stop", "Canceled"), ("Sell", "Filled")]
+    assert client.positions()[SYMBOL]["quantity"] == 0
+
+def test_failed_buy_leaves_the_strategy_flat(monkeypatch):
+    client, store, tracker = paper_account(monkeypatch)
+    runner = StrategyRunner([{"name": "band_reversion"}], [SYMBOL])
+    below_band = Tick(SYMBOL, 9.0, 10.0, 10.5, 9.5, 0.0)
+
+    place = client.order_place
+    monkeypatch.setattr(client, "order_place", lambda account_hash, payload: MockResponse(500, {"error": "rejected"}))
+    order_executer.execute_intents(client, MockClient.ACCOUNT_HASH, runner, runner.on_tick(below_band))
+    assert runner.positions() == {SYMBOL: {"band_reversion": "flat"}}
+
+    # The next signal buys again instead of being taken for a repeat
+    monkeypatch.setattr(client, "order_place", place)
+    order_executer.execute_intents(client, MockClient.ACCOUNT_HASH, runner, runner.on_tick(below_band))
+    assert runner.positions() == {SYMBOL: {"band_reversion": "long"}}
+    tracker.poll_once()
+    assert [record.instruction for record in store.snapshot()] == ["BUY", "SELL"]
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from account import order_executer, order_store as order_store_module
+from account.order_store import OrderStore
+from utils.mock_client import MockClient
+
+def test_restart_resumes_orders_and_positions_from_the_journal(monkeypatch, tmp_path):
+    path = str(tmp_path / "orders.jsonl")
+    entered_at = datetime(2024, 8, 23, 14, 30, tzinfo=timezone.utc)
+    monkeypatch.setattr(order_store_module.time, "time", entered_at.timestamp)
+
+    before = OrderStore()
+    before.open_journal(path)
+    before.add(1000, "Buy", "BUY", "SQQQ", 1, 10.0)
+    before.add(1001, "Trailing Stop", "SELL", "SQQQ", 1, status="Awaiting Parent Order", parent_id=1000)
+    before.update_status(1000, "Filled")
+    before.update_status(1001, "Working")
+    before.add(1002, "Buy", "BUY", "TQQQ", 1, 50.0)
+    before.update_status(1002, "Canceled")
+
+    after = OrderStore()
+    assert after.restore(path) == 6
+    assert after.positions() == {"SQQQ": 1}
+    assert [record.order_id for record in after.open_orders(symbol="SQQQ", status="Working")] == [1001]
+    assert after.get(1002).status == "Canceled"
+
+    # Restored orders are tracked from the time they were placed, not from the restart
+    monkeypatch.setattr(order_executer, "order_store", after)
+    tracker = order_executer.create_order_tracker(MockClient(), MockClient.ACCOUNT_HASH)
+    assert [order["tracked_at"] for order in tracker.open_orders.values()] == [entered_at]
+
+    # The strategies resume long instead of buying again
+    runner = order_executer.create_strategy_runner([{"name": "band_reversion"}], ["SQQQ", "TQQQ"])
+    assert runner.positions() == {"SQQQ": {"band_reversion": "long"}, "TQQQ": {"band_reversion": "flat"}}
@@ -0,0 +1,53 @@
+from account.order_tracker import OrderTracker
+
+class Response:
+    def __init__(self, payload, ok=True):
+        self.payload = payload
+        self.ok = ok
+
+    def json(self):
+        return self.payload
+
+class ListingClient:
+    """Client whose account orders listing leaves out some orders that order_details knows."""
+
+    def __init__(self, listed, details):
+        self.listed = listed
+        self.details = details
+        self.detail_calls = []
+
+    def account_orders(self, account_hash, from_entered_time, to_entered_time, max_results=None, status=None):
+        return Response(self.listed)
+
+    def order_details(self, account_hash, order_id):
+        self.detail_calls.append(order_id)
+        status = self.details.get(order_id)
+        return Response({"orderId": order_id, "status": status}, ok=status is not None)
+
+def test_orders_missing_from_listing_are_fetched_by_details():
+    client = ListingClient(
+        listed=[{"orderId": 1001, "status": "WORKING"}],
+        details={"1000": "FILLED", "1001": "WORKING"},
+    )
+    changes = []
+    tracker = OrderTracker(client, "hash", on_status_change=lambda order_id, status: changes.append((order_id, status)))
+    tracker.track(1000)
+    tracker.track(1001)
+
+    assert tracker.poll_once() == 2
+    assert client.detail_calls == ["1000"]
+    assert sorted(changes) == [(1000, "Filled"), (1001, "Working")]
+    assert tracker.get_open_order_ids() == [1001]
+
+def test_child_orders_are_reported_once_from_the_listing():
+    stop = {"orderId": 900000, "status": "AWAITING_PARENT_ORDER"}
+    client = ListingClient(listed=[{"orderId": 1000, "status": "WORKING", "childOrderStrategies": [stop]}], details={})
+    children = []
+    tracker = OrderTracker(client, "hash", on_child_order=lambda parent_id, child: children.append((parent_id, child["orderId"])))
+    tracker.track(1000)
+
+    tracker.poll_once()
+    stop["status"] = "WORKING"
+    tracker.poll_once()
+    assert children == [(1000, 900000)]
+    assert client.detail_calls == []
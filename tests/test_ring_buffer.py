@@ -0,0 +1,39 @@
+import math
+import time
+import stream
+from utils.ring_buffer import TickRingBuffer, summarize_ticks
+
+def test_snapshot_stays_chronological_after_wrapping():
+    buffer = TickRingBuffer(capacity=4)
+    for index in range(6):
+        buffer.append(100.0 + index, 9.99, 10.01, 10.0 + index, 1, 1, 1, 1000 + index)
+
+    window = buffer.snapshot()
+    assert window.timestamp.tolist() == [102.0, 103.0, 104.0, 105.0]
+    assert buffer.snapshot(2).last.tolist() == [14.0, 15.0]
+    assert buffer.since(103.5).timestamp.tolist() == [104.0, 105.0]
+    assert not window.last.flags.writeable
+
+def test_summary_skips_missing_fields():
+    buffer = TickRingBuffer(capacity=8)
+    buffer.append(100.0, None, None, 10.0, None, None, None, None)
+    buffer.append(101.0, 9.98, 10.02, 10.2, 1, 1, 1, 5000)
+    buffer.append(102.0, 9.99, 10.01, 9.9, 1, 1, 1, 5300)
+
+    summary = summarize_ticks(buffer.snapshot())
+    assert summary["ticks"] == 3
+    assert summary["ticks_per_s"] == 1.5
+    assert math.isclose(summary["mean_spread"], 0.03)
+    assert summary["volume"] == 300
+    assert (summary["low"], summary["high"]) == (9.9, 10.2)
+    assert summarize_ticks(TickRingBuffer(capacity=2).snapshot()) == {"ticks": 0}
+
+def test_status_tape_reads_the_last_minutes_of_ticks(monkeypatch):
+    monkeypatch.setattr(stream.config, "BAR_TIME_SOURCE", "local")
+    stream.handle_content({"key": "TAPE", "1": 9.99, "2": 10.01, "3": 10.0, "8": 1000}, time.perf_counter())
+    stream.handle_content({"key": "TAPE", "1": 10.0, "2": 10.02, "3": 10.01, "8": 1100}, time.perf_counter())
+
+    tape = stream.get_tape("TAPE")
+    assert tape["ticks"] == 2
+    assert tape["volume"] == 100
+    assert stream.get_tape("UNSEEN") is None
@@ -0,0 +1,75 @@
+import json
+import stream
+
+def quote(symbol, last_price):
+    return json.dumps({"data": [{"service": "LEVELONE_EQUITIES", "content": [{"key": symbol, "3": last_price}]}]})
+
+def activity():
+    return json.dumps({"data": [{"service": "ACCT_ACTIVITY", "content": [{"key": "Account Activity"}]}]})
+
+def test_backlog_survives_malformed_frames_and_failing_listeners(monkeypatch):
+    def failing_listener(content):
+        raise RuntimeError("listener failed")
+
+    monkeypatch.setattr(stream, "account_activity_listeners", [failing_listener])
+    frames = [
+        (0.0, quote("BACKLOG", 10.0)),
+        (0.0, "[1]"),
+        (0.0, "not json"),
+        (0.0, json.dumps({"data": [1]})),
+        (0.0, activity()),
+        (0.0, quote("BACKLOG", 10.5)),
+    ]
+    stream.handle_backlog(frames)
+    assert stream.get_latest_data("BACKLOG")["Last Price"] == 10.5
+
+def test_handler_survives_malformed_frames():
+    stream.my_custom_handler("[1]")
+    stream.my_custom_handler(quote("HANDLER", 11.0))
+    assert stream.get_latest_data("HANDLER")["Last Price"] == 11.0
+
+def test_symbol_stays_gated_until_the_band_window_is_full(monkeypatch):
+    from utils.mock_client import MockClient
+
+    monkeypatch.setattr(stream.config, "MAX_LENGTH", 3)
+    monkeypatch.setitem(stream.stream_health, "subscribed_at", 0)
+    monkeypatch.setitem(stream.stream_health, "state", "stopped")
+    symbol = "WARMUP"
+
+    # The mock broker's price history has no candles, so nothing is backfilled
+    stream.backfill_symbols(MockClient(), [symbol])
+    assert stream.stream_health["state"] == "warming"
+
+    now_ms = int(stream.time.time()) * 1000
+    for second in range(4):
+        assert not stream.is_symbol_live(symbol)
+        content = {"key": symbol, "3": 10.0 + second / 100, "34": now_ms - (4 - second) * 1000}
+        stream.handle_content(content, 0.0)
+
+    # Four one-second ticks completed three bars: the window is full
+    assert stream.is_symbol_live(symbol)
+    assert stream.warmup_state([symbol]) == "live"
+
+def test_a_long_quiet_stretch_restarts_the_band_window(monkeypatch):
+    monkeypatch.setattr(stream.config, "MAX_LENGTH", 3)
+    monkeypatch.setattr(stream.config, "STREAM_STALE_AFTER", 120)
+    monkeypatch.setitem(stream.stream_health, "state", "live")
+    symbol = "QUIET"
+    now_ms = int(stream.time.time()) * 1000
+
+    def tick(seconds_ago, price):
+        stream.handle_content({"key": symbol, "3": price, "34": now_ms - seconds_ago * 1000}, 0.0)
+
+    for second in range(4):
+        tick(100 - second, 10.0 + second / 100)
+    assert stream.is_symbol_live(symbol)
+
+    # A silence longer than BAR_MAX_FILL bars is not filled with flat bars: the window starts over
+    resumed = 100 - 4 - stream.config.BAR_MAX_FILL - 1
+    tick(resumed, 10.5)
+    assert stream.window_bars[symbol] == 0
+    assert stream.get_band_engine(symbol).get_snapshot() == (None, None, None)
+    assert not stream.is_symbol_live(symbol)
+    for second in range(1, 4):
+        tick(resumed - second, 10.5)
+    assert stream.is_symbol_live(symbol)
@@ -0,0 +1,67 @@
+import os
+from datetime import datetime
+from utils.ring_buffer import TICK_COLUMNS
+from utils.tick_store import TickRecorder, TickStore, column_file, day_of
+
+START = datetime(2024, 8, 23, 10).timestamp()
+
+def tick(index):
+    return (START + index, index - 0.01, index + 0.01, float(index), 100, 100, 10, 1000 + index)
+
+def test_reopening_after_a_partial_flush_keeps_columns_aligned(tmp_path):
+    recorder = TickRecorder(root=str(tmp_path))
+    for index in range(8):
+        recorder.record("SQQQ", *tick(index))
+    recorder.flush()
+
+    # A crash mid-flush: two more rows reached the "last" column but no other one
+    directory = os.path.join(str(tmp_path), day_of(START), "SQQQ")
+    last_path = os.path.join(directory, column_file(*TICK_COLUMNS[3]))
+    with open(last_path, "ab") as column:
+        column.write(TickStore(str(tmp_path))._map(last_path, "float64", 2).tobytes())
+
+    # A new recorder (after the restart) appends behind the complete rows only
+    recorder = TickRecorder(root=str(tmp_path))
+    for index in range(8, 12):
+        recorder.record("SQQQ", *tick(index))
+    recorder.flush()
+
+    ticks = TickStore(str(tmp_path)).load("SQQQ", day_of(START))
+    assert len(ticks.timestamp) == 12
+    assert ticks.last.tolist() == [float(index) for index in range(12)]
+    assert (ticks.timestamp - START).tolist() == list(range(12))
+    assert {os.path.getsize(os.path.join(directory, column_file(name, dtype))) for name, dtype in TICK_COLUMNS} == {12 * 8}
+
+def test_range_queries_match_a_full_scan(monkeypatch, tmp_path):
+    from backtest import load_ticks_from_store
+    from utils import tick_store
+
+    # A small stride puts many index blocks into a few ticks; the ticks cross midnight
+    monkeypatch.setattr(tick_store, "INDEX_STRIDE", 4)
+    midnight = datetime(2024, 8, 24).timestamp()
+    timestamps = [midnight - 10 + index for index in range(20)]
+    recorder = TickRecorder(root=str(tmp_path))
+    for batch in (timestamps[:7], timestamps[7:]):
+        for timestamp in batch:
+            recorder.record("SQQQ", timestamp, 9.99, 10.01, 10.0, 1, 1, 1, 1000)
+        recorder.flush()
+
+    store = TickStore(str(tmp_path))
+    day = day_of(timestamps[0])
+    day_times = [timestamp for timestamp in timestamps if day_of(timestamp) == day]
+    assert os.path.getsize(os.path.join(str(tmp_path), day, "SQQQ", tick_store.INDEX_FILE)) == 3 * 8
+
+    # Boundaries on ticks (block starts included), between ticks and outside the day
+    boundaries = [day_times[0] - 5] + [t + offset for t in day_times for offset in (0, 0.5)] + [midnight + 5]
+    for start in boundaries:
+        for end in boundaries:
+            expected = [t for t in day_times if start <= t < end]
+            assert store.query("SQQQ", day, start, end).timestamp.tolist() == expected
+        assert store.query("SQQQ", day, start).timestamp.tolist() == [t for t in day_times if t >= start]
+
+    # A range across the day split is replayed from both days
+    start, end = midnight - 3.5, midnight + 2.5
+    windows = list(load_ticks_from_store([], root=str(tmp_path), start_time=start, end_time=end))
+    assert [window_day for _, window_day, _ in windows] == [day, day_of(midnight)]
+    replayed = [t for _, _, window in windows for t in window.timestamp.tolist()]
+    assert replayed == [t for t in timestamps if start <= t < end]
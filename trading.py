@@ -0,0 +1,89 @@
+import time
+from threading import Thread
+import config
+import stream
+from account import order_executer
+from account.order_store import open_order_journal, order_store
+from utils.async_log import configure_async_logging, log_writer
+from utils.ema import calculate_ema_and_bands
+from utils.indicators import get_indicator_values
+from utils.metrics import metrics, MetricsReporter
+from utils.status_server import start_status_server
+
+def start_trading(client, account_hash, symbols=None):
+    """Start the stream, order tracker and order executor in background threads.
+
+    This is everything the bot needs to trade; the GUI only adds panels on top of it.
+    `symbols` defaults to config.TICKER_SYMBOLS.
+    """
+    symbols = symbols or config.TICKER_SYMBOLS
+    # Route logging to the log file before anything is logged (the stream thread does the same)
+    configure_async_logging('stream_data.log')
+    # Pick up today's orders and positions from before a restart, so they are tracked again
+    open_order_journal()
+
+    # Start the stream in a separate thread
+    stream_thread = Thread(target=stream.start_stream, kwargs={"symbols": symbols, "client": client}, daemon=True)
+    stream_thread.start()
+
+    # Start polling active orders in a separate thread
+    order_executer.start_polling(client, account_hash)
+
+    # Start the order executor in a separate thread
+    order_executor_thread = Thread(
+        target=order_executer.run_order_executor,
+        kwargs={"symbols": symbols, "client": client, "account_hash": account_hash},
+        daemon=True,
+    )
+    order_executor_thread.start()
+
+    # Queue depths sampled with every metrics snapshot
+    metrics.gauge("log_queue_depth", log_writer.queue_depth)
+    metrics.gauge("log_dropped", lambda: log_writer.dropped)
+    metrics.gauge("open_orders", lambda: len(order_executer.order_tracker.get_open_order_ids())
+                  if order_executer.order_tracker else 0)
+    MetricsReporter(metrics).start()
+
+    if config.STATUS_SERVER_ENABLED:
+        start_status_server(collect_status)
+
+def collect_status():
+    """Return bands, indicators, ticks, positions, holdings, orders and internal counters as a JSON-serialisable dict."""
+    bands = {}
+    quotes = {}
+    for symbol in stream.get_symbols():
+        ema, upper_band, lower_band = calculate_ema_and_bands(symbol)
+        latest = quotes[symbol] = stream.get_latest_data(symbol) or {}
+        bands[symbol] = {
+            "last_price": latest.get("Last Price"),
+            "ema": ema,
+            "upper_band": upper_band,
+            "lower_band": lower_band,
+        }
+
+    # Every strategy alternates buy and sell, so its last intent tells whether it holds a position
+    runner = order_executer.strategy_runner
+    positions = runner.positions() if runner else {}
+
+    return {
+        "bands": bands,
+        "indicators": {symbol: get_indicator_values(symbol) for symbol in stream.get_symbols()},
+        "quotes": quotes,
+        "tape": {symbol: stream.get_tape(symbol) for symbol in stream.get_symbols()},  # Last X_MINUTES of ticks
+        "positions": positions,
+        "holdings": order_store.positions(),  # Net filled quantity per symbol
+        "orders": [record._asdict() for record in order_store.snapshot()],
+        "stream": stream.get_stream_health(),
+        "metrics": metrics.snapshot(),
+    }
+
+def run_headless(client, account_hash):
+    """Trade without the GUI until interrupted; state is served by the status endpoint."""
+    start_trading(client, account_hash)
+    if config.STATUS_SERVER_ENABLED:
+        print(f"Status available at http://{config.STATUS_HOST}:{config.STATUS_PORT}/status")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping.")
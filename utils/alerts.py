@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import deque
+import config
+
+class AlertLog:
+    """Ring buffer of alerts shared by the alert producers and the GUI alert panel.
+
+    Only the newest `capacity` alerts are kept. A band breach is recorded once when it starts;
+    while the price stays outside the same band, repeats only bump the count and time of that
+    entry. The breach ends (and the next one is recorded again) when `clear_breach` is called.
+    """
+
+    def __init__(self, capacity=config.ALERT_HISTORY_SIZE):
+        self.entries = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.breaches = {}  # symbol -> (side, entry) of the breach in progress
+        self.version = 0  # Incremented on every change, so readers can skip redraws
+        self.total = 0  # Alerts ever recorded, including the ones pushed out of the ring
+
+    def add(self, message, tag=None):
+        """Record a one-off alert (e.g. an order log line) and return its entry."""
+        entry = {"time": time.time(), "message": message, "tag": tag, "count": 1}
+        with self.lock:
+            self.entries.append(entry)
+            self.total += 1
+            self.version += 1
+        return entry
+
+    def breach(self, symbol, side, message, tag=None):
+        """Record a band breach unless the same breach is already in progress."""
+        with self.lock:
+            current = self.breaches.get(symbol)
+            if current and current[0] == side:
+                entry = current[1]
+                entry["count"] += 1
+                entry["last_time"] = time.time()
+                self.version += 1
+                return None
+
+            entry = {"time": time.time(), "message": message, "tag": tag, "count": 1}
+            self.entries.append(entry)
+            self.breaches[symbol] = (side, entry)
+            self.total += 1
+            self.version += 1
+            return entry
+
+    def clear_breach(self, symbol):
+        """The price is back inside the bands: the next breach is a new alert."""
+        with self.lock:
+            self.breaches.pop(symbol, None)
+
+    def window(self, count, offset=0):
+        """Return up to `count` entries ending `offset` entries before the newest, oldest first."""
+        with self.lock:
+            end = len(self.entries) - offset
+            start = max(0, end - count)
+            return [dict(self.entries[i]) for i in range(start, max(start, end))]
+
+    def __len__(self):
+        return len(self.entries)
+
+def format_alert(entry):
+    """Text of an alert panel line, with the repeat count of a lasting breach."""
+    if entry["count"] > 1:
+        return f"{entry['message']} (x{entry['count']}, last at {time.strftime('%H:%M:%S', time.localtime(entry['last_time']))})"
+    return entry["message"]
@@ -0,0 +1,196 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from functools import partial
+import config
+
+class AsyncLogWriter:
+    """Queue-backed file writer: callers enqueue, a background thread formats and writes in batches.
+
+    The queue is bounded. When it is full the overflow policy decides what happens:
+    "drop_oldest" discards the oldest queued entry, "drop_new" discards the new one and
+    "block" makes the caller wait. Dropped entries are counted in `dropped`.
+    Text can be passed ready-made or as a `render` callable, so expensive formatting such
+    as json.dumps runs on the writer thread instead of the caller's.
+    """
+
+    def __init__(self, max_queue=config.LOG_QUEUE_SIZE, overflow=config.LOG_OVERFLOW_POLICY,
+                 batch_size=config.LOG_BATCH_SIZE, flush_interval=config.LOG_FLUSH_INTERVAL):
+        if overflow not in ("drop_oldest", "drop_new", "block"):
+            raise ValueError(f"Unknown log overflow policy: {overflow}")
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.written = 0
+        self.files = {}  # path -> open file handle
+        self.listeners = {}  # path -> callbacks run after new text reaches the file
+        self.thread = None
+        self.stopped = False
+
+    def write(self, path, text=None, render=None):
+        """Queue `text` (or the result of `render()`) to be appended to `path`."""
+        with self.condition:
+            if len(self.queue) >= self.max_queue:
+                if self.overflow == "drop_new":
+                    self.dropped += 1
+                    return
+                if self.overflow == "drop_oldest":
+                    self.queue.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self.queue) >= self.max_queue and not self.stopped:
+                        self.condition.wait()
+            self.queue.append((path, text, render))
+            if self.thread is None:
+                self._start()
+            if len(self.queue) >= self.batch_size:
+                self.condition.notify_all()
+
+    def _start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                if len(self.queue) < self.batch_size and not self.stopped:
+                    self.condition.wait(self.flush_interval)
+                batch = [self.queue.popleft() for _ in range(min(len(self.queue), self.batch_size))]
+                self.condition.notify_all()  # Wake writers blocked on a full queue
+                stopped = self.stopped and not self.queue
+
+            if batch:
+                self._write_batch(batch)
+            if stopped:
+                return
+
+    def _write_batch(self, batch):
+        touched = set()
+        for path, text, render in batch:
+            try:
+                if render is not None:
+                    text = render()
+                log_file = self.files.get(path)
+                if log_file is None:
+                    folder = os.path.dirname(path)
+                    if folder:
+                        os.makedirs(folder, exist_ok=True)
+                    # Keep a bounded number of files open (the payload tree rolls over daily)
+                    if len(self.files) >= 32:
+                        self._close_files()
+                    log_file = self.files[path] = open(path, "a")
+                log_file.write(text)
+                touched.add(path)
+                self.written += 1
+            except Exception as e:
+                print(f"Async log write to {path} failed: {e}")
+
+        for path in touched:
+            self.files[path].flush()
+            for callback in self.listeners.get(path, ()):
+                callback()
+
+    def add_listener(self, path, callback):
+        """Call `callback()` on the writer thread whenever a batch has been written to `path`."""
+        self.listeners.setdefault(path, []).append(callback)
+
+    def _close_files(self):
+        for log_file in self.files.values():
+            log_file.close()
+        self.files = {}
+
+    def stop(self):
+        """Write everything still queued and stop the background thread."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+            thread = self.thread
+        if thread is not None:
+            thread.join()
+        self._close_files()
+
+    def queue_depth(self):
+        return len(self.queue)
+
+class AsyncLogHandler(logging.Handler):
+    """logging handler that formats and writes records on the AsyncLogWriter thread."""
+
+    def __init__(self, path, writer=None):
+        super().__init__()
+        self.path = path
+        self.writer = writer or log_writer
+
+    def emit(self, record):
+        self.writer.write(self.path, render=partial(self._render, record))
+
+    def _render(self, record):
+        return self.format(record) + "\n"
+
+class LogTail:
+    """Follows a growing log file without reopening it on a timer.
+
+    The file stays open and only the bytes appended since the last read are returned.
+    `follow` wakes immediately when the shared log writer writes to the file and falls back to
+    a cheap size check every `interval` seconds for writers in other processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.position = 0
+        self.changed = threading.Event()
+
+    def read_new(self):
+        """Return the complete lines appended since the last call."""
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            return []
+        if self.file is None or size < self.position:
+            # First read, or the file was truncated or replaced: start over
+            if self.file is not None:
+                self.file.close()
+            self.file = open(self.path, "rb")
+            self.position = 0
+        if size == self.position:
+            return []
+
+        self.file.seek(self.position)
+        data = self.file.read(size - self.position)
+        # Leave a partially written last line for the next read
+        complete = data.rfind(b"\n") + 1
+        self.position += complete
+        return data[:complete].decode("utf-8", errors="replace").splitlines()
+
+    def follow(self, callback, interval=config.ORDER_LOG_POLL_INTERVAL, writer=None):
+        """Call `callback(lines)` with new lines as they are appended (runs forever)."""
+        (writer or log_writer).add_listener(self.path, self.changed.set)
+        while True:
+            lines = self.read_new()
+            if lines:
+                callback(lines)
+            self.changed.wait(interval)
+            self.changed.clear()
+
+# Shared writer for stream_data.log, orders.log and the Logs/OrderPayloads tree
+log_writer = AsyncLogWriter()
+atexit.register(log_writer.stop)
+
+def configure_async_logging(path, level=logging.INFO, fmt='%(asctime)s - %(message)s'):
+    """Route the root logger to `path` through the shared asynchronous writer."""
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers:
+        if isinstance(handler, AsyncLogHandler) and handler.path == path:
+            return handler
+    handler = AsyncLogHandler(path)
+    handler.setFormatter(logging.Formatter(fmt))
+    root_logger.addHandler(handler)
+    root_logger.setLevel(level)
+    return handler
@@ -0,0 +1,125 @@
+from collections import deque, namedtuple
+from threading import Lock
+import config
+
+# One completed bar. `start` is the epoch second the bar begins at; `volume` is the traded
+# volume inside the bar, derived from the cumulative Total Volume field.
+Bar = namedtuple("Bar", ["start", "open", "high", "low", "close", "volume", "vwap", "ticks"])
+
+def window_bars(x_minutes, interval=config.BAND_BAR_INTERVAL):
+    """Number of bars of `interval` seconds covering `x_minutes` of time."""
+    return max(1, int(x_minutes * 60 // interval))
+
+class BarAggregator:
+    """Builds fixed-interval OHLCV bars with VWAP incrementally from a tick stream.
+
+    A bar is emitted when the first tick of a later interval arrives. Intervals without ticks
+    are emitted as flat bars at the previous close with zero volume, so a window of N bars
+    always spans N intervals of time. A gap of more than `max_fill` intervals is not filled;
+    `skipped` then holds its length until the next bar boundary, so the caller can restart
+    its windows instead of trading on synthetic bars.
+    """
+
+    def __init__(self, interval, max_fill=config.BAR_MAX_FILL):
+        self.interval = interval
+        self.max_fill = max_fill
+        self.start = None
+        self.open = self.high = self.low = self.close = None
+        self.volume = 0
+        self.price_volume = 0.0
+        self.ticks = 0
+        self.last_total_volume = None
+        self.skipped = 0  # Empty intervals left unfilled before the bar in progress
+
+    def update(self, timestamp, price, total_volume=None):
+        """Add a tick and return the bars it completed (usually none), oldest first."""
+        volume = 0
+        if total_volume is not None:
+            # Total Volume is cumulative for the day; a drop means a new session started
+            if self.last_total_volume is not None and total_volume >= self.last_total_volume:
+                volume = total_volume - self.last_total_volume
+            self.last_total_volume = total_volume
+
+        start = timestamp - timestamp % self.interval
+        completed = []
+        if self.start is None:
+            self._open(start, price)
+        elif start > self.start:
+            completed.append(self._bar())
+            close = self.close
+            missing = int(round((start - self.start) / self.interval)) - 1
+            self.skipped = missing if missing > self.max_fill else 0
+            for index in range(missing if self.skipped else 0, missing):
+                fill_start = self.start + (index + 1) * self.interval
+                completed.append(Bar(fill_start, close, close, close, close, 0, close, 0))
+            self._open(start, price)
+        # Ticks stamped before the current bar (out of order) are folded into it
+
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+        self.price_volume += price * volume
+        self.ticks += 1
+        return completed
+
+    def _open(self, start, price):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0
+        self.price_volume = 0.0
+        self.ticks = 0
+
+    def _bar(self):
+        vwap = self.price_volume / self.volume if self.volume else self.close
+        return Bar(self.start, self.open, self.high, self.low, self.close, self.volume, vwap, self.ticks)
+
+    def current(self):
+        """Return the bar in progress, or None before the first tick."""
+        return self._bar() if self.start is not None else None
+
+    def reset(self):
+        """Drop the bar in progress so the next tick starts fresh (no gap fill), e.g. after a reconnect."""
+        self.start = None
+        self.last_total_volume = None
+
+class BarSeries:
+    """Bars of several intervals for one symbol, keeping the last `history` completed bars of each."""
+
+    def __init__(self, intervals=config.BAR_INTERVALS, history=config.BAR_HISTORY):
+        intervals = sorted(set(intervals) | {config.BAND_BAR_INTERVAL})
+        self.aggregators = {interval: BarAggregator(interval) for interval in intervals}
+        self.history = {interval: deque(maxlen=history) for interval in intervals}
+        self.lock = Lock()
+
+    def update(self, timestamp, price, total_volume=None):
+        """Add a tick to every interval and return {interval: completed bars}."""
+        completed = {}
+        with self.lock:
+            for interval, aggregator in self.aggregators.items():
+                bars = aggregator.update(timestamp, price, total_volume)
+                if bars:
+                    self.history[interval].extend(bars)
+                    completed[interval] = bars
+        return completed
+
+    def reset(self):
+        """Restart every interval at the next tick; completed bars are kept."""
+        with self.lock:
+            for aggregator in self.aggregators.values():
+                aggregator.reset()
+
+    def skipped(self, interval):
+        """Empty intervals of `interval` left unfilled before its bar in progress (0 after short gaps)."""
+        return self.aggregators[interval].skipped
+
+    def bars(self, interval, count=None, include_current=False):
+        """Return the last `count` completed bars of an interval (all kept bars by default)."""
+        with self.lock:
+            bars = list(self.history[interval])
+            current = self.aggregators[interval].current() if include_current else None
+        if current is not None:
+            bars.append(current)
+        return bars[-count:] if count else bars
@@ -0,0 +1,30 @@
+import json
+import config
+
+# orjson and msgspec are optional: either decodes stream messages several times faster than
+# the standard library. config.JSON_DECODER picks one explicitly; "auto" takes the first installed.
+DECODERS = ("orjson", "msgspec", "json")
+
+def load_decoder(name=config.JSON_DECODER):
+    """Return (name, decode function, decode error types) for a decoder name or "auto"."""
+    candidates = DECODERS if name == "auto" else (name,)
+    for candidate in candidates:
+        if candidate == "orjson":
+            try:
+                import orjson
+            except ImportError:
+                continue
+            return "orjson", orjson.loads, (orjson.JSONDecodeError,)
+        if candidate == "msgspec":
+            try:
+                import msgspec
+            except ImportError:
+                continue
+            return "msgspec", msgspec.json.Decoder().decode, (msgspec.DecodeError,)
+        if candidate == "json":
+            return "json", json.loads, (json.JSONDecodeError,)
+        raise ValueError(f"Unknown JSON decoder: {candidate}")
+    raise ImportError(f"JSON decoder {name} is not installed")
+
+# Decoder shared by the stream handler and the log replay in backtest.py
+DECODER_NAME, decode_json, DECODE_ERRORS = load_decoder()
@@ -1,6 +1,122 @@
-import numpy as np
-from stream import get_last_x_minutes_data
+import math
+from collections import deque
+from threading import Lock
 import config
+from utils.fields import require_fields
+
+# The band engine only needs the last traded price
+require_fields("band engine", "Last Price")
+
+class BandEngine:
+    """Incrementally maintain the EMA and standard deviation bands over a fixed-length price window."""
+
+    def __init__(self, max_length=config.MAX_LENGTH, multiplier=config.STD_DEVIATION_MULTIPLIER):
+        self.max_length = max_length
+        self.multiplier = multiplier
+
+        # Per-sample decay so the oldest sample of a full window weighs e^-1 of the newest one
+        self.decay = math.exp(-1.0 / (max_length - 1)) if max_length > 1 else 0.0
+        # Weight a sample carries at the moment it falls out of the window
+        self.evict_weight = self.decay ** max_length
+
+        self.prices = deque()
+        self.weighted_sum = 0.0
+        self.weight_total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean (Welford)
+        self.updates_since_rebuild = 0
+
+        self.lock = Lock()
+        self.snapshot = (None, None, None)
+
+    def update(self, price):
+        """Add a new price to the window, evicting the oldest one once the window is full."""
+        price = float(price)
+        with self.lock:
+            if len(self.prices) == self.max_length:
+                old_price = self.prices.popleft()
+                self.prices.append(price)
+
+                self.weighted_sum = self.weighted_sum * self.decay + price - old_price * self.evict_weight
+                self.weight_total = self.weight_total * self.decay + 1.0 - self.evict_weight
+
+                # Replace the evicted sample in the running mean/variance
+                old_mean = self.mean
+                old_m2 = self.m2
+                self.mean += (price - old_price) / self.max_length
+                self.m2 += (price - old_price) * (price - self.mean + old_price - old_mean)
+                # The window turned (nearly) flat: the remaining m2 is rounding residue, rebuild below
+                floor = self.max_length * (1e-6 * self.mean) ** 2
+                if self.m2 < 1e-8 * old_m2 or self.m2 < floor <= old_m2:
+                    self.updates_since_rebuild = self.max_length
+            else:
+                self.prices.append(price)
+
+                self.weighted_sum = self.weighted_sum * self.decay + price
+                self.weight_total = self.weight_total * self.decay + 1.0
+
+                delta = price - self.mean
+                self.mean += delta / len(self.prices)
+                self.m2 += delta * (price - self.mean)
+
+            # Periodically rebuild from the window so floating point drift cannot accumulate
+            self.updates_since_rebuild += 1
+            if self.updates_since_rebuild >= self.max_length:
+                self._rebuild()
+
+            self.snapshot = self._build_snapshot()
+
+    def _rebuild(self):
+        """Recompute all running sums exactly from the prices currently in the window."""
+        weighted_sum = 0.0
+        weight_total = 0.0
+        for price in self.prices:
+            weighted_sum = weighted_sum * self.decay + price
+            weight_total = weight_total * self.decay + 1.0
+        self.weighted_sum = weighted_sum
+        self.weight_total = weight_total
+
+        count = len(self.prices)
+        self.mean = sum(self.prices) / count if count else 0.0
+        self.m2 = sum((price - self.mean) ** 2 for price in self.prices)
+        self.updates_since_rebuild = 0
+
+    def _build_snapshot(self):
+        count = len(self.prices)
+        if count == 0:
+            return None, None, None
+
+        ema = self.weighted_sum / self.weight_total
+        std_dev = math.sqrt(max(self.m2, 0.0) / count)
+        upper_band, lower_band = calculate_upper_lower_bands(ema, std_dev, self.multiplier)
+        return ema, upper_band, lower_band
+
+    def get_snapshot(self):
+        """Return the latest (ema, upper_band, lower_band) without recomputing anything."""
+        return self.snapshot
+
+# Per-symbol band indicators (config.BAND_INDICATOR), fed every completed band bar by stream.handle_content
+band_engines = {}
+band_engines_lock = Lock()
+
+def get_band_engine(symbol):
+    """Return the band indicator for a symbol, creating it on first use."""
+    engine = band_engines.get(symbol)
+    if engine is None:
+        from utils.indicators import create_band_indicator
+        with band_engines_lock:
+            engine = band_engines.setdefault(symbol, create_band_indicator())
+    return engine
+
+def seed_band_engine(symbol, bars):
+    """Replace a symbol's band indicator with one warmed up on `bars` (e.g. backfilled history)."""
+    from utils.indicators import create_band_indicator
+    engine = create_band_indicator()
+    for bar in bars:
+        engine.update(bar)
+    with band_engines_lock:
+        band_engines[symbol] = engine
+    return engine
 
 def calculate_ema(prices):
     """Calculate Exponential Moving Average (EMA) with a period equal to the length of the deque."""
@@ -9,6 +125,7 @@ def calculate_ema(prices):
     if not prices or period == 0:
         return None
 
+    import numpy as np
     prices = np.array(prices)
     weights = np.exp(np.linspace(-1., 0., period))
     weights /= weights.sum()
@@ -22,32 +139,21 @@ def calculate_std_deviation(prices):
     if not prices:
         return None
 
+    import numpy as np
     return np.std(prices)
 
-def calculate_upper_lower_bands(ema, std_dev):
+def calculate_upper_lower_bands(ema, std_dev, multiplier=config.STD_DEVIATION_MULTIPLIER):
     """Calculate the upper and lower bands based on the EMA and standard deviation."""
     if ema is None or std_dev is None:
         return None, None
-    
-    upper_band = ema + (config.STD_DEVIATION_MULTIPLIER * std_dev)
-    lower_band = ema - (config.STD_DEVIATION_MULTIPLIER * std_dev)
-    return upper_band, lower_band
-
-def calculate_ema_and_bands():
-    """Fetch the latest data and calculate EMA and upper/lower bands."""
-    # Fetch the last X minutes of data
-    data = get_last_x_minutes_data()
-
-    # Extract the 'Last Price' field
-    prices = [entry['Last Price'] for entry in data if entry.get('Last Price') is not None]
 
-    # Calculate EMA with dynamic period based on deque length
-    ema = calculate_ema(prices)
-
-    # Calculate standard deviation
-    std_dev = calculate_std_deviation(prices)
-
-    # Calculate upper and lower bands
-    upper_band, lower_band = calculate_upper_lower_bands(ema, std_dev)
+    upper_band = ema + (multiplier * std_dev)
+    lower_band = ema - (multiplier * std_dev)
+    return upper_band, lower_band
 
-    return ema, upper_band, lower_band
+def calculate_ema_and_bands(symbol=config.TICKER_SYMBOL):
+    """Return the latest EMA and upper/lower bands for a symbol."""
+    engine = band_engines.get(symbol)
+    if engine is None:
+        return None, None, None
+    return engine.get_snapshot()
@@ -0,0 +1,55 @@
+from threading import Lock
+import config
+
+# Field name -> LEVELONE_EQUITIES field number, e.g. "Last Price" -> 3
+FIELD_NUMBERS = {field_name: int(field_key) for field_key, field_name in config.FIELD_MAPPING.items()}
+
+# Consumer name -> set of field names it reads
+field_requirements = {}
+field_requirements_lock = Lock()
+
+def require_fields(consumer, *field_names):
+    """Declare the LEVELONE fields a consumer reads so the stream subscribes to them."""
+    for field_name in field_names:
+        if field_name not in FIELD_NUMBERS:
+            raise ValueError(f"Unknown LEVELONE_EQUITIES field: {field_name}")
+
+    with field_requirements_lock:
+        field_requirements.setdefault(consumer, set()).update(field_names)
+
+def get_required_field_numbers():
+    """Return the sorted field numbers needed by all registered consumers."""
+    with field_requirements_lock:
+        field_names = set().union(*field_requirements.values())
+    return sorted(FIELD_NUMBERS[field_name] for field_name in field_names)
+
+class FieldLayout:
+    """Maps the subscribed LEVELONE fields onto compact integer column indices."""
+
+    def __init__(self, field_numbers):
+        self.field_numbers = tuple(field_numbers)
+        self.field_names = tuple(config.FIELD_MAPPING[str(number)] for number in self.field_numbers)
+        # (message key, column index) pairs walked by the stream handler
+        self.key_columns = tuple((str(number), column) for column, number in enumerate(self.field_numbers))
+        # Message key -> column, for walking only the keys a message actually carries
+        self.key_to_column = dict(self.key_columns)
+        self.columns = {field_name: column for column, field_name in enumerate(self.field_names)}
+
+    def column(self, field_name):
+        """Return the column index of a subscribed field."""
+        return self.columns[field_name]
+
+    def subscription(self):
+        """Return the comma-separated field list for a LEVELONE_EQUITIES subscription."""
+        return ",".join(key for key, _ in self.key_columns)
+
+    def to_dict(self, row):
+        """Convert a row of column values into a {field name: value} dictionary."""
+        return dict(zip(self.field_names, row))
+
+    def __len__(self):
+        return len(self.field_numbers)
+
+def build_field_layout():
+    """Build the field layout for the union of all declared field requirements."""
+    return FieldLayout(get_required_field_numbers())
@@ -0,0 +1,58 @@
+import threading
+from collections import deque
+import config
+
+class FrameQueue:
+    """Bounded hand-off of raw stream frames from the websocket callback to the processing thread.
+
+    The receive side only appends (received_at, frame); decoding and everything after it runs
+    on the consumer. When the queue is full the policy decides what happens: "block" makes
+    the websocket reader wait (backpressure), "drop_oldest" and "conflate" discard the oldest
+    frame. With "conflate" the consumer also merges the quotes of a backlog per symbol (see
+    stream.handle_backlog). Discarded frames are counted in `dropped`.
+    """
+
+    POLICIES = ("block", "drop_oldest", "conflate")
+
+    def __init__(self, max_frames=config.STREAM_QUEUE_SIZE, policy=config.STREAM_QUEUE_POLICY):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown stream queue policy: {policy}")
+        self.max_frames = max_frames
+        self.policy = policy
+        self.frames = deque()
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.high_water = 0  # Deepest the queue has been
+        self.closed = False
+
+    def put(self, received_at, frame):
+        with self.condition:
+            if len(self.frames) >= self.max_frames:
+                if self.policy == "block":
+                    while len(self.frames) >= self.max_frames and not self.closed:
+                        self.condition.wait()
+                else:
+                    self.frames.popleft()
+                    self.dropped += 1
+            self.frames.append((received_at, frame))
+            if len(self.frames) > self.high_water:
+                self.high_water = len(self.frames)
+            self.condition.notify_all()
+
+    def get_batch(self, timeout=None):
+        """Block until frames are queued and return all of them, oldest first (empty on timeout)."""
+        with self.condition:
+            if not self.frames and not self.closed:
+                self.condition.wait(timeout)
+            batch = list(self.frames)
+            self.frames.clear()
+            self.condition.notify_all()  # Wake a receiver blocked on a full queue
+            return batch
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self):
+        return len(self.frames)
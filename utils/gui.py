@@ -1,50 +1,97 @@
 import tkinter as tk
 from tkinter import ttk
-from threading import Thread
+from threading import Thread, Lock
+import datetime
+import json
 import time
-import os
-from account import order_executer
-from stream import get_last_x_minutes_data
-from utils.ema import calculate_ema_and_bands
-from account.order_executer import get_active_orders, poll_active_orders, start_polling
-
-class RedirectText:
-    def __init__(self, text_widget):
-        self.output = text_widget
-
-    def write(self, string):
-        self.output.insert(tk.END, string)
-        self.output.see(tk.END)  # Automatically scroll to the end
-
-    def flush(self):
-        pass  # This is needed to support the flush method of sys.stdout
-
-def update_live_data_table(tree, data, existing_items):
-    """Update the live data table with the latest ticker data."""
-    for key, value in data.items():
-        if key in existing_items:
-            # Update existing item only if the value has changed
-            if tree.item(existing_items[key], "values")[1] != value:
-                tree.item(existing_items[key], values=(key, value))
-        else:
-            # Insert new item if it's not already in the tree
-            item_id = tree.insert("", "end", values=(key, value))
-            existing_items[key] = item_id
-
-def update_active_orders_panel(active_orders_tree):
-    """Update the active orders panel with the latest active orders info."""
-    while True:
-        active_orders = get_active_orders()
-
-        # Clear the tree view
-        for row in active_orders_tree.get_children():
-            active_orders_tree.delete(row)
-
-        # Insert active orders details
-        for order in active_orders:
-            active_orders_tree.insert("", "end", values=(order["order_type"], order["ticker"], order["price"], order["status"]))
-        
-        time.sleep(1)  # Refresh every second
+import urllib.request
+import config
+from stream import get_latest_data
+from trading import start_trading
+from utils.alerts import AlertLog, format_alert
+from utils.async_log import LogTail
+from utils.fields import require_fields
+from utils.strategies import band_breach
+from utils.tick_bus import tick_bus
+from account.order_store import order_store
+
+# Fields shown in the live data table
+LIVE_DATA_FIELDS = (
+    "Bid Price", "Ask Price", "Last Price", "Bid Size", "Ask Size", "Last Size", "Total Volume",
+    "High Price", "Low Price", "Open Price", "Close Price", "Net Change", "Net Percent Change",
+    "Mark Price", "Quote Time", "Trade Time",
+)
+require_fields("gui live data", *LIVE_DATA_FIELDS)
+
+class GuiState:
+    """State published by worker threads and picked up by the renderer on the Tk main loop.
+
+    Worker threads never touch widgets. Publishing overwrites the pending value of a symbol,
+    so however many ticks arrive between two frames, the renderer applies only the latest.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.quotes = {}  # symbol -> latest data dict
+        self.bands = {}  # symbol -> (ema, upper band, lower band, last price)
+        self.orders = None  # latest orders snapshot, None when unchanged
+        self.alert_log = AlertLog()  # Bounded and de-duplicated, read by the alert panel
+
+    def publish_quote(self, symbol, data):
+        with self.lock:
+            self.quotes[symbol] = data
+
+    def publish_bands(self, symbol, ema, upper_band, lower_band, last_price):
+        with self.lock:
+            self.bands[symbol] = (ema, upper_band, lower_band, last_price)
+
+    def publish_orders(self, orders):
+        with self.lock:
+            self.orders = orders
+
+    def take(self):
+        """Return and clear everything published since the last call."""
+        with self.lock:
+            pending = (self.quotes, self.bands, self.orders)
+            self.quotes, self.bands, self.orders = {}, {}, None
+        return pending
+
+class TreeTable:
+    """Keeps a Treeview in sync with keyed rows, touching only rows whose values or tags changed."""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.items = {}  # row key -> (item id, values, tags)
+
+    def apply(self, rows, remove_missing=True):
+        """Apply (key, values, tags) rows; rows not given are deleted when remove_missing is set."""
+        seen = set()
+        for index, (key, values, tags) in enumerate(rows):
+            seen.add(key)
+            entry = self.items.get(key)
+            if entry is None:
+                item_id = self.tree.insert("", index if remove_missing else "end", values=values, tags=tags)
+                self.items[key] = (item_id, values, tags)
+            elif entry[1] != values or entry[2] != tags:
+                self.tree.item(entry[0], values=values, tags=tags)
+                self.items[key] = (entry[0], values, tags)
+
+        if remove_missing:
+            for key in [key for key in self.items if key not in seen]:
+                self.tree.delete(self.items.pop(key)[0])
+
+def live_data_rows(symbol, data):
+    """Rows of the live data table for one symbol."""
+    # Prefix the fields with the symbol when watching more than one ticker
+    prefix = f"{symbol} " if len(config.TICKER_SYMBOLS) > 1 else ""
+    return [(f"{prefix}{field}", (f"{prefix}{field}", value), ()) for field, value in data.items()]
+
+def active_order_rows(orders):
+    """Rows of the active orders table, keyed by order ID (or position for orders without one)."""
+    return [
+        (order.get("order_id") or f"#{index}", (order["order_type"], order["ticker"], order["price"], order["status"]), ())
+        for index, order in enumerate(orders)
+    ]
 
 def get_color_based_on_proximity(last_price, lower_band, upper_band, ema):
     """Return a color tag based on the proximity of the last price to the bands."""
@@ -80,100 +127,191 @@ def get_color_based_on_proximity(last_price, lower_band, upper_band, ema):
         else:
             return "normal"
 
-def update_ema_table(ema_tree, ema, upper_band, lower_band, last_price):
-    """Update the EMA table with the latest values and apply color coding."""
-    for row in ema_tree.get_children():
-        ema_tree.delete(row)
-
-    # Insert the EMA and bounds data in the desired order
-    ema_tree.insert("", "end", values=("EMA", ema), tags=("black",))
-
-    # Always color the Upper Band in the deepest red
-    ema_tree.insert("", "end", values=("Upper Band", upper_band), tags=("deep_red",))
-
-    # Determine the color for the Last Price based on proximity and the EMA
-    color_tag = get_color_based_on_proximity(last_price, lower_band, upper_band, ema)
-    ema_tree.insert("", "end", values=("Last Price", last_price), tags=(color_tag,))
-
-    # Always color the Lower Band in the deepest green
-    ema_tree.insert("", "end", values=("Lower Band", lower_band), tags=("deep_green",))
-
-def run_stream(tree, start_stream):
-    """Run the stream and update the live data table."""
-    existing_items = {}  # Keep track of inserted items
+def ema_rows(bands):
+    """Rows of the EMA table for every symbol, with color coding."""
+    rows = []
+    for symbol, (ema, upper_band, lower_band, last_price) in sorted(bands.items()):
+        # Prefix the metrics with the symbol when watching more than one ticker
+        prefix = f"{symbol} " if len(bands) > 1 else ""
+
+        # Determine the color for the Last Price based on proximity and the EMA
+        color_tag = get_color_based_on_proximity(last_price, lower_band, upper_band, ema)
+
+        # The EMA in black, the Upper Band always in the deepest red and the Lower Band in the deepest green
+        rows.append((f"{prefix}EMA", (f"{prefix}EMA", ema), ("black",)))
+        rows.append((f"{prefix}Upper Band", (f"{prefix}Upper Band", upper_band), ("deep_red",)))
+        rows.append((f"{prefix}Last Price", (f"{prefix}Last Price", last_price), (color_tag,)))
+        rows.append((f"{prefix}Lower Band", (f"{prefix}Lower Band", lower_band), ("deep_green",)))
+    return rows
+
+def check_band_alert(alert_log, symbol, last_price, upper_band, lower_band):
+    """Record an alert when the price leaves the bands; a lasting breach stays a single alert."""
+    # Generate the current timestamp
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    breach = band_breach(last_price, upper_band, lower_band)
+    if breach == "sell":
+        alert_log.breach(symbol, "sell", f"{timestamp} - SELL ALERT: {symbol} last price {last_price} is above the upper band {upper_band}!", "alert-sell")
+    elif breach == "buy":
+        alert_log.breach(symbol, "buy", f"{timestamp} - BUY ALERT: {symbol} last price {last_price} is below the lower band {lower_band}!", "alert-buy")
+    else:
+        alert_log.clear_breach(symbol)
+
+class AlertPanel:
+    """Shows a fixed window of the alert log in a Text widget.
+
+    The window follows the newest alerts. Scrolling up past the first line pages older alerts
+    in from the log; scrolling down past the last line pages back towards the newest.
+    Only lines whose text changed are rewritten.
+    """
+
+    def __init__(self, text_widget, alert_log, lines=config.ALERT_PANEL_LINES):
+        self.text = text_widget
+        self.alert_log = alert_log
+        self.lines = lines
+        self.offset = 0  # Alerts between the newest one and the bottom of the window
+        self.rendered = []  # (text, tag) of the lines on screen
+        self.version = None
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<Prior>", "<Next>"):
+            self.text.bind(sequence, self.on_scroll, add="+")
+
+    def on_scroll(self, event):
+        up = event.num == 4 or event.keysym == "Prior" or getattr(event, "delta", 0) > 0
+        top, bottom = self.text.yview()
+        step = max(1, self.lines // 2)
+        if up and top <= 0.0 and self.offset + self.lines < len(self.alert_log):
+            self.offset += step
+            self.render(force=True)
+            self.text.yview_moveto(step / self.lines)
+        elif not up and bottom >= 1.0 and self.offset:
+            self.offset = max(0, self.offset - step)
+            self.render(force=True)
+
+    def render(self, force=False):
+        if self.alert_log.version == self.version and not force:
+            return
+        self.version = self.alert_log.version
+        lines = [(format_alert(entry), entry["tag"]) for entry in self.alert_log.window(self.lines, self.offset)]
+
+        for index, (text, tag) in enumerate(lines):
+            if index < len(self.rendered):
+                if self.rendered[index] != (text, tag):
+                    self.text.delete(f"{index + 1}.0", f"{index + 1}.end")
+                    self.text.insert(f"{index + 1}.0", text, tag or ())
+            else:
+                self.text.insert(tk.END, text + "\n", tag or ())
+        if len(self.rendered) > len(lines):
+            self.text.delete(f"{len(lines) + 1}.0", tk.END)
+        self.rendered = lines
+
+        if self.offset == 0:
+            self.text.see(tk.END)  # Follow the newest alerts
+
+class GuiRenderer:
+    """Applies the published state to the widgets from the Tk main loop, at most once per interval."""
+
+    def __init__(self, root, state, live_data_tree, ema_tree, active_orders_tree, alert_text,
+                 interval=config.GUI_MIN_REFRESH_INTERVAL):
+        self.root = root
+        self.state = state
+        self.live_data_table = TreeTable(live_data_tree)
+        self.ema_table = TreeTable(ema_tree)
+        self.active_orders_table = TreeTable(active_orders_tree)
+        self.alert_panel = AlertPanel(alert_text, state.alert_log)
+        self.interval_ms = max(1, int(interval * 1000))
+        self.bands = {}  # Latest bands of every symbol seen so far
+
+    def start(self):
+        self.root.after(0, self.render)
+
+    def render(self):
+        quotes, bands, orders = self.state.take()
+
+        for symbol, data in quotes.items():
+            self.live_data_table.apply(live_data_rows(symbol, data), remove_missing=False)
+
+        if bands:
+            self.bands.update(bands)
+            self.ema_table.apply(ema_rows(self.bands))
+
+        if orders is not None:
+            self.active_orders_table.apply(active_order_rows(orders))
+
+        self.alert_panel.render()
+
+        self.root.after(self.interval_ms, self.render)
+
+def monitor_prices(state):
+    """Publish quotes, bands and alerts for every tick (coalesced per symbol while the GUI catches up)."""
+    subscription = tick_bus.subscribe(coalesce=True)
 
-    def stream_update_handler():
-        while True:
-            data = get_last_x_minutes_data()
+    while True:
+        for tick in subscription.get():
+            data = get_latest_data(tick.symbol)
             if data:
-                update_live_data_table(tree, data[-1], existing_items)
-            time.sleep(1)  # Update the table every second
-
-    # Start the stream in a separate thread
-    stream_thread = Thread(target=start_stream)
-    stream_thread.start()
+                state.publish_quote(tick.symbol, data)
+            if tick.ema is None:
+                continue
 
-    # Start updating the table with live data
-    stream_update_thread = Thread(target=stream_update_handler)
-    stream_update_thread.start()
+            state.publish_bands(tick.symbol, tick.ema, tick.upper_band, tick.lower_band, tick.last_price)
 
-import datetime  # Add this import for timestamps
+            # Check for alerts
+            check_band_alert(state.alert_log, tick.symbol, tick.last_price, tick.upper_band, tick.lower_band)
 
-def monitor_prices(ema_tree, alert_text):
-    """Monitor prices and update the EMA table and alerts."""
+def monitor_active_orders(state):
+    """Publish the open and recently finished orders whenever an order is added or changes status."""
     while True:
-        ema, upper_band, lower_band = calculate_ema_and_bands()
-        latest_data = get_last_x_minutes_data()
-        
-        if latest_data:
-            last_price = latest_data[-1].get('Last Price')
-            if ema is not None and last_price is not None:
-                # Update the EMA table with color coding
-                update_ema_table(ema_tree, ema, upper_band, lower_band, last_price)
-
-                # Generate the current timestamp
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                # Check for alerts
-                if last_price > upper_band:
-                    alert_message = f"{timestamp} - SELL ALERT: Last price {last_price} is above the upper band {upper_band}!"
-                    alert_text.insert(tk.END, alert_message + "\n", "alert-sell")
-                elif last_price < lower_band:
-                    alert_message = f"{timestamp} - BUY ALERT: Last price {last_price} is below the lower band {lower_band}!"
-                    alert_text.insert(tk.END, alert_message + "\n", "alert-buy")
-                
-                alert_text.see(tk.END)  # Automatically scroll to the end
-
-        time.sleep(1)  # Monitor every 1 second
-
-def update_order_log(alert_text):
-    """Monitor and update the alert_text panel, filtering for alternating Buy/Sell orders."""
-    log_file_path = "orders.log"
-    
-    if not os.path.exists(log_file_path):
-        return  # Exit if log file doesn't exist
-
-    last_position = 0  # Track last position in the log file
-    last_order_type = None  # Track the last processed order type
+        order_store.changed.wait()
+        order_store.changed.clear()
+        state.publish_orders([record._asdict() for record in order_store.snapshot()])
 
+def poll_status(state, url, interval=config.GUI_MIN_REFRESH_INTERVAL):
+    """Publish the state of a running (e.g. headless) bot, read from its status endpoint."""
+    last_orders = None
     while True:
-        with open(log_file_path, "r") as log_file:
-            log_file.seek(last_position)  # Move to the last position
-            new_lines = log_file.readlines()  # Read new lines
-            last_position = log_file.tell()  # Update the last position
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                status = json.load(response)
+        except (OSError, ValueError) as e:
+            print(f"Failed to read status from {url}: {e}")
+            time.sleep(5)
+            continue
+
+        for symbol, data in status.get("quotes", {}).items():
+            state.publish_quote(symbol, data)
+
+        for symbol, band in status.get("bands", {}).items():
+            if band["ema"] is None or band["last_price"] is None:
+                continue
+            state.publish_bands(symbol, band["ema"], band["upper_band"], band["lower_band"], band["last_price"])
+            check_band_alert(state.alert_log, symbol, band["last_price"], band["upper_band"], band["lower_band"])
+
+        orders = status.get("orders", [])
+        if orders != last_orders:
+            state.publish_orders(orders)
+            last_orders = orders
+
+        time.sleep(interval)
+
+def monitor_order_log(alert_log, log_file_path="orders.log"):
+    """Add new orders.log lines to the alert log, filtering for alternating Buy/Sell orders."""
+    last_order_type = None  # Track the last processed order type
 
-        # Add new lines to the alert_text widget
-        for line in new_lines:
+    def add_lines(lines):
+        nonlocal last_order_type
+        for line in lines:
             order_type = "Buy" if "BUY" in line.upper() else "Sell" if "SELL" in line.upper() else None
             if order_type and order_type != last_order_type:  # Filter for alternating orders
-                alert_text.insert(tk.END, line.strip() + "\n")
+                alert_log.add(line.strip())
                 last_order_type = order_type  # Update the last processed order type
 
-        alert_text.see(tk.END)  # Automatically scroll to the end
-        time.sleep(1)  # Check for new logs every 1 second
+    LogTail(log_file_path).follow(add_lines)
+
+def setup_gui(client=None, account_hash=None, status_url=None):
+    """Setup the tkinter GUI and start the stream and monitoring.
 
-def setup_gui(start_stream, client, account_hash):
-    """Setup the tkinter GUI and start the stream and monitoring."""
+    With a status_url the GUI trades nothing itself and displays a bot running elsewhere.
+    """
     # Create the main window
     root = tk.Tk()
     root.title("Live Data Stream & EMA Monitor")
@@ -244,36 +382,19 @@ def setup_gui(start_stream, client, account_hash):
     alert_text.tag_configure("alert-sell", foreground="red")
     alert_text.tag_configure("alert-buy", foreground="green")
 
-    # Start the stream and monitoring in separate threads
-    run_stream(live_data_tree, start_stream)
-    monitor_thread = Thread(target=monitor_prices, args=(ema_tree, alert_text))
-    monitor_thread.start()
-
-    # Start updating the active orders panel
-    active_orders_thread = Thread(target=update_active_orders_panel, args=(active_orders_tree,))
-    active_orders_thread.start()
+    # Worker threads only publish state; the renderer applies it on the Tk main loop
+    state = GuiState()
+    GuiRenderer(root, state, live_data_tree, ema_tree, active_orders_tree, alert_text).start()
 
-    # Start polling active orders in a separate thread
-    start_polling(client, account_hash)  # This will run poll_active_orders in a separate thread
+    if status_url:
+        Thread(target=poll_status, args=(state, status_url), daemon=True).start()
+    else:
+        Thread(target=monitor_prices, args=(state,), daemon=True).start()
+        Thread(target=monitor_active_orders, args=(state,), daemon=True).start()
+        Thread(target=monitor_order_log, args=(state.alert_log,), daemon=True).start()
 
-    # Start the order executor in a separate thread
-    order_executor_thread = Thread(target=order_executer.run_order_executor, args=(active_orders_tree,))
-    order_executor_thread.start()
+        # Start the stream, order tracking and the order executor (the same loop headless mode runs)
+        start_trading(client, account_hash)
 
     # Start the tkinter main loop
     root.mainloop()
-
-def update_active_orders_panel(active_orders_tree):
-    """Update the active orders panel with the latest active orders info."""
-    while True:
-        active_orders = get_active_orders()
-
-        # Clear the tree view
-        for row in active_orders_tree.get_children():
-            active_orders_tree.delete(row)
-
-        # Insert active orders details
-        for order in active_orders:
-            active_orders_tree.insert("", "end", values=(order["order_type"], order["ticker"], order["price"], order["status"]))
-        
-        time.sleep(1)  # Refresh every second
\ No newline at end of file
@@ -0,0 +1,521 @@
+import math
+from collections import deque, namedtuple
+from threading import Lock
+import config
+from utils.ema import BandEngine
+
+# Columns of a bar series for the batch path, one NumPy array per Bar field used by indicators
+BarArrays = namedtuple("BarArrays", ["open", "high", "low", "close", "volume", "vwap"])
+
+# Output fields of indicators that can drive the band strategy
+BAND_FIELDS = ("middle", "upper", "lower")
+
+def bars_to_arrays(bars):
+    """Convert a list of Bar (or a 1-D array of closes) into BarArrays of float64 columns."""
+    import numpy as np
+    if isinstance(bars, BarArrays):
+        return bars
+    if isinstance(bars, np.ndarray) or (bars and not hasattr(bars[0], "close")):
+        closes = np.asarray(bars, dtype=np.float64)
+        return BarArrays(closes, closes, closes, closes, np.zeros(len(closes)), closes)
+    columns = [np.array([getattr(bar, field) for bar in bars], dtype=np.float64) for field in BarArrays._fields]
+    return BarArrays(*columns)
+
+def linear_filter(values, decay, gain, initial=0.0):
+    """Return y with y[t] = decay * y[t-1] + gain * values[t] and y[-1] = `initial`, vectorized.
+
+    Each block is solved in closed form from a cumulative sum scaled by decay^-i; blocks are
+    short enough that decay^-i stays far from overflowing, so the result matches the loop.
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    if not len(values):
+        return out
+    if decay <= 0.0:
+        out[:] = gain * values
+        return out
+
+    block = len(values) if decay >= 1.0 else max(1, int(150.0 / -math.log10(decay)))
+    previous = initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        scale = decay ** -np.arange(len(chunk), dtype=np.float64)
+        out[start:start + len(chunk)] = (decay * previous + gain * np.cumsum(chunk * scale)) / scale
+        previous = out[start + len(chunk) - 1]
+    return out
+
+def wilder_smooth(values, length):
+    """Wilder's moving average: the mean of the first `length` values, then alpha = 1/length (NaN before)."""
+    import numpy as np
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) < length:
+        return out
+    out[length - 1] = values[:length].mean()
+    out[length:] = linear_filter(values[length:], 1.0 - 1.0 / length, 1.0 / length, out[length - 1])
+    return out
+
+def rolling_weighted_stats(prices, weights, length, chunk_size=4096):
+    """Mean and population std of the last `length` prices (fewer while filling), weighted.
+
+    Windows whose weights sum to zero fall back to equal weights. Window sums come from
+    cumulative sums; windows whose variance is too small to survive their cancellation (flat
+    or nearly flat, e.g. gap-filled bars) are recomputed exactly in two passes.
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    prices = np.asarray(prices, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if not len(prices):
+        return np.empty(0), np.empty(0)
+    present = np.ones(len(prices))
+    has_weight = window_sums(weights, length) > 0
+    # Equal weights wherever the window has no weight at all
+    effective = lambda weighted, plain: np.where(has_weight, weighted, plain)
+
+    # Deviations from the first price keep the cumulative sums small
+    shifted = prices - prices[0]
+    total = effective(window_sums(weights, length), window_sums(present, length))
+    first = effective(window_sums(weights * shifted, length), window_sums(shifted, length)) / total
+    weighted_squares = np.cumsum(weights * shifted * shifted)
+    squares = np.cumsum(shifted * shifted)
+    second = effective(window_sums_from(weighted_squares, length), window_sums_from(squares, length)) / total
+    variance = second - first * first
+    means = first + prices[0]
+
+    # The cumulative sums carry an absolute error of a few ulps of their running total
+    magnitude = effective(weighted_squares, squares) / total
+    exact = np.flatnonzero(variance <= 1e-8 * magnitude)
+    if len(exact):
+        padding = np.zeros(length - 1)
+        price_windows = sliding_window_view(np.concatenate([padding, prices]), length)
+        weight_windows = sliding_window_view(np.concatenate([padding, weights]), length)
+        present_windows = sliding_window_view(np.concatenate([padding, present]), length)
+        for start in range(0, len(exact), chunk_size):
+            rows = exact[start:start + chunk_size]
+            window = price_windows[rows]
+            weight = np.where(has_weight[rows, None], weight_windows[rows], present_windows[rows])
+            window_total = weight.sum(axis=1)
+            mean = (weight * window).sum(axis=1) / window_total
+            deviation = window - mean[:, None]
+            means[rows] = mean
+            variance[rows] = (weight * deviation * deviation).sum(axis=1) / window_total
+    return means, np.sqrt(np.maximum(variance, 0.0))
+
+def window_sums(values, length):
+    """Sum of the last `length` values (fewer while filling) at every index."""
+    import numpy as np
+    return window_sums_from(np.cumsum(values), length)
+
+def window_sums_from(cumulative, length):
+    """Window sums from a cumulative sum, as in window_sums."""
+    sums = cumulative.copy()
+    sums[length:] -= cumulative[:-length]
+    return sums
+
+def spread_cancelled(before, moments):
+    """True when an update shrank the squared deviations `moments` = [total, mean, m2] to rounding
+    residue: by more than 1e-8 of themselves, or below a std of 1e-6 of the price.
+    """
+    total, mean, m2 = moments
+    floor = total * (1e-6 * mean) ** 2
+    return m2 < 1e-8 * before or m2 < floor <= before
+
+class WeightedWindow:
+    """Streaming counterpart of rolling_weighted_stats: O(1) per price, rebuilt every `length` adds.
+
+    Keeps weighted and equal-weight running moments (weighted Welford with removal) so the
+    zero-volume fallback needs no extra pass.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.items = deque()
+        # [total weight, mean, sum of weighted squared deviations]
+        self.weighted = [0.0, 0.0, 0.0]
+        self.plain = [0.0, 0.0, 0.0]
+        self.adds_since_rebuild = 0
+
+    @staticmethod
+    def _add(moments, price, weight):
+        if weight <= 0:
+            return
+        if moments[0] <= 0:
+            moments[:] = [weight, price, 0.0]
+            return
+        total = moments[0] + weight
+        delta = price - moments[1]
+        moments[1] += delta * weight / total
+        moments[2] += weight * delta * (price - moments[1])
+        moments[0] = total
+
+    @staticmethod
+    def _remove(moments, price, weight):
+        if weight <= 0:
+            return
+        total = moments[0] - weight
+        if total <= 0:
+            moments[:] = [0.0, 0.0, 0.0]
+            return
+        delta = price - moments[1]
+        moments[1] -= delta * weight / total
+        moments[2] -= weight * delta * (price - moments[1])
+        moments[0] = total
+
+    def add(self, price, weight):
+        """Add a price and return the window's (mean, std)."""
+        spreads = self.weighted[2], self.plain[2]
+        if len(self.items) == self.length:
+            old_price, old_weight = self.items.popleft()
+            self._remove(self.weighted, old_price, old_weight)
+            self._remove(self.plain, old_price, 1.0)
+        self.items.append((price, weight))
+        self._add(self.weighted, price, weight)
+        self._add(self.plain, price, 1.0)
+
+        # Rebuild periodically, and whenever an eviction cancelled nearly all of the spread
+        # (e.g. the window turned flat): what is left would be rounding residue
+        self.adds_since_rebuild += 1
+        if (self.adds_since_rebuild >= self.length
+                or spread_cancelled(spreads[0], self.weighted) or spread_cancelled(spreads[1], self.plain)):
+            self._rebuild()
+        total, mean, m2 = self.weighted if self.weighted[0] > 0 else self.plain
+        return mean, math.sqrt(max(m2, 0.0) / total)
+
+    def _rebuild(self):
+        """Recompute both moments exactly from the window so drift cannot accumulate."""
+        for moments, weight_of in ((self.weighted, lambda weight: weight), (self.plain, lambda weight: 1.0)):
+            total = sum(weight_of(weight) for price, weight in self.items)
+            if total <= 0:
+                moments[:] = [0.0, 0.0, 0.0]
+                continue
+            mean = sum(weight_of(weight) * price for price, weight in self.items) / total
+            moments[:] = [total, mean, sum(weight_of(weight) * (price - mean) ** 2 for price, weight in self.items)]
+        self.adds_since_rebuild = 0
+
+class Indicator:
+    """Base class: `update(bar)` advances the indicator by one bar in O(1) and returns its
+    snapshot; `compute(bars)` evaluates a whole bar series with NumPy for backtests and returns
+    one array per output field (NaN while warming up). Both paths give the same values.
+    """
+
+    name = None
+    fields = ()
+
+    def __init__(self):
+        self.snapshot = (None,) * len(self.fields)
+
+    def update(self, bar):
+        raise NotImplementedError
+
+    def compute(self, bars):
+        raise NotImplementedError
+
+    def get_snapshot(self):
+        """Return the latest output values without recomputing anything."""
+        return self.snapshot
+
+    def values(self):
+        """Return the latest output as a {field: value} dict."""
+        return dict(zip(self.fields, self.snapshot))
+
+class EMA(Indicator):
+    """Exponential moving average of bar closes with alpha = 2 / (span + 1) (or `alpha`), seeded with the first close."""
+
+    name = "ema"
+    fields = ("ema",)
+
+    def __init__(self, span=20, alpha=None):
+        super().__init__()
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.decay = 1.0 - self.alpha
+        self.value = None
+
+    def update(self, bar):
+        close = float(bar.close)
+        self.value = close if self.value is None else self.decay * self.value + self.alpha * close
+        self.snapshot = (self.value,)
+        return self.snapshot
+
+    def compute(self, bars):
+        closes = bars_to_arrays(bars).close
+        if not len(closes):
+            return (closes,)
+        return (linear_filter(closes, self.decay, self.alpha, closes[0]),)
+
+class EmaBands(Indicator):
+    """The original band: window-weighted EMA over `length` bars with population std bands (BandEngine)."""
+
+    name = "ema_bands"
+    fields = BAND_FIELDS
+
+    def __init__(self, length=config.MAX_LENGTH, multiplier=config.STD_DEVIATION_MULTIPLIER):
+        super().__init__()
+        self.length = length
+        self.multiplier = multiplier
+        self.engine = BandEngine(length, multiplier)
+
+    def update(self, bar):
+        self.engine.update(bar.close)
+        self.snapshot = self.engine.snapshot
+        return self.snapshot
+
+    def compute(self, bars):
+        import numpy as np
+        closes = bars_to_arrays(bars).close
+        decay, length = self.engine.decay, self.length
+        # Windowed sums of decay^age: the infinite sum minus what fell out of the window
+        weighted = linear_filter(closes, decay, 1.0)
+        totals = linear_filter(np.ones(len(closes)), decay, 1.0)
+        evict = self.engine.evict_weight
+        weighted[length:] = weighted[length:] - evict * weighted[:-length]
+        totals[length:] = totals[length:] - evict * totals[:-length]
+        middle = weighted / totals
+        _, std = rolling_weighted_stats(closes, np.ones(len(closes)), length)
+        return middle, middle + self.multiplier * std, middle - self.multiplier * std
+
+class Bollinger(Indicator):
+    """Simple moving average of `length` closes with population std bands."""
+
+    name = "bollinger"
+    fields = BAND_FIELDS
+
+    def __init__(self, length=20, multiplier=2.0):
+        super().__init__()
+        self.length = length
+        self.multiplier = multiplier
+        self.window = WeightedWindow(length)
+
+    def update(self, bar):
+        mean, std = self.window.add(float(bar.close), 1.0)
+        self.snapshot = (mean, mean + self.multiplier * std, mean - self.multiplier * std)
+        return self.snapshot
+
+    def compute(self, bars):
+        import numpy as np
+        closes = bars_to_arrays(bars).close
+        mean, std = rolling_weighted_stats(closes, np.ones(len(closes)), self.length)
+        return mean, mean + self.multiplier * std, mean - self.multiplier * std
+
+class VWAPBands(Indicator):
+    """Rolling VWAP of the last `length` bars with volume-weighted std bands.
+
+    Bars are weighted by their volume at their own VWAP; a window without volume (e.g. only
+    gap-filled bars) falls back to equal weights.
+    """
+
+    name = "vwap_bands"
+    fields = BAND_FIELDS
+
+    def __init__(self, length=config.MAX_LENGTH, multiplier=config.STD_DEVIATION_MULTIPLIER):
+        super().__init__()
+        self.length = length
+        self.multiplier = multiplier
+        self.window = WeightedWindow(length)
+
+    def update(self, bar):
+        mean, std = self.window.add(float(bar.vwap), float(bar.volume))
+        self.snapshot = (mean, mean + self.multiplier * std, mean - self.multiplier * std)
+        return self.snapshot
+
+    def compute(self, bars):
+        arrays = bars_to_arrays(bars)
+        mean, std = rolling_weighted_stats(arrays.vwap, arrays.volume, self.length)
+        return mean, mean + self.multiplier * std, mean - self.multiplier * std
+
+class ATR(Indicator):
+    """Average true range with Wilder smoothing over `length` bars."""
+
+    name = "atr"
+    fields = ("atr",)
+
+    def __init__(self, length=14):
+        super().__init__()
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.previous_close = None
+        self.count = 0
+        self.total = 0.0
+        self.value = None
+
+    def update(self, bar):
+        high, low = float(bar.high), float(bar.low)
+        if self.previous_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.previous_close), abs(low - self.previous_close))
+        self.previous_close = float(bar.close)
+
+        self.count += 1
+        if self.count < self.length:
+            self.total += true_range
+        elif self.count == self.length:
+            self.value = (self.total + true_range) / self.length
+        else:
+            self.value = self.decay * self.value + true_range / self.length
+        self.snapshot = (self.value,)
+        return self.snapshot
+
+    def compute(self, bars):
+        return (wilder_smooth(true_range(bars_to_arrays(bars)), self.length),)
+
+def true_range(arrays):
+    """True range of every bar; the first bar has no previous close and uses high - low."""
+    import numpy as np
+    ranges = arrays.high - arrays.low
+    if len(ranges) > 1:
+        previous_close = arrays.close[:-1]
+        ranges[1:] = np.maximum(ranges[1:], np.maximum(np.abs(arrays.high[1:] - previous_close),
+                                                       np.abs(arrays.low[1:] - previous_close)))
+    return ranges
+
+class RSI(Indicator):
+    """Relative strength index of bar closes with Wilder smoothing over `length` changes."""
+
+    name = "rsi"
+    fields = ("rsi",)
+
+    def __init__(self, length=14):
+        super().__init__()
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.previous_close = None
+        self.count = 0
+        self.average_gain = 0.0
+        self.average_loss = 0.0
+
+    def update(self, bar):
+        close = float(bar.close)
+        if self.previous_close is None:
+            self.previous_close = close
+            return self.snapshot
+        change = close - self.previous_close
+        self.previous_close = close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+
+        self.count += 1
+        if self.count <= self.length:
+            # Sums until the first average, which is a plain mean
+            self.average_gain += gain
+            self.average_loss += loss
+            if self.count < self.length:
+                return self.snapshot
+            self.average_gain /= self.length
+            self.average_loss /= self.length
+        else:
+            self.average_gain = self.decay * self.average_gain + gain / self.length
+            self.average_loss = self.decay * self.average_loss + loss / self.length
+        self.snapshot = (rsi_value(self.average_gain, self.average_loss),)
+        return self.snapshot
+
+    def compute(self, bars):
+        import numpy as np
+        closes = bars_to_arrays(bars).close
+        out = np.full(len(closes), np.nan)
+        if len(closes) <= self.length:
+            return (out,)
+        changes = np.diff(closes)
+        gains = wilder_smooth(np.maximum(changes, 0.0), self.length)[self.length - 1:]
+        losses = wilder_smooth(np.maximum(-changes, 0.0), self.length)[self.length - 1:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = 100.0 - 100.0 / (1.0 + gains / losses)
+        values = np.where(losses > 0, values, np.where(gains > 0, 100.0, 50.0))
+        out[self.length:] = values
+        return (out,)
+
+def rsi_value(average_gain, average_loss):
+    if average_loss > 0:
+        return 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+    return 100.0 if average_gain > 0 else 50.0
+
+class Keltner(Indicator):
+    """EMA of closes (span `length`) with bands `multiplier` ATRs (over `atr_length` bars) away."""
+
+    name = "keltner"
+    fields = BAND_FIELDS
+
+    def __init__(self, length=20, multiplier=2.0, atr_length=10):
+        super().__init__()
+        self.multiplier = multiplier
+        self.ema = EMA(span=length)
+        self.atr = ATR(atr_length)
+
+    def update(self, bar):
+        (middle,) = self.ema.update(bar)
+        (atr,) = self.atr.update(bar)
+        if atr is not None:
+            self.snapshot = (middle, middle + self.multiplier * atr, middle - self.multiplier * atr)
+        return self.snapshot
+
+    def compute(self, bars):
+        import numpy as np
+        arrays = bars_to_arrays(bars)
+        (middle,) = self.ema.compute(arrays)
+        (atr,) = self.atr.compute(arrays)
+        middle = np.where(np.isnan(atr), np.nan, middle)
+        return middle, middle + self.multiplier * atr, middle - self.multiplier * atr
+
+INDICATORS = {indicator.name: indicator for indicator in (EMA, EmaBands, Bollinger, VWAPBands, ATR, RSI, Keltner)}
+
+def create_indicator(spec):
+    """Build an indicator from a config spec such as {"name": "bollinger", "length": 20}."""
+    parameters = dict(spec)
+    name = parameters.pop("name")
+    indicator_class = INDICATORS.get(name)
+    if indicator_class is None:
+        raise ValueError(f"Unknown indicator: {name}")
+    return indicator_class(**parameters)
+
+def create_band_indicator(spec=None):
+    """Build the indicator the band strategy trades on (config.BAND_INDICATOR by default)."""
+    indicator = create_indicator(spec or config.BAND_INDICATOR)
+    if indicator.fields != BAND_FIELDS:
+        raise ValueError(f"Indicator {indicator.name} has no bands and cannot drive the band strategy")
+    return indicator
+
+def indicator_key(spec):
+    """Readable key of an indicator spec, e.g. "rsi(length=14)"."""
+    parameters = ",".join(f"{key}={value}" for key, value in spec.items() if key != "name")
+    return f"{spec['name']}({parameters})"
+
+class IndicatorSet:
+    """The indicators of config.INDICATORS for one symbol, advanced together on every band bar."""
+
+    def __init__(self, specs=None):
+        specs = config.INDICATORS if specs is None else specs
+        self.indicators = {indicator_key(spec): create_indicator(spec) for spec in specs}
+
+    def update(self, bar):
+        for indicator in self.indicators.values():
+            indicator.update(bar)
+
+    def values(self):
+        """Return {indicator key: {field: value}} of the latest bar."""
+        return {key: indicator.values() for key, indicator in self.indicators.items()}
+
+# Per-symbol indicator sets, fed every completed band bar by stream.handle_content
+indicator_sets = {}
+indicator_sets_lock = Lock()
+
+def get_indicator_set(symbol):
+    """Return the indicator set of a symbol, creating it on first use."""
+    indicator_set = indicator_sets.get(symbol)
+    if indicator_set is None:
+        with indicator_sets_lock:
+            indicator_set = indicator_sets.setdefault(symbol, IndicatorSet())
+    return indicator_set
+
+def seed_indicator_set(symbol, bars):
+    """Replace a symbol's indicator set with one warmed up on `bars`."""
+    indicator_set = IndicatorSet()
+    for bar in bars:
+        indicator_set.update(bar)
+    with indicator_sets_lock:
+        indicator_sets[symbol] = indicator_set
+    return indicator_set
+
+def get_indicator_values(symbol):
+    """Return the latest {indicator key: {field: value}} of a symbol ({} before its first bar)."""
+    indicator_set = indicator_sets.get(symbol)
+    return indicator_set.values() if indicator_set is not None else {}
@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+from threading import Lock
+import config
+from utils.async_log import log_writer
+
+class LatencyHistogram:
+    """Log-linear (HDR-style) latency histogram with ~6% bucket precision, recorded in microseconds.
+
+    Values below 32 us get one bucket each; above that every power of two is split into
+    16 linear sub-buckets, so recording is O(1) and memory is fixed whatever the range.
+    """
+
+    SUB_BUCKETS = 16
+    LINEAR_LIMIT = 32  # Values below this get exact one-microsecond buckets
+    MAX_EXPONENT = 40  # 2^40 us is about 12 days
+
+    def __init__(self, name=""):
+        self.name = name
+        self.counts = [0] * (self.LINEAR_LIMIT + (self.MAX_EXPONENT - 4) * self.SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.lock = Lock()
+
+    def _bucket_index(self, micros):
+        if micros < self.LINEAR_LIMIT:
+            return micros
+        exponent = min(micros.bit_length() - 1, self.MAX_EXPONENT - 1)
+        sub_bucket = min((micros >> (exponent - 4)) - self.SUB_BUCKETS, self.SUB_BUCKETS - 1)
+        return self.LINEAR_LIMIT + (exponent - 5) * self.SUB_BUCKETS + sub_bucket
+
+    def _bucket_value(self, index):
+        """Return the lower bound in microseconds of a bucket."""
+        if index < self.LINEAR_LIMIT:
+            return index
+        exponent, sub_bucket = divmod(index - self.LINEAR_LIMIT, self.SUB_BUCKETS)
+        return (self.SUB_BUCKETS + sub_bucket) << (exponent + 1)
+
+    def record(self, seconds):
+        """Record one latency sample given in seconds."""
+        micros = max(int(seconds * 1_000_000), 0)
+        index = self._bucket_index(micros)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += micros
+            if self.min is None or micros < self.min:
+                self.min = micros
+            if micros > self.max:
+                self.max = micros
+
+    def percentile(self, percent):
+        """Return the approximate latency in microseconds below which `percent` of samples fall."""
+        with self.lock:
+            if self.count == 0:
+                return None
+            threshold = self.count * percent / 100.0
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if bucket_count and seen >= threshold:
+                    return min(self._bucket_value(index), self.max)
+            return self.max
+
+    def summary(self):
+        """Return count, mean, min, max and p50/p90/p99/p99.9 in microseconds."""
+        with self.lock:
+            count, total, minimum, maximum = self.count, self.total, self.min, self.max
+        return {
+            "name": self.name,
+            "count": count,
+            "mean_us": total / count if count else None,
+            "min_us": minimum,
+            "p50_us": self.percentile(50),
+            "p90_us": self.percentile(90),
+            "p99_us": self.percentile(99),
+            "p99_9_us": self.percentile(99.9),
+            "max_us": maximum if count else None,
+        }
+
+    def reset(self):
+        with self.lock:
+            self.counts = [0] * len(self.counts)
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = 0
+
+class Counter:
+    """Monotonic event counter. Increments are plain integer adds (each counter has one writer thread)."""
+
+    def __init__(self, name=""):
+        self.name = name
+        self.value = 0
+
+    def add(self, amount=1):
+        self.value += amount
+
+class MetricsRegistry:
+    """Named stage histograms, counters and gauges for the tick-to-order path.
+
+    Stages are timed by the caller with time.perf_counter() and recorded in seconds, so the
+    hot path pays for two clock reads and one bucket increment. Gauges are callables sampled
+    only when a snapshot is taken (e.g. queue depths).
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started_at = time.time()
+        self.lock = Lock()
+
+    def histogram(self, name):
+        """Return the histogram of a stage, creating it on first use."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram(name))
+        return histogram
+
+    def counter(self, name):
+        """Return a counter, creating it on first use."""
+        counter = self.counters.get(name)
+        if counter is None:
+            with self.lock:
+                counter = self.counters.setdefault(name, Counter(name))
+        return counter
+
+    def gauge(self, name, read):
+        """Register a callable whose value is sampled in every snapshot."""
+        self.gauges[name] = read
+
+    def snapshot(self):
+        """Return uptime, counters (with their average rate), gauges and stage summaries."""
+        uptime = time.time() - self.started_at
+        gauges = {}
+        for name, read in list(self.gauges.items()):
+            try:
+                gauges[name] = read()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        return {
+            "uptime_s": round(uptime, 1),
+            "counters": {
+                name: {"total": counter.value, "per_s": round(counter.value / uptime, 2) if uptime else 0.0}
+                for name, counter in list(self.counters.items())
+            },
+            "gauges": gauges,
+            "stages": {name: histogram.summary() for name, histogram in list(self.histograms.items())},
+        }
+
+    def reset(self):
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+
+class MetricsReporter:
+    """Periodically prints a one-line-per-stage summary and appends the full snapshot as JSON.
+
+    The JSON lines go through the shared async log writer, so exporting never blocks on disk.
+    """
+
+    def __init__(self, registry, interval=config.METRICS_REPORT_INTERVAL, path=config.METRICS_LOG_FILE):
+        self.registry = registry
+        self.interval = interval
+        self.path = path
+        self.previous = {}  # counter name -> total at the previous report
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def report(self):
+        snapshot = self.registry.snapshot()
+        lines = []
+        for name, counter in snapshot["counters"].items():
+            rate = (counter["total"] - self.previous.get(name, 0)) / self.interval
+            self.previous[name] = counter["total"]
+            lines.append(f"  {name}: {counter['total']} total, {rate:.1f}/s")
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"  {name}: {value}")
+        for name, stage in snapshot["stages"].items():
+            if stage["count"]:
+                lines.append(
+                    f"  {name}: n={stage['count']} p50 {stage['p50_us']}us p99 {stage['p99_us']}us "
+                    f"p99.9 {stage['p99_9_us']}us max {stage['max_us']}us"
+                )
+        print("Metrics:\n" + "\n".join(lines))
+
+        if self.path:
+            log_writer.write(self.path, json.dumps({"time": time.time(), **snapshot}) + "\n")
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.report()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+# Shared registry for the stream, executor and order placement
+metrics = MetricsRegistry()
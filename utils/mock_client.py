@@ -0,0 +1,408 @@
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+import config
+from account.order_tracker import TERMINAL_STATUSES
+
+class MockResponse:
+    """The parts of requests.Response the order code reads."""
+
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.text = json.dumps(body) if body is not None else ""
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("No JSON body")
+        return self.body
+
+class TickGenerator:
+    """Random-walk level one quotes for any number of symbols.
+
+    Each call to next_message() moves one symbol (round robin) by a Gaussian step of
+    `volatility` times its price, rounded to cents, and returns a LEVELONE_EQUITIES frame
+    carrying only the requested field numbers, like the real stream.
+    """
+
+    # Field number -> value of a generated quote
+    FIELDS = {
+        1: lambda quote: quote["bid"], 2: lambda quote: quote["ask"], 3: lambda quote: quote["last"],
+        4: lambda quote: quote["bid_size"], 5: lambda quote: quote["ask_size"],
+        8: lambda quote: quote["volume"], 9: lambda quote: quote["last_size"],
+        34: lambda quote: quote["time"], 35: lambda quote: quote["time"],
+    }
+
+    def __init__(self, start_price=config.PAPER_START_PRICE, volatility=config.PAPER_VOLATILITY,
+                 half_spread=0.01, seed=None):
+        self.start_price = start_price
+        self.volatility = volatility
+        self.half_spread = half_spread
+        self.random = random.Random(seed)
+        self.quotes = {}  # symbol -> latest quote dict
+        self.cycle = None
+        self.symbols = ()
+
+    def set_symbols(self, symbols):
+        self.symbols = tuple(symbols)
+        self.cycle = itertools.cycle(self.symbols) if self.symbols else None
+
+    def next_quote(self, symbol):
+        """Advance a symbol's random walk and return its quote."""
+        quote = self.quotes.get(symbol)
+        if quote is None:
+            quote = self.quotes[symbol] = {"last": self.start_price, "volume": 0}
+        last = round(max(0.01, quote["last"] + self.random.gauss(0.0, self.volatility * quote["last"])), 2)
+        last_size = self.random.randint(1, 10) * 100
+        quote.update(
+            last=last,
+            bid=round(max(0.01, last - self.half_spread), 2),
+            ask=round(last + self.half_spread, 2),
+            bid_size=self.random.randint(1, 20) * 100,
+            ask_size=self.random.randint(1, 20) * 100,
+            last_size=last_size,
+            volume=quote["volume"] + last_size,
+            time=int(time.time() * 1000),
+        )
+        return quote
+
+    def next_message(self, field_numbers):
+        """Return (symbol, quote, JSON frame) for the next symbol in the rotation."""
+        symbol = next(self.cycle)
+        quote = self.next_quote(symbol)
+        content = {"key": symbol}
+        for number in field_numbers:
+            value_of = self.FIELDS.get(number)
+            if value_of is not None:
+                content[str(number)] = value_of(quote)
+        frame = {"data": [{"service": "LEVELONE_EQUITIES", "timestamp": quote["time"], "command": "SUBS",
+                           "content": [content]}]}
+        return symbol, quote, json.dumps(frame)
+
+class MockStream:
+    """Offline stand-in for client.stream: records requests and lets callers inject messages.
+
+    With `rate` > 0, started streams emit synthetic quotes for the subscribed symbols at
+    about `rate` messages per second from a background thread, and every quote is also
+    matched against the working orders of `engine`. Order changes are pushed as
+    ACCT_ACTIVITY messages once account activity is subscribed.
+    """
+
+    def __init__(self, rate=0, generator=None, engine=None):
+        self.rate = rate
+        self.generator = generator or TickGenerator()
+        self.engine = engine
+        self.handler = None
+        self.sent = []
+        self.active = False
+        self.field_numbers = ()
+        self.account_activity_subscribed = False
+        self.activity_sequence = itertools.count(1)
+        self.thread = None
+        self.stopped = threading.Event()
+        self.messages_sent = 0
+
+    def start(self, receiver):
+        self.handler = receiver
+        self.active = True
+        self.stopped.clear()
+        if self.rate and (self.thread is None or not self.thread.is_alive()):
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.active = False
+        self.stopped.set()
+
+    def send(self, request):
+        self.sent.append(request)
+        parameters = request.get("parameters", {})
+        if request.get("service") == "LEVELONE_EQUITIES":
+            keys = [key for key in parameters.get("keys", "").split(",") if key]
+            command = request.get("command")
+            if command == "SUBS":
+                self.generator.set_symbols(keys)
+            elif command == "ADD":
+                self.generator.set_symbols(dict.fromkeys(self.generator.symbols + tuple(keys)))
+            elif command == "UNSUBS":
+                self.generator.set_symbols(symbol for symbol in self.generator.symbols if symbol not in keys)
+            if parameters.get("fields"):
+                self.field_numbers = tuple(int(number) for number in parameters["fields"].split(","))
+        elif request.get("service") == "ACCT_ACTIVITY":
+            self.account_activity_subscribed = True
+
+    def level_one_equities(self, keys, fields, command="ADD"):
+        return {"service": "LEVELONE_EQUITIES", "command": command, "parameters": {"keys": keys, "fields": fields}}
+
+    def account_activity(self, keys, fields, command="SUBS"):
+        return {"service": "ACCT_ACTIVITY", "command": command, "parameters": {"keys": keys, "fields": fields}}
+
+    def inject(self, message):
+        """Deliver a raw message to the handler passed to start()."""
+        self.handler(message if isinstance(message, str) else json.dumps(message))
+
+    def publish_activity(self, order_id, activity):
+        """Push an ACCT_ACTIVITY message for an order change (e.g. "OrderFill")."""
+        if not (self.active and self.account_activity_subscribed and self.handler):
+            return
+        self.inject({"data": [{"service": "ACCT_ACTIVITY", "timestamp": int(time.time() * 1000), "command": "SUBS",
+                               "content": [{"seq": next(self.activity_sequence), "key": "Account Activity",
+                                            "1": "00000000", "2": activity, "3": json.dumps({"orderId": order_id})}]}]})
+
+    def run(self):
+        """Emit quotes at `rate` per second: whatever is due, then a short sleep."""
+        started, sent_at_start = time.perf_counter(), self.messages_sent
+        while not self.stopped.is_set():
+            due = sent_at_start + int((time.perf_counter() - started) * self.rate) - self.messages_sent
+            if self.generator.cycle is None or due > self.rate:
+                # Nothing subscribed, or a second behind: restart the schedule instead of bursting
+                started, sent_at_start = time.perf_counter(), self.messages_sent
+                due = 0
+            if not due:
+                time.sleep(0.001)
+                continue
+            for _ in range(min(due, max(1, int(self.rate // 100)))):
+                symbol, quote, message = self.generator.next_message(self.field_numbers)
+                if self.engine is not None:
+                    self.engine.on_quote(symbol, quote["bid"], quote["ask"], quote["last"])
+                self.handler(message)
+                self.messages_sent += 1
+
+class MatchingEngine:
+    """Fills MARKET and TRAILING_STOP orders against the latest quote of their symbol.
+
+    MARKET orders fill at the ask (buys) or bid (sells) plus `slippage` against the trader,
+    as soon as a quote is known. TRAILING_STOP orders follow the best stopPriceLinkBasis
+    price (LAST, BID, ASK, MARK or AVERAGE) since they became active and trigger when the
+    price gives back stopPriceOffset (VALUE) or stopPriceOffset percent (PERCENT); they then
+    fill like a market order. Children of a TRIGGER order start working when it fills.
+    Other order types are rejected. Callers hold `lock` (shared with the client).
+    """
+
+    def __init__(self, slippage=config.PAPER_SLIPPAGE, lock=None, on_change=None):
+        self.slippage = slippage
+        self.lock = lock or threading.RLock()
+        self.on_change = on_change  # Called with (order ID, activity) outside the lock
+        self.quotes = {}  # symbol -> (bid, ask, last)
+        self.working = {}  # symbol -> {order ID: order} of orders that can still fill
+        self.trail_peaks = {}  # order ID -> best basis price of a working trailing stop
+        self.positions = {}  # symbol -> {"quantity", "average_price", "realized_pnl"}
+
+    @staticmethod
+    def leg(order):
+        leg = order["orderLegCollection"][0]
+        return leg["instrument"]["symbol"], leg["instruction"], leg["quantity"]
+
+    def activate(self, order, events):
+        """Start working an order (status WORKING) and fill it right away if it can."""
+        order_type = order.get("orderType")
+        if order_type not in ("MARKET", "TRAILING_STOP"):
+            order["status"] = "REJECTED"
+            order["statusDescription"] = f"Order type {order_type} is not supported by the mock broker"
+            events.append((order["orderId"], "OrderRejected"))
+            return
+        symbol, instruction, quantity = self.leg(order)
+        order["status"] = "WORKING"
+        self.working.setdefault(symbol, {})[order["orderId"]] = order
+        quote = self.quotes.get(symbol)
+        if quote is not None:
+            self.match(order, quote, events)
+
+    def on_quote(self, symbol, bid, ask, last):
+        """Record a quote and fill or trail the working orders of its symbol."""
+        events = []
+        with self.lock:
+            quote = self.quotes[symbol] = (bid, ask, last)
+            orders = self.working.get(symbol)
+            if orders:
+                for order in list(orders.values()):
+                    self.match(order, quote, events)
+        self.notify(events)
+
+    def match(self, order, quote, events):
+        bid, ask, last = quote
+        symbol, instruction, quantity = self.leg(order)
+        buying = instruction in ("BUY", "BUY_TO_COVER")
+        if order["orderType"] == "TRAILING_STOP":
+            basis = self.basis_price(order.get("stopPriceLinkBasis", "LAST"), quote)
+            peak = self.trail_peaks.get(order["orderId"])
+            # Sell stops trail the highest price since activation, buy stops the lowest
+            if peak is None or (basis < peak if buying else basis > peak):
+                peak = self.trail_peaks[order["orderId"]] = basis
+            offset = float(order.get("stopPriceOffset", 0.0))
+            if order.get("stopPriceLinkType") == "PERCENT":
+                offset = peak * offset / 100.0
+            stop_price = peak + offset if buying else peak - offset
+            order["stopPrice"] = round(stop_price, 4)
+            if (basis < stop_price) if buying else (basis > stop_price):
+                return
+        price = (ask or last) + self.slippage if buying else (bid or last) - self.slippage
+        self.fill(order, symbol, quantity if buying else -quantity, price, events)
+
+    @staticmethod
+    def basis_price(basis, quote):
+        bid, ask, last = quote
+        if basis == "BID":
+            return bid or last
+        if basis == "ASK":
+            return ask or last
+        if basis in ("MARK", "AVERAGE") and bid and ask:
+            return (bid + ask) / 2.0
+        return last
+
+    def fill(self, order, symbol, signed_quantity, price, events):
+        """Execute an order in full at `price` and update the position."""
+        price = round(price, 4)
+        quantity = abs(signed_quantity)
+        now = datetime.now(timezone.utc).isoformat()
+        del self.working[symbol][order["orderId"]]
+        self.trail_peaks.pop(order["orderId"], None)
+        order.update(status="FILLED", filledQuantity=quantity, remainingQuantity=0, closeTime=now)
+        order["orderActivityCollection"] = [{
+            "activityType": "EXECUTION", "executionType": "FILL", "quantity": quantity,
+            "executionLegs": [{"legId": 1, "price": price, "quantity": quantity, "time": now}],
+        }]
+        events.append((order["orderId"], "OrderFill"))
+
+        position = self.positions.setdefault(symbol, {"quantity": 0, "average_price": 0.0, "realized_pnl": 0.0})
+        held = position["quantity"]
+        if held and (held > 0) != (signed_quantity > 0):
+            # Closing (part of) the position realizes P&L on the closed quantity
+            closed = min(abs(held), quantity)
+            position["realized_pnl"] += (price - position["average_price"]) * closed * (1 if held > 0 else -1)
+        new_quantity = held + signed_quantity
+        if new_quantity and (not held or (held > 0) == (signed_quantity > 0)):
+            position["average_price"] = (position["average_price"] * abs(held) + price * quantity) / abs(new_quantity)
+        elif new_quantity and (held > 0) != (new_quantity > 0):
+            position["average_price"] = price  # Flipped through flat
+        elif not new_quantity:
+            position["average_price"] = 0.0
+        position["quantity"] = new_quantity
+
+        for child in order.get("children", ()):
+            if child["status"] == "AWAITING_PARENT_ORDER":
+                self.activate(child, events)
+
+    def cancel(self, order, events):
+        """Cancel a working order and the children still waiting for it."""
+        symbol, _, _ = self.leg(order)
+        self.working.get(symbol, {}).pop(order["orderId"], None)
+        self.trail_peaks.pop(order["orderId"], None)
+        order.update(status="CANCELED", closeTime=datetime.now(timezone.utc).isoformat())
+        events.append((order["orderId"], "OrderCanceled"))
+        for child in order.get("children", ()):
+            if child["status"] not in TERMINAL_STATUSES:
+                self.cancel(child, events)
+
+    def notify(self, events):
+        if self.on_change:
+            for order_id, activity in events:
+                self.on_change(order_id, activity)
+
+class MockClient:
+    """Offline stand-in for schwabdev.Client covering the calls this project makes.
+
+    Orders are accepted with 201 and a Location header, like the real API, and are kept in
+    `orders` by ID; the matching engine fills them against the quotes of the mock stream
+    (see MatchingEngine). `latency` adds a fixed delay to every REST call to mimic a round
+    trip; `tick_rate` > 0 makes the stream emit that many synthetic quotes per second.
+    """
+
+    ACCOUNT_HASH = "MOCKACCOUNTHASH"
+
+    def __init__(self, latency=0.0, tick_rate=0, slippage=config.PAPER_SLIPPAGE, generator=None):
+        self.latency = latency
+        self.orders = {}  # order ID -> order dict as returned by order_details
+        self.order_ids = itertools.count(1000)
+        # Child orders get IDs from their own range: the API promises no relation between an
+        # order's ID and its children's, so nothing may assume the child is the parent ID + 1
+        self.child_order_ids = itertools.count(900000)
+        self.lock = threading.RLock()
+        self.engine = MatchingEngine(slippage, self.lock, self._on_order_change)
+        self.stream = MockStream(tick_rate, generator, self.engine)
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _on_order_change(self, order_id, activity):
+        self.stream.publish_activity(order_id, activity)
+
+    def account_linked(self):
+        self._wait()
+        return MockResponse(200, [{"accountNumber": "00000000", "hashValue": self.ACCOUNT_HASH}])
+
+    def _new_order(self, order, status, order_ids):
+        order_id = next(order_ids)
+        record = {key: value for key, value in order.items() if key != "childOrderStrategies"}
+        record.update(orderId=order_id, status=status, enteredTime=datetime.now(timezone.utc).isoformat(),
+                      filledQuantity=0, remainingQuantity=order["orderLegCollection"][0]["quantity"], children=[])
+        self.orders[order_id] = record
+        return record
+
+    def order_place(self, account_hash, order):
+        self._wait()
+        events = []
+        with self.lock:
+            parent = self._new_order(order, "PENDING_ACTIVATION", self.order_ids)
+            for child in order.get("childOrderStrategies", []):
+                parent["children"].append(self._new_order(child, "AWAITING_PARENT_ORDER", self.child_order_ids))
+            self.engine.activate(parent, events)
+        self.engine.notify(events)
+        location = f"https://api.schwabapi.com/trader/v1/accounts/{account_hash}/orders/{parent['orderId']}"
+        return MockResponse(201, headers={"Location": location})
+
+    def order_cancel(self, account_hash, order_id):
+        self._wait()
+        events = []
+        with self.lock:
+            order = self.orders.get(int(order_id))
+            if order is None:
+                return MockResponse(404, {"message": "Order not found"})
+            if order["status"] in TERMINAL_STATUSES:
+                return MockResponse(400, {"message": f"Order {order_id} is {order['status']} and cannot be canceled"})
+            self.engine.cancel(order, events)
+        self.engine.notify(events)
+        return MockResponse(200)
+
+    def _render(self, order):
+        """Return an order as the API shows it, children nested as childOrderStrategies."""
+        rendered = {key: value for key, value in order.items() if key != "children"}
+        if order["children"]:
+            rendered["childOrderStrategies"] = [self._render(child) for child in order["children"]]
+        return rendered
+
+    def order_details(self, account_hash, order_id):
+        self._wait()
+        with self.lock:
+            order = self.orders.get(int(order_id))
+            if order is None:
+                return MockResponse(404, {"message": "Order not found"})
+            return MockResponse(200, self._render(order))
+
+    def price_history(self, symbol, periodType=None, period=None, frequencyType=None, frequency=None,
+                      startDate=None, endDate=None, needExtendedHoursData=None, needPreviousClose=None):
+        self._wait()
+        return MockResponse(200, {"symbol": symbol, "empty": True, "candles": []})
+
+    def account_orders(self, account_hash, from_entered_time, to_entered_time, max_results=None, status=None):
+        self._wait()
+        with self.lock:
+            # Children are listed under their parent, like the real API
+            child_ids = {child["orderId"] for order in self.orders.values() for child in order["children"]}
+            orders = [self._render(order) for order_id, order in self.orders.items()
+                      if order_id not in child_ids and (status is None or order["status"] == status)]
+        return MockResponse(200, orders[:max_results] if max_results else orders)
+
+    def positions(self):
+        """Return {symbol: {"quantity", "average_price", "realized_pnl"}} of the mock account."""
+        with self.lock:
+            return {symbol: dict(position) for symbol, position in self.engine.positions.items()}
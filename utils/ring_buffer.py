@@ -0,0 +1,107 @@
+import math
+import time
+from collections import namedtuple
+import config
+
+# Column layout of the tick buffer: name and NumPy dtype
+TICK_COLUMNS = (
+    ("timestamp", "float64"),
+    ("bid", "float64"),
+    ("ask", "float64"),
+    ("last", "float64"),
+    ("bid_size", "int64"),
+    ("ask_size", "int64"),
+    ("last_size", "int64"),
+    ("volume", "int64"),
+)
+
+# A window of ticks: one array per column, oldest sample first
+TickWindow = namedtuple("TickWindow", [name for name, _ in TICK_COLUMNS])
+
+class TickRingBuffer:
+    """Fixed-capacity columnar ring buffer of ticks with lock-free, zero-copy snapshot reads.
+
+    A single writer (the stream thread) appends; any number of readers call snapshot().
+    Every sample is stored twice, at i and i + capacity, so the latest window is always
+    one contiguous slice and can be handed out as views in chronological order. A sequence
+    counter (seqlock) lets readers detect and retry snapshots that raced with a write.
+    """
+
+    def __init__(self, capacity=config.TICK_BUFFER_CAPACITY):
+        import numpy as np
+        self.capacity = capacity
+        self.arrays = tuple(np.zeros(2 * capacity, dtype=dtype) for _, dtype in TICK_COLUMNS)
+        self.is_float = tuple(dtype.startswith("float") for _, dtype in TICK_COLUMNS)
+        self.write_index = 0
+        self.count = 0
+        self.sequence = 0  # Odd while a write is in progress
+
+    def append(self, *values):
+        """Append one tick; values follow the order of TICK_COLUMNS, None is stored as NaN/0."""
+        first = self.write_index
+        second = first + self.capacity
+
+        self.sequence += 1
+        for array, is_float, value in zip(self.arrays, self.is_float, values):
+            if value is None:
+                value = math.nan if is_float else 0
+            array[first] = value
+            array[second] = value
+        self.write_index = (first + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        self.sequence += 1
+
+    def snapshot(self, length=None):
+        """Return the latest `length` ticks (all by default) as a TickWindow of read-only views.
+
+        The views alias the buffer: they are consistent when returned and stay valid until the
+        writer has appended another `capacity - length` ticks. Copy them to keep them longer.
+        """
+        while True:
+            sequence = self.sequence
+            if sequence & 1:
+                time.sleep(0)  # A write is in progress, yield to the writer and try again
+                continue
+
+            count = self.count if length is None else min(length, self.count)
+            end = self.write_index + self.capacity
+            views = []
+            for array in self.arrays:
+                view = array[end - count:end]
+                view.flags.writeable = False
+                views.append(view)
+
+            if self.sequence == sequence:
+                return TickWindow(*views)
+
+    def since(self, start_time):
+        """Return the ticks stamped at or after `start_time` as a TickWindow of read-only views."""
+        window = self.snapshot()
+        first = int(window.timestamp.searchsorted(start_time))
+        return TickWindow(*(column[first:] for column in window))
+
+    def __len__(self):
+        return self.count
+
+def summarize_ticks(window):
+    """Summarize a TickWindow: tick count and rate, mean bid/ask spread, traded volume and price range."""
+    import numpy as np
+    count = len(window.timestamp)
+    if count == 0:
+        return {"ticks": 0}
+
+    span = float(window.timestamp[-1] - window.timestamp[0])
+    spreads = window.ask - window.bid
+    spreads = spreads[~np.isnan(spreads)]
+    last = window.last[~np.isnan(window.last)]
+    # Total Volume is cumulative for the day (0 where it was never received)
+    volumes = window.volume[window.volume > 0]
+    return {
+        "ticks": count,
+        "ticks_per_s": round(count / span, 3) if span > 0 else None,
+        "mean_spread": float(spreads.mean()) if len(spreads) else None,
+        "volume": int(volumes[-1] - volumes[0]) if len(volumes) else 0,
+        "high": float(last.max()) if len(last) else None,
+        "low": float(last.min()) if len(last) else None,
+    }
@@ -0,0 +1,40 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """Serves GET /status (everything) and GET /<section> (one key of the status document)."""
+
+    # Set by start_status_server: callable returning the status dictionary
+    status_provider = None
+
+    def do_GET(self):
+        status = self.status_provider()
+        section = self.path.strip("/").split("?")[0]
+        if section in ("", "status"):
+            body = status
+        elif section in status:
+            body = status[section]
+        else:
+            self.send_error(404, f"Unknown status section: {section}")
+            return
+
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Keep status polling out of the console
+
+def start_status_server(status_provider, host=config.STATUS_HOST, port=config.STATUS_PORT):
+    """Serve the status document over HTTP from a daemon thread and return the server."""
+    handler = type("BoundStatusRequestHandler", (StatusRequestHandler,), {"status_provider": staticmethod(status_provider)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,193 @@
+from collections import namedtuple
+import config
+
+# An order a strategy wants placed. "buy" opens a position with a trailing stop, "sell" closes
+# it at market. `reason` names the rule that fired (also used for backtest fills).
+OrderIntent = namedtuple("OrderIntent", ["strategy", "symbol", "side", "price", "reason"])
+
+def band_breach(last_price, upper_band, lower_band):
+    """Return "sell" above the upper band, "buy" below the lower band, else None."""
+    if last_price is None or upper_band is None or lower_band is None:
+        return None
+    if last_price > upper_band:
+        return "sell"
+    if last_price < lower_band:
+        return "buy"
+    return None
+
+class PositionState:
+    """Per-symbol state of an alternating strategy: the side of its last placed order (None before the first buy)."""
+
+    __slots__ = ("side",)
+
+    def __init__(self):
+        self.side = None
+
+class Strategy:
+    """Base class. One instance serves every symbol it is routed; per-symbol state comes from
+    new_state() and is passed back to on_tick(), which returns an OrderIntent or None.
+
+    `tick` is a utils.tick_bus.Tick (last price and band snapshot); `indicators` is the
+    symbol's {indicator key: {field: value}} for strategies with uses_indicators, else None.
+    An intent does not change the state; the caller commits it once its order is placed.
+    """
+
+    name = None
+    uses_indicators = False
+
+    def __init__(self):
+        self.key = self.name
+
+    def new_state(self):
+        return PositionState()
+
+    def on_tick(self, state, tick, indicators):
+        raise NotImplementedError
+
+    def position(self, state):
+        """Return "long" or "flat" for the status endpoint."""
+        return "long" if state.side == "buy" else "flat"
+
+    def commit(self, state, intent):
+        """Record that the order of one of this strategy's intents was placed."""
+        state.side = intent.side
+
+    def seed(self, state, quantity):
+        """Resume from a position of `quantity` shares held before a restart."""
+        state.side = "buy" if quantity > 0 else None
+
+class AlternatingStrategy(Strategy):
+    """Strategy that starts with a buy, then alternates sells and buys. Subclasses decide
+    which side a tick asks for in signal(); repeats of the previous side are ignored.
+    """
+
+    def signal(self, tick, indicators):
+        """Return ("buy" or "sell", reason) for a tick, or None."""
+        raise NotImplementedError
+
+    def on_tick(self, state, tick, indicators):
+        signal = self.signal(tick, indicators)
+        if signal is None:
+            return None
+        side, reason = signal
+        # Never repeat the previous order and never start with a sell
+        if side == state.side or (side == "sell" and state.side is None):
+            return None
+        return OrderIntent(self.key, tick.symbol, side, tick.last_price, reason)
+
+class BandReversion(AlternatingStrategy):
+    """Buy when the price drops below the lower band, sell when it rises above the upper band.
+
+    With `rsi` set to an indicator key of config.INDICATORS (e.g. "rsi(length=14)"), buys
+    also need the RSI at or below `oversold` and sells at or above `overbought`.
+    """
+
+    name = "band_reversion"
+
+    def __init__(self, rsi=None, oversold=30.0, overbought=70.0):
+        super().__init__()
+        self.rsi = rsi
+        self.oversold = oversold
+        self.overbought = overbought
+        self.uses_indicators = rsi is not None
+
+    def signal(self, tick, indicators):
+        side = band_breach(tick.last_price, tick.upper_band, tick.lower_band)
+        if side is None:
+            return None
+        if self.rsi is not None:
+            rsi = (indicators or {}).get(self.rsi, {}).get("rsi")
+            if rsi is None or (rsi > self.oversold if side == "buy" else rsi < self.overbought):
+                return None
+        return side, "lower_band" if side == "buy" else "upper_band"
+
+class BandBreakout(AlternatingStrategy):
+    """Momentum variant: buy when the price breaks above the upper band, sell when it falls below the lower band."""
+
+    name = "band_breakout"
+
+    def signal(self, tick, indicators):
+        breach = band_breach(tick.last_price, tick.upper_band, tick.lower_band)
+        if breach == "sell":
+            return "buy", "upper_breakout"
+        if breach == "buy":
+            return "sell", "lower_breakout"
+        return None
+
+STRATEGIES = {strategy.name: strategy for strategy in (BandReversion, BandBreakout)}
+
+def create_strategy(spec):
+    """Build a strategy from a config spec such as {"name": "band_reversion", "rsi": "rsi(length=14)"}.
+
+    "key" names the instance (default: the name and its parameters) and "symbols" is left to the runner.
+    """
+    parameters = {key: value for key, value in spec.items() if key not in ("name", "key", "symbols")}
+    strategy_class = STRATEGIES.get(spec["name"])
+    if strategy_class is None:
+        raise ValueError(f"Unknown strategy: {spec['name']}")
+    strategy = strategy_class(**parameters)
+    described = ",".join(f"{key}={value}" for key, value in parameters.items())
+    strategy.key = spec.get("key") or (f"{spec['name']}({described})" if described else spec["name"])
+    return strategy
+
+class StrategyRunner:
+    """Drives many strategies over many symbols in one loop.
+
+    Each strategy spec runs on its "symbols" (default: all `symbols`). Ticks are routed by
+    symbol to (strategy, state) pairs, so a tick only touches the strategies trading it.
+    """
+
+    def __init__(self, specs=None, symbols=None):
+        specs = config.STRATEGIES if specs is None else specs
+        symbols = symbols or config.TICKER_SYMBOLS
+        self.strategies = []
+        self.routes = {}  # symbol -> [(strategy, state)]
+        for spec in specs:
+            strategy = create_strategy(spec)
+            if any(existing.key == strategy.key for existing in self.strategies):
+                raise ValueError(f"Duplicate strategy key: {strategy.key}")
+            self.strategies.append(strategy)
+            for symbol in spec.get("symbols") or symbols:
+                self.routes.setdefault(symbol, []).append((strategy, strategy.new_state()))
+        self.uses_indicators = any(strategy.uses_indicators for strategy in self.strategies)
+
+    def symbols(self):
+        return list(self.routes)
+
+    def seed_positions(self, positions):
+        """Resume every strategy from {symbol: quantity held}, so a restart does not buy again."""
+        for symbol, quantity in positions.items():
+            for strategy, state in self.routes.get(symbol, ()):
+                strategy.seed(state, quantity)
+
+    def _state(self, intent):
+        for strategy, state in self.routes.get(intent.symbol, ()):
+            if strategy.key == intent.strategy:
+                return strategy, state
+        raise KeyError(f"No strategy {intent.strategy} on {intent.symbol}")
+
+    def commit(self, intent):
+        """Record that the order of an intent was placed."""
+        strategy, state = self._state(intent)
+        strategy.commit(state, intent)
+
+    def resume(self, intent, quantity):
+        """Reset the strategy of an intent whose order was not placed to the `quantity` held."""
+        strategy, state = self._state(intent)
+        strategy.seed(state, quantity)
+
+    def on_tick(self, tick, indicators=None):
+        """Return the intents of every strategy routed the tick's symbol (usually none)."""
+        intents = []
+        for strategy, state in self.routes.get(tick.symbol, ()):
+            intent = strategy.on_tick(state, tick, indicators)
+            if intent is not None:
+                intents.append(intent)
+        return intents
+
+    def positions(self):
+        """Return {symbol: {strategy key: "long" or "flat"}}."""
+        return {
+            symbol: {strategy.key: strategy.position(state) for strategy, state in routes}
+            for symbol, routes in list(self.routes.items())
+        }
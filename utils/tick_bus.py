@@ -0,0 +1,75 @@
+from collections import deque, namedtuple
+from threading import Condition, Lock
+
+# A published quote: the symbol, its last price, the band snapshot computed from it and
+# the time.perf_counter() value taken when the stream message arrived
+Tick = namedtuple("Tick", ["symbol", "last_price", "ema", "upper_band", "lower_band", "received_at"])
+
+class Subscription:
+    """Mailbox of ticks for one subscriber.
+
+    With coalesce=True only the newest tick per symbol is kept, so a slow subscriber always
+    catches up on the latest quotes instead of working through a backlog. Otherwise ticks are
+    queued in order, dropping the oldest once `maxlen` is reached.
+    """
+
+    def __init__(self, coalesce=False, maxlen=10000):
+        self.coalesce = coalesce
+        self.pending = {} if coalesce else deque(maxlen=maxlen)
+        self.condition = Condition(Lock())
+        self.closed = False
+
+    def put(self, tick):
+        with self.condition:
+            if self.coalesce:
+                self.pending[tick.symbol] = tick
+            else:
+                self.pending.append(tick)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Block until ticks are available and return all pending ones (empty list on timeout)."""
+        with self.condition:
+            if not self.pending and not self.closed:
+                self.condition.wait(timeout)
+            if self.coalesce:
+                ticks = list(self.pending.values())
+            else:
+                ticks = list(self.pending)
+            self.pending.clear()
+            return ticks
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __iter__(self):
+        while not self.closed:
+            yield from self.get()
+
+class TickBus:
+    """Publish/subscribe hub that pushes every processed tick to all subscribers."""
+
+    def __init__(self):
+        self.subscriptions = []
+        self.lock = Lock()
+
+    def subscribe(self, coalesce=False, maxlen=10000):
+        subscription = Subscription(coalesce, maxlen)
+        with self.lock:
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+        subscription.close()
+
+    def publish(self, tick):
+        # The list is replaced (never mutated) on subscribe, so it can be iterated without the lock
+        for subscription in self.subscriptions:
+            subscription.put(tick)
+
+# Shared tick bus, fed by stream.my_custom_handler
+tick_bus = TickBus()
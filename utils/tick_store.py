@@ -0,0 +1,187 @@
+import os
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta
+import config
+from utils.ring_buffer import TICK_COLUMNS, TickWindow
+
+# NumPy is imported inside the functions that use it, so the stream can import the recorder cheaply
+
+# One timestamp is copied into the sparse index every INDEX_STRIDE ticks
+INDEX_STRIDE = 4096
+INDEX_FILE = "index.f8"
+
+def column_file(name, dtype):
+    """File name of a column, e.g. "last.f8" or "volume.i8"."""
+    import numpy as np
+    return f"{name}.{np.dtype(dtype).kind}{np.dtype(dtype).itemsize}"
+
+def day_of(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+def days_between(start_time, end_time):
+    """Return the days (as named in the store) holding ticks with start_time <= timestamp < end_time."""
+    days = []
+    day = datetime.fromtimestamp(start_time).replace(hour=0, minute=0, second=0, microsecond=0)
+    while day.timestamp() < end_time:
+        days.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+    return days
+
+class TickRecorder:
+    """Appends ticks to per-symbol, per-day columnar files from a background thread.
+
+    Layout: <root>/<YYYY-MM-DD>/<SYMBOL>/<column>.<kind><size>, one raw little-endian array per
+    TICK_COLUMNS entry, plus index.f8 holding every INDEX_STRIDE-th timestamp. Files are only
+    ever appended to. record() just appends to an in-memory batch, so the stream thread
+    never waits on disk.
+    """
+
+    def __init__(self, root=config.TICK_STORE_DIR, flush_interval=config.TICK_STORE_FLUSH_INTERVAL):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.pending = {}  # symbol -> list of tick tuples
+        self.counts = {}  # (day, symbol) -> ticks already on disk
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def record(self, symbol, *values):
+        """Queue one tick; values follow TICK_COLUMNS, starting with the timestamp."""
+        with self.lock:
+            batch = self.pending.get(symbol)
+            if batch is None:
+                batch = self.pending[symbol] = []
+            batch.append(values)
+
+    def flush(self):
+        """Write every queued tick to disk."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        for symbol, rows in pending.items():
+            # Split the batch at day boundaries
+            start = 0
+            for end in range(1, len(rows) + 1):
+                if end == len(rows) or day_of(rows[end][0]) != day_of(rows[start][0]):
+                    self._append(day_of(rows[start][0]), symbol, rows[start:end])
+                    start = end
+
+    def _append(self, day, symbol, rows):
+        import numpy as np
+        directory = os.path.join(self.root, day, symbol)
+        key = (day, symbol)
+        if key not in self.counts:
+            os.makedirs(directory, exist_ok=True)
+            self.counts[key] = self._recover(directory)
+
+        columns = list(zip(*rows))
+        for (name, dtype), values in zip(TICK_COLUMNS, columns):
+            fill = np.nan if np.issubdtype(dtype, np.floating) else 0
+            array = np.array([fill if value is None else value for value in values], dtype=np.dtype(dtype).newbyteorder("<"))
+            with open(os.path.join(directory, column_file(name, dtype)), "ab") as column:
+                column.write(array.tobytes())
+
+        # Extend the sparse index with the timestamps that land on a stride boundary
+        count = self.counts[key]
+        first = -count % INDEX_STRIDE
+        if first < len(rows):
+            index_values = np.array(columns[0][first::INDEX_STRIDE], dtype="<f8")
+            with open(os.path.join(directory, INDEX_FILE), "ab") as index:
+                index.write(index_values.tobytes())
+        self.counts[key] = count + len(rows)
+
+    def _recover(self, directory):
+        """Return the number of complete ticks on disk, cutting every file back to it.
+
+        A crash mid-flush can leave some columns longer than others; appending after them
+        would misalign the columns for good, so the extra rows (and index entries) are dropped.
+        """
+        paths = [os.path.join(directory, column_file(name, dtype)) for name, dtype in TICK_COLUMNS]
+        sizes = [os.path.getsize(path) if os.path.exists(path) else 0 for path in paths]
+        count = min(sizes) // 8
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            paths.append(index_path)
+            sizes.append(os.path.getsize(index_path))
+        lengths = [count * 8] * len(TICK_COLUMNS) + [-(-count // INDEX_STRIDE) * 8]
+        for path, size, length in zip(paths, sizes, lengths):
+            if size > length:
+                with open(path, "r+b") as file:
+                    file.truncate(length)
+        return count
+
+    def run(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Tick recorder flush failed: {e}")
+        self.flush()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        """Flush what is left and stop the background thread."""
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+
+class TickStore:
+    """Reads recorded ticks through memory maps, so replays do not copy or parse anything."""
+
+    def __init__(self, root=config.TICK_STORE_DIR):
+        self.root = root
+
+    def days(self, symbol):
+        """Return the recorded days of a symbol, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(day for day in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, day, symbol)))
+
+    def symbols(self, day):
+        directory = os.path.join(self.root, day)
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def _map(self, path, dtype, length):
+        import numpy as np
+        if length == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=np.dtype(dtype).newbyteorder("<"), mode="r", shape=(length,))
+
+    def load(self, symbol, day):
+        """Return a whole day of a symbol as a TickWindow of read-only memory-mapped columns."""
+        directory = os.path.join(self.root, day, symbol)
+        paths = [os.path.join(directory, column_file(name, dtype)) for name, dtype in TICK_COLUMNS]
+        # Columns can differ in length after a crash mid-flush; only expose complete ticks
+        length = min((os.path.getsize(path) // 8 if os.path.exists(path) else 0) for path in paths)
+        return TickWindow(*(self._map(path, dtype, length) for path, (_, dtype) in zip(paths, TICK_COLUMNS)))
+
+    def query(self, symbol, day, start_time=None, end_time=None):
+        """Return the ticks with start_time <= timestamp < end_time as zero-copy views."""
+        import numpy as np
+        ticks = self.load(symbol, day)
+        timestamps = ticks.timestamp
+        length = len(timestamps)
+
+        index_path = os.path.join(self.root, day, symbol, INDEX_FILE)
+        index_length = min(os.path.getsize(index_path) // 8, -(-length // INDEX_STRIDE)) if os.path.exists(index_path) else 0
+        index = self._map(index_path, np.float64, index_length).tolist()
+
+        start = self._locate(timestamps, index, start_time, length) if start_time is not None else 0
+        end = self._locate(timestamps, index, end_time, length) if end_time is not None else length
+        return TickWindow(*(column[start:end] for column in ticks))
+
+    def _locate(self, timestamps, index, value, length):
+        """Position of the first tick >= value, using the sparse index to touch only one stride."""
+        import numpy as np
+        if not index:
+            return int(np.searchsorted(timestamps, value, side="left"))
+        # index[block - 1] < value <= index[block], so the answer lies in ((block - 1) * stride, block * stride]
+        block = bisect_left(index, value)
+        low = max(block - 1, 0) * INDEX_STRIDE
+        high = min(block * INDEX_STRIDE + 1, length) if block < len(index) else length
+        return low + int(np.searchsorted(timestamps[low:high], value, side="left"))